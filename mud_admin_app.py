@@ -1,7 +1,11 @@
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import ttk, messagebox, simpledialog
+import bisect
 import json
 import os
+import queue
+import threading
 
 WORLD_FILE = "server/data/world.json"
 ITEMS_FILE = "server/data/items.json"
@@ -13,6 +17,9 @@ EQUIP_SLOTS = [
     "Relic", "Light Source"
 ] # Standardized with Player.ALL_EQUIPMENT_SLOTS
 
+# Seconds a failed background save waits before trying again
+SAVE_RETRY_INTERVAL = 5
+
 class ToolTip:
     def __init__(self, widget, text):
         self.widget = widget
@@ -40,6 +47,239 @@ class ToolTip:
             self.tipwindow.destroy()
         self.tipwindow = None
 
+class JsonWriter:
+    """Saves a JSON object file (one top-level key per room or item) off the Tk thread.
+
+    Each record is encoded when it changes and the text is kept, so a write
+    only joins cached text around the records changed since the last one. The
+    output matches json.dump(data, f, indent=2) and replaces the file through
+    a temp file, so a crash mid-write leaves the previous version intact.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.cond = threading.Condition()
+        self.changes = {}  # key -> encoded record, or None to delete it
+        self.encoded = None  # key -> encoded record; read from the file on the first write
+        self.results = queue.Queue()  # (ok, message) for the Tk thread to show
+        self.closing = False
+        self.thread = threading.Thread(target=self.run, name=f"writer-{os.path.basename(path)}", daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def encode(value):
+        return json.dumps(value, indent=2).replace("\n", "\n  ")
+
+    def update(self, key, value):
+        text = self.encode(value)
+        with self.cond:
+            self.changes[key] = text
+            self.cond.notify()
+
+    def delete(self, key):
+        with self.cond:
+            self.changes[key] = None
+            self.cond.notify()
+
+    def poll(self):
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.changes and not self.closing:
+                    self.cond.wait()
+                if not self.changes:
+                    return
+                changes, self.changes = self.changes, {}
+            try:
+                self.write(changes)
+                self.results.put((True, len(changes)))
+            except Exception as e:
+                self.results.put((False, str(e)))
+                with self.cond:
+                    # Anything changed again since is newer than what failed
+                    for key, text in changes.items():
+                        self.changes.setdefault(key, text)
+                    if not self.closing:
+                        self.cond.wait(SAVE_RETRY_INTERVAL)
+                    else:
+                        return
+
+    def write(self, changes):
+        if self.encoded is None:
+            data = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+            self.encoded = {key: self.encode(value) for key, value in data.items()}
+        for key, text in changes.items():
+            if text is None:
+                self.encoded.pop(key, None)
+            else:
+                self.encoded[key] = text
+        parts = [f"  {json.dumps(key)}: {text}" for key, text in self.encoded.items()]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("{\n" + ",\n".join(parts) + "\n}" if parts else "{}")
+        os.replace(tmp_path, self.path)
+
+    def close(self, timeout=10):
+        """Finishes any pending write."""
+        with self.cond:
+            self.closing = True
+            self.cond.notify()
+        self.thread.join(timeout)
+
+class VirtualList(ttk.Frame):
+    """A filterable list of sorted ids whose Listbox only holds the visible rows.
+
+    Scrolling only re-renders the rows on screen, and filtering is one pass
+    over the ids, so a hundred thousand rooms never go through Tk at once.
+    """
+    FILTER_DELAY = 150  # ms after the last keystroke in the filter box
+
+    def __init__(self, master, on_select, width=30):
+        super().__init__(master)
+        self.on_select = on_select
+        self.keys = []  # every id, sorted
+        self.shown = self.keys  # ids matching the filter, sorted
+        self.top = 0
+        self.rows = 1
+        self.selected = None
+        self.filter_after_id = None
+
+        self.filter_var = tk.StringVar()
+        self.filter_entry = ttk.Entry(self, textvariable=self.filter_var)
+        self.filter_entry.pack(fill=tk.X)
+        ToolTip(self.filter_entry, "Show only ids containing this text")
+        self.filter_var.trace_add("write", self.on_filter_changed)
+        self.count_label = ttk.Label(self, text="")
+        self.count_label.pack(anchor="w")
+
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(body, width=width, exportselection=False)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.line_height = max(1, tkfont.Font(font=self.listbox.cget("font")).metrics("linespace"))
+        self.listbox.bind("<<ListboxSelect>>", self.on_listbox_select)
+        self.listbox.bind("<Configure>", self.on_resize)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.listbox.bind(sequence, self.on_wheel)
+        self.listbox.bind("<Up>", lambda event: self.step(-1))
+        self.listbox.bind("<Down>", lambda event: self.step(1))
+
+    def matches(self, key):
+        text = self.filter_var.get().strip().lower()
+        return not text or text in key.lower()
+
+    def set_keys(self, keys):
+        self.keys = sorted(keys)
+        self.apply_filter()
+
+    def add_key(self, key):
+        bisect.insort(self.keys, key)
+        if self.shown is not self.keys and self.matches(key):
+            bisect.insort(self.shown, key)
+        self.render()
+
+    def remove_key(self, key):
+        for keys in ([self.keys] if self.shown is self.keys else [self.keys, self.shown]):
+            i = bisect.bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+        if self.selected == key:
+            self.selected = None
+        self.set_top(self.top, force=True)
+
+    def on_filter_changed(self, *args):
+        if self.filter_after_id:
+            self.after_cancel(self.filter_after_id)
+        self.filter_after_id = self.after(self.FILTER_DELAY, self.apply_filter)
+
+    def apply_filter(self):
+        self.filter_after_id = None
+        text = self.filter_var.get().strip().lower()
+        self.shown = [key for key in self.keys if text in key.lower()] if text else self.keys
+        self.top = 0
+        self.scroll_to(self.selected)
+        self.render()
+
+    def index_of(self, key):
+        i = bisect.bisect_left(self.shown, key) if key is not None else len(self.shown)
+        return i if i < len(self.shown) and self.shown[i] == key else None
+
+    def scroll_to(self, key):
+        index = self.index_of(key)
+        if index is not None and not self.top <= index < self.top + self.rows:
+            self.top = index - self.rows // 2
+        self.set_top(self.top, force=True)
+
+    def set_top(self, top, force=False):
+        top = max(0, min(top, len(self.shown) - self.rows))
+        if top != self.top or force:
+            self.top = top
+            self.render()
+
+    def render(self):
+        total = len(self.shown)
+        visible = self.shown[self.top:self.top + self.rows]
+        self.listbox.delete(0, tk.END)
+        if visible:
+            self.listbox.insert(tk.END, *visible)
+        index = self.index_of(self.selected)
+        if index is not None and self.top <= index < self.top + self.rows:
+            self.listbox.selection_set(index - self.top)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.rows) / total))
+        else:
+            self.scrollbar.set(0, 1)
+        self.count_label.config(text=f"{total} of {len(self.keys)}")
+
+    def select(self, key):
+        self.selected = key
+        self.scroll_to(key)
+        self.on_select(key)
+
+    def step(self, delta):
+        index = self.index_of(self.selected)
+        index = 0 if index is None else max(0, min(len(self.shown) - 1, index + delta))
+        if self.shown:
+            self.select(self.shown[index])
+        return "break"
+
+    def on_listbox_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            key = self.listbox.get(selection[0])
+            if key != self.selected:
+                self.selected = key
+                self.on_select(key)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.set_top(int(float(amount) * len(self.shown)))
+        elif action == "scroll":
+            self.set_top(self.top + int(amount) * (self.rows if unit == "pages" else 1))
+
+    def on_wheel(self, event):
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.set_top(self.top + (-3 if up else 3))
+        return "break"
+
+    def on_resize(self, event):
+        rows = max(1, (event.height - 4) // self.line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.set_top(self.top, force=True)
+
 class WorldEditor(ttk.Frame):
     DIRECTIONS = ["north", "south", "east", "west", "up", "down"]
 
@@ -48,11 +288,12 @@ class WorldEditor(ttk.Frame):
         self.world = {}
         self.selected_room_id = None
         self.autosave_after_id = None
+        self.writer = JsonWriter(WORLD_FILE)
+        self.save_failed = False
 
         # Left side - room list
-        self.room_listbox = tk.Listbox(self, width=30)
-        self.room_listbox.pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
-        self.room_listbox.bind("<<ListboxSelect>>", self.on_room_select)
+        self.room_list = VirtualList(self, self.on_room_select)
+        self.room_list.pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
 
         # Right side frame
         right_frame = ttk.Frame(self)
@@ -115,6 +356,18 @@ class WorldEditor(ttk.Frame):
         self.status_label.pack(pady=2)
 
         self.load_world()
+        self.poll_saves()
+
+    def poll_saves(self):
+        for ok, result in self.writer.poll():
+            if ok:
+                self.status_label.config(text="World saved.", foreground="green")
+            else:
+                self.status_label.config(text="Save failed; retrying.", foreground="red")
+                if not self.save_failed:
+                    messagebox.showerror("Error", f"Could not save world:\n{result}")
+            self.save_failed = not ok
+        self.after(200, self.poll_saves)
 
     def on_text_modified(self, event):
         widget = event.widget
@@ -176,15 +429,10 @@ class WorldEditor(ttk.Frame):
         self.refresh_room_list()
 
     def refresh_room_list(self):
-        self.room_listbox.delete(0, tk.END)
-        for room_id in sorted(self.world.keys()):
-            self.room_listbox.insert(tk.END, room_id)
+        self.room_list.set_keys(self.world.keys())
 
-    def on_room_select(self, event):
-        selection = self.room_listbox.curselection()
-        if selection:
-            index = selection[0]
-            room_id = self.room_listbox.get(index)
+    def on_room_select(self, room_id):
+        if room_id in self.world:
             self.selected_room_id = room_id
             room = self.world[room_id]
 
@@ -209,24 +457,17 @@ class WorldEditor(ttk.Frame):
                 messagebox.showerror("Error", "Room ID already exists.")
                 return
             self.world[new_id] = {"description": "", "exits": {}}
-            self.refresh_room_list()
-            idx = list(sorted(self.world.keys())).index(new_id)
-            self.room_listbox.selection_clear(0, tk.END)
-            self.room_listbox.selection_set(idx)
-            self.room_listbox.event_generate("<<ListboxSelect>>")
+            self.room_list.add_key(new_id)
+            self.room_list.select(new_id)
 
     def save_room(self):
         if not self.selected_room_id:
             return
         desc = self.desc_text.get("1.0", tk.END).strip()
         exits = self.world[self.selected_room_id].get("exits", {})
-        self.world[self.selected_room_id] = {"description": desc, "exits": exits}
-        try:
-            with open(WORLD_FILE, "w") as f:
-                json.dump(self.world, f, indent=2)
-            self.status_label.config(text="World saved.", foreground="green")
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not save world:\n{e}")
+        self.world[self.selected_room_id] = {**self.world[self.selected_room_id], "description": desc, "exits": exits}
+        self.writer.update(self.selected_room_id, self.world[self.selected_room_id])
+        self.status_label.config(text="Saving...", foreground="orange")
 
     def delete_room(self):
         if not self.selected_room_id:
@@ -234,14 +475,67 @@ class WorldEditor(ttk.Frame):
         confirm = messagebox.askyesno("Delete Room", f"Delete room '{self.selected_room_id}'?")
         if confirm:
             self.world.pop(self.selected_room_id, None)
+            self.writer.delete(self.selected_room_id)
+            self.room_list.remove_key(self.selected_room_id)
             self.selected_room_id = None
-            self.refresh_room_list()
-            self.save_room()
+            self.status_label.config(text="Saving...", foreground="orange")
+
+class ItemIndex:
+    """Item ids bucketed by lower-cased type, each bucket kept sorted as items change.
+
+    put() and remove() return the (type, position) of the rows they touched,
+    so the editor patches those rows instead of refilling every tab.
+    """
+
+    def __init__(self, items):
+        self.types = {}  # item_id -> bucket
+        self.buckets = {}  # type -> sorted item ids
+        for item_id, item_data in items.items():
+            item_type = self.type_of(item_data)
+            self.types[item_id] = item_type
+            self.buckets.setdefault(item_type, []).append(item_id)
+        for ids in self.buckets.values():
+            ids.sort()
+
+    @staticmethod
+    def type_of(item_data):
+        return (item_data.get("type") or "").lower()
+
+    @staticmethod
+    def row(item_id, item_data):
+        return f"{item_id} - {item_data.get('name', '')}"
+
+    def ids(self, item_type):
+        return self.buckets.get(item_type, [])
+
+    def remove(self, item_id):
+        """Returns the (type, position) the item was at, or None if it wasn't indexed."""
+        item_type = self.types.pop(item_id, None)
+        if item_type is None:
+            return None
+        ids = self.buckets[item_type]
+        position = bisect.bisect_left(ids, item_id)
+        del ids[position]
+        return item_type, position
+
+    def put(self, item_id, item_data):
+        """Indexes a new or changed item; returns (old (type, position) or None, new (type, position))."""
+        removed = self.remove(item_id)
+        item_type = self.type_of(item_data)
+        self.types[item_id] = item_type
+        ids = self.buckets.setdefault(item_type, [])
+        position = bisect.bisect_left(ids, item_id)
+        ids.insert(position, item_id)
+        return removed, (item_type, position)
 
 class ItemEditor(ttk.Frame):
     def __init__(self, master):
         super().__init__(master)
         self.items = self.load_items()
+        self.index = ItemIndex(self.items)
+        self.type_listboxes = {}  # item type -> that tab's item listbox
+        self.writer = JsonWriter(ITEMS_FILE)
+        self.save_failed = False
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(fill=tk.BOTH, expand=True)
         self.tabs = {}
@@ -255,6 +549,7 @@ class ItemEditor(ttk.Frame):
             self.notebook.add(frame, text=category)
             self.tabs[category] = frame
             self.build_item_form(frame, self.category_types[category])
+        self.poll_saves()
 
     def load_items(self):
         if not os.path.exists(ITEMS_FILE):
@@ -266,15 +561,32 @@ class ItemEditor(ttk.Frame):
                 messagebox.showerror("Error", "Failed to load items.json — file may be corrupted.")
                 return {}
 
-    def save_items(self):
-        try:
-            with open(ITEMS_FILE, "w") as f:
-                json.dump(self.items, f, indent=2)
-            messagebox.showinfo("Saved", "Items saved successfully!")
-            if hasattr(self, 'refresh_all_item_lists'): # Check if method is defined
-                self.refresh_all_item_lists()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save items:\n{e}")
+    def save_items(self, item_id):
+        self.writer.update(item_id, self.items[item_id])
+        self.update_item_row(item_id)
+
+    def poll_saves(self):
+        for ok, result in self.writer.poll():
+            if ok:
+                messagebox.showinfo("Saved", "Items saved successfully!")
+            elif not self.save_failed:
+                messagebox.showerror("Error", f"Failed to save items:\n{result}")
+            self.save_failed = not ok
+        self.after(200, self.poll_saves)
+
+    def update_item_row(self, item_id):
+        removed, (item_type, position) = self.index.put(item_id, self.items[item_id])
+        if removed and removed[0] in self.type_listboxes:
+            self.type_listboxes[removed[0]].delete(removed[1])
+        if item_type in self.type_listboxes:
+            self.type_listboxes[item_type].insert(position, ItemIndex.row(item_id, self.items[item_id]))
+
+    def populate_listbox(self, item_type):
+        listbox_widget = self.type_listboxes[item_type]
+        listbox_widget.delete(0, tk.END)
+        rows = [ItemIndex.row(item_id, self.items[item_id]) for item_id in self.index.ids(item_type)]
+        if rows:
+            listbox_widget.insert(tk.END, *rows)
 
     def update_dynamic_fields(self, frame):
         current_type = frame.entries["type_var"].get().strip().lower()
@@ -425,19 +737,8 @@ class ItemEditor(ttk.Frame):
         frame.columnconfigure(1, weight=1)
         self.update_dynamic_fields(frame)
 
-        def populate_listbox():
-            listbox_widget = frame.entries["item_listbox"] # Use a more descriptive name
-            listbox_widget.delete(0, tk.END)
-            # Use consistent and descriptive variable names
-            filtered_items = [
-                (item_id, item_data)
-                for item_id, item_data in self.items.items()
-                if item_data.get("type", "").lower() == default_type
-            ]
-            for item_id, item_data in sorted(filtered_items, key=lambda x: x[0]):
-                display_name = item_data.get("name", "")
-                listbox_widget.insert(tk.END, f"{item_id} - {display_name}")
-        populate_listbox()
+        self.type_listboxes[default_type] = item_listbox_widget
+        self.populate_listbox(default_type)
 
         def on_listbox_select(event):
             widget = event.widget
@@ -451,26 +752,6 @@ class ItemEditor(ttk.Frame):
                 self.load_item_into_form(frame)
         frame.entries["item_listbox"].bind("<<ListboxSelect>>", on_listbox_select)
 
-        if not hasattr(self, 'refresh_all_item_lists_defined_flag'):
-            self.refresh_all_item_lists_defined_flag = True
-            def refresh_all_lists_function(): # Renamed for clarity from the outer scope 'refresh_all_item_lists' attribute
-                for category_name, tab_frame in self.tabs.items(): # Use descriptive names
-                    if "item_listbox" in tab_frame.entries: # Corrected f_t to tab_frame
-                        listbox_widget = tab_frame.entries["item_listbox"]
-                        listbox_widget.delete(0, tk.END)
-                        item_type_for_tab = self.category_types[category_name]
-
-                        # Use consistent and descriptive variable names
-                        filtered_items = [
-                            (item_id, item_data)
-                            for item_id, item_data in self.items.items()
-                            if item_data.get("type", "").lower() == item_type_for_tab
-                        ]
-                        for item_id, item_data in sorted(filtered_items, key=lambda x: x[0]):
-                            display_name = item_data.get("name", "")
-                            listbox_widget.insert(tk.END, f"{item_id} - {display_name}")
-            self.refresh_all_item_lists = refresh_all_lists_function # Assign the correctly named function
-
     def show_item_help(self):
         help_text = (
             "Item Editor Help:\n\n"
@@ -625,7 +906,7 @@ class ItemEditor(ttk.Frame):
             item_data["capacity"] = capacity_val
 
         self.items[item_id] = item_data
-        self.save_items()
+        self.save_items(item_id)
 
 class MudAdminApp(tk.Tk):
     def __init__(self):
@@ -638,6 +919,13 @@ class MudAdminApp(tk.Tk):
         tab_control.add(self.world_editor, text="World Editor")
         self.item_editor = ItemEditor(tab_control)
         tab_control.add(self.item_editor, text="Item Editor")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        # Let queued saves reach disk before the process exits
+        self.world_editor.writer.close()
+        self.item_editor.writer.close()
+        self.destroy()
 
 if __name__ == "__main__":
     app = MudAdminApp()
@@ -0,0 +1,198 @@
+import threading
+import time
+from collections import deque
+from server.core.metrics import METRICS
+from server.core.telnet import PRIORITY_LOW
+
+# Channels every player is subscribed to on login
+GLOBAL_CHANNELS = ("shout", "ooc")
+# Longest chat message delivered; anything past it is cut off
+MAX_MESSAGE_LENGTH = 400
+
+
+def clean_text(text):
+    """Chat text as sent on to others: printable characters only, at most MAX_MESSAGE_LENGTH."""
+    return "".join(ch for ch in text[:MAX_MESSAGE_LENGTH] if ch.isprintable()).strip()
+
+
+class ChannelHub:
+    """Chat channels: one per room, the global ones in GLOBAL_CHANNELS, and tells.
+
+    Each channel is a set of subscribed Player objects. A message is encoded
+    to bytes once, by the sender's command thread, and handed to a single
+    fan-out thread; that thread queues the same bytes on every subscriber's
+    connection (TelnetConnection.sendall only appends to its queue) and
+    flushes it. The sender never waits on the recipients.
+
+    Chat goes out at PRIORITY_LOW, so a client that has stopped reading
+    loses chat lines rather than being disconnected over them. A recipient
+    whose muted set holds the sender's lower-case name is skipped.
+
+    Under server.gateway each worker has its own hub for its own players.
+    Room chat never leaves the worker, since a room belongs to one worker.
+    Global channels and tells to characters on other workers go to relay(key,
+    sender name, text), and the gateway hands them to receive() on the other
+    workers.
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.channels = {name: set() for name in GLOBAL_CHANNELS}
+        self.rooms = {}  # Room -> players in it
+        self.where = {}  # connected Player -> Room it is subscribed to
+        self.by_name = {}  # lower-case character name -> connected Players with it, for tells
+        self.outbox = deque()  # (recipients key, sender, data)
+        self.pending = 0  # messages queued or being delivered
+        self.thread = None
+        self.relay = None  # set by shard workers; see the class docstring
+
+    def connect(self, player, room, off=()):
+        """Subscribes a player to its room and to every global channel not named in off."""
+        with self.cond:
+            for name in GLOBAL_CHANNELS:
+                if name not in off:
+                    self.channels[name].add(player)
+            self.by_name.setdefault(player.name.lower(), set()).add(player)
+            self.where[player] = room
+            self.rooms.setdefault(room, set()).add(player)
+
+    def disconnect(self, player):
+        with self.cond:
+            for members in self.channels.values():
+                members.discard(player)
+            named = self.by_name.get(player.name.lower())
+            if named is not None:
+                named.discard(player)
+                if not named:
+                    del self.by_name[player.name.lower()]
+            room = self.where.pop(player, None)
+            if room is not None:
+                self.leave_room(player, room)
+
+    def enter(self, player, room):
+        """Moves a connected player's room subscription; anyone else is ignored."""
+        with self.cond:
+            old = self.where.get(player)
+            if old is None or old is room:
+                return
+            self.leave_room(player, old)
+            self.where[player] = room
+            self.rooms.setdefault(room, set()).add(player)
+
+    def leave_room(self, player, room):
+        # Caller holds self.cond
+        members = self.rooms.get(room)
+        if members is not None:
+            members.discard(player)
+            if not members:
+                del self.rooms[room]
+
+    def subscribe(self, player, channel, on=True):
+        with self.cond:
+            if player not in self.where:
+                return
+            if on:
+                self.channels[channel].add(player)
+            else:
+                self.channels[channel].discard(player)
+
+    def subscribed(self, player, channel):
+        with self.cond:
+            return player in self.channels[channel]
+
+    def find(self, name):
+        """Every connected player with that name; names are only unique within an account."""
+        with self.cond:
+            return list(self.by_name.get(name.lower(), ()))
+
+    def publish(self, channel, sender, text):
+        """Queues text for every subscriber of a global channel except the sender."""
+        self.post(channel, sender, text)
+        if self.relay is not None:
+            self.relay(channel, sender.name, text)
+
+    def say(self, room, sender, text):
+        self.post(room, sender, text)
+
+    def tell(self, target, sender, text):
+        self.post((target,), sender, text)
+
+    def tell_elsewhere(self, key, sender, text):
+        """A tell to the character with presence key (name, account) on another shard worker."""
+        self.relay(("tell",) + key, sender.name, text)
+
+    def receive(self, key, sender_name, text):
+        """Delivers chat relayed from another shard worker to the players here."""
+        sender = RemoteSender(sender_name)
+        if isinstance(key, str):
+            self.post(key, sender, text)
+            return
+        _, name, account = key
+        with self.cond:
+            targets = [player for player in self.by_name.get(name, ()) if player.account == account]
+        for target in targets:
+            self.post((target,), sender, text)
+
+    def post(self, key, sender, text):
+        data = f"\r\n{text}\r\n".encode()
+        with self.cond:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.fanout_loop, name="chat-fanout", daemon=True)
+                self.thread.start()
+            self.outbox.append((key, sender, data))
+            self.pending += 1
+            self.cond.notify_all()
+
+    def fanout_loop(self):
+        while True:
+            with self.cond:
+                while not self.outbox:
+                    self.cond.wait()
+                key, sender, data = self.outbox.popleft()
+                if isinstance(key, tuple):
+                    recipients = key
+                elif isinstance(key, str):
+                    recipients = list(self.channels.get(key, ()))
+                else:
+                    recipients = list(self.rooms.get(key, ()))
+            try:
+                self.deliver(recipients, sender, data)
+            except Exception as e:
+                print(f"[ERROR] Chat delivery failed: {e}")
+            with self.cond:
+                self.pending -= 1
+                self.cond.notify_all()
+
+    def deliver(self, recipients, sender, data):
+        started = time.perf_counter()
+        sender_name = sender.name.lower()
+        delivered = 0
+        for player in recipients:
+            if player is sender or sender_name in player.muted:
+                continue
+            conn = player.user
+            try:
+                conn.sendall(data, PRIORITY_LOW)
+                conn.flush()
+            except (OSError, AttributeError):
+                continue
+            delivered += 1
+        METRICS.inc("chat_messages_total")
+        METRICS.inc("chat_deliveries_total", delivered)
+        METRICS.inc("bytes_out_total", len(data) * delivered)
+        METRICS.observe("chat_fanout_seconds", time.perf_counter() - started)
+
+    def wait_idle(self, timeout=None):
+        """Blocks until every queued message has been delivered; False on timeout."""
+        with self.cond:
+            return self.cond.wait_for(lambda: self.pending == 0, timeout)
+
+
+class RemoteSender:
+    """Stands in for the sender of chat relayed from another shard worker."""
+
+    def __init__(self, name):
+        self.name = name
+
+
+CHANNELS = ChannelHub()
@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+import time
+from server.core.metrics import METRICS
+from server.core.room import Room
+from server.core.spawn import MOB_FACTORY
+
+# Room contents (mobs and floor items) that changed since world.json was
+# authored. The snapshot holds one state per room; the journal gets one JSON
+# line per room checkpointed since the last compaction, and the last line for
+# a room wins on restore.
+SNAPSHOT_FILE = "server/data/world_state.json"
+JOURNAL_FILE = "server/data/world_state.journal"
+CHECKPOINT_INTERVAL = 5
+# Once the journal is this large it is folded into the snapshot
+COMPACT_BYTES = 1024 * 1024
+
+
+class Checkpointer:
+    """Writes only the rooms marked dirty since the last checkpoint.
+
+    Anything that changes a room's mobs or floor items calls mark_dirty(room).
+    A checkpoint appends those rooms' state_dict() to the journal, so its cost
+    follows how many rooms changed rather than the size of the world.
+    """
+
+    def __init__(self, snapshot_path=SNAPSHOT_FILE, journal_path=JOURNAL_FILE):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.lock = threading.Lock()
+        self.dirty = {}  # room_id -> Room
+        self.saved = {}  # room_id -> last state written, used for compaction
+        self.write_lock = threading.Lock()
+        self.read_only = False  # restore only; set where another process owns the files
+
+    def mark_dirty(self, room):
+        with self.lock:
+            self.dirty[room.id] = room
+
+    def read_states(self):
+        """Snapshot plus journal replay: room_id -> state."""
+        states = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r") as f:
+                states.update(json.load(f))
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash mid-append
+                        print(f"[ERROR] Skipping unreadable line in {self.journal_path}")
+                        continue
+                    states[entry["room"]] = entry["state"]
+        return states
+
+    @METRICS.timed("persistence_seconds", "checkpoint_restore")
+    def restore(self, world, mobs, items):
+        """Applies saved room contents to a freshly loaded world; returns rooms restored."""
+        with self.write_lock:
+            self.saved = self.read_states()
+            restored = 0
+            for room_id, state in self.saved.items():
+                room = world.get(room_id)
+                if room is None:
+                    continue
+                # The authored mobs go back to the pool, where the saved ones are spawned from
+                MOB_FACTORY.release(room.mob_instances)
+                room.mob_instances, room.item_instances = Room.load_contents(state, mobs, items)
+                restored += 1
+            if not self.read_only and os.path.exists(self.journal_path) and os.path.getsize(self.journal_path):
+                self.compact()
+        return restored
+
+    @METRICS.timed("persistence_seconds", "checkpoint")
+    def checkpoint(self):
+        """Appends every dirty room to the journal; returns the number written."""
+        with self.lock:
+            dirty, self.dirty = self.dirty, {}
+        if not dirty or self.read_only:
+            return 0
+        with self.write_lock:
+            lines = []
+            for room_id, room in dirty.items():
+                state = room.state_dict()
+                self.saved[room_id] = state
+                lines.append(json.dumps({"room": room_id, "state": state}, separators=(",", ":")))
+            try:
+                with open(self.journal_path, "a") as f:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError:
+                # Keep them dirty for the next attempt, unless marked again meanwhile
+                with self.lock:
+                    for room_id, room in dirty.items():
+                        self.dirty.setdefault(room_id, room)
+                raise
+            METRICS.inc("checkpoint_rooms_total", len(lines))
+            if os.path.getsize(self.journal_path) > COMPACT_BYTES:
+                self.compact()
+        return len(lines)
+
+    @METRICS.timed("persistence_seconds", "checkpoint_compact")
+    def compact(self):
+        # Caller holds write_lock. Replacing the snapshot before truncating the
+        # journal means a crash in between only replays states already in it.
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.saved, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        open(self.journal_path, "w").close()
+
+    def start(self, interval=CHECKPOINT_INTERVAL):
+        def checkpoint_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.checkpoint()
+                except Exception as e:
+                    print(f"[ERROR] World checkpoint failed: {e}")
+        thread = threading.Thread(target=checkpoint_loop, name="world-checkpointer", daemon=True)
+        thread.start()
+        return thread
+
+
+CHECKPOINTER = Checkpointer()
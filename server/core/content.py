@@ -1,5 +1,6 @@
 import json
 import os
+from server.core.flyweight import CONTENT_POOL
 
 MOBS_FILE = "server/data/mobs.json"
 ITEMS_FILE = "server/data/items.json"
@@ -23,19 +24,25 @@ class Mob:
         if not os.path.exists(MOBS_FILE):
             return {}
         with open(MOBS_FILE, "r") as f:
-            data = json.load(f)
+            return Mob.build_mobs(json.load(f))
+
+    @staticmethod
+    def build_mobs(data):
         mobs = {}
         for mob_id, mob_data in data.items():
+            mob_id = CONTENT_POOL.name(mob_id)
             mobs[mob_id] = Mob(
                 mob_id,
-                mob_data.get("name", mob_id),
+                CONTENT_POOL.text(mob_data.get("name", mob_id)),
                 mob_data.get("hp", 10),
                 mob_data.get("attack", 1),
-                mob_data.get("description", "An unremarkable creature.")
+                CONTENT_POOL.text(mob_data.get("description", "An unremarkable creature."))
             )
         return mobs
 
 class MobInstance:
+    __slots__ = ("mob_blueprint", "quantity", "current_hp")
+
     def __init__(self, mob_blueprint: Mob, quantity=1, current_hp=None):
         self.mob_blueprint = mob_blueprint
         self.quantity = quantity
@@ -47,6 +54,9 @@ class MobInstance:
     def take_damage(self, amount):
         self.current_hp = max(0, self.current_hp - amount)
 
+    def to_dict(self):
+        return {"id": self.mob_blueprint.id, "quantity": self.quantity, "current_hp": self.current_hp}
+
     def __repr__(self):
         return f"<MobInstance {self.mob_blueprint.name} x{self.quantity} HP:{self.current_hp}>"
 
@@ -67,15 +77,19 @@ class Item:
         if not os.path.exists(ITEMS_FILE):
             return {}
         with open(ITEMS_FILE, "r") as f:
-            data = json.load(f)
+            return Item.build_items(json.load(f))
+
+    @staticmethod
+    def build_items(data):
         items = {}
         for item_id, item_data in data.items():
+            item_id = CONTENT_POOL.name(item_id)
             items[item_id] = Item(
                 item_id,
-                item_data.get("name", item_id),
-                item_data.get("type", "misc"),
-                item_data.get("effects", {}),
-                item_data.get("description", ""),
+                CONTENT_POOL.text(item_data.get("name", item_id)),
+                CONTENT_POOL.name(item_data.get("type", "misc")),
+                CONTENT_POOL.effects(item_data.get("effects", {})),
+                CONTENT_POOL.text(item_data.get("description", "")),
                 item_data.get("weight", 0.0),
                 item_data.get("equip_slot"),
                 item_data.get("container_capacity", 0)
@@ -83,9 +97,10 @@ class Item:
         return items
 
 class ItemInstance:
-    def __init__(self, item_blueprint: Item, quantity=1):
+    def __init__(self, item_blueprint: Item, quantity=1, expires_at=None):
         self.item_blueprint = item_blueprint
         self.quantity = quantity
+        self.expires_at = expires_at  # epoch seconds; set on player-dropped floor items
 
     def total_weight(self):
         return self.quantity * self.item_blueprint.weight
@@ -96,6 +111,12 @@ class ItemInstance:
             return True
         return False
 
+    def to_dict(self):
+        data = {"item_id": self.item_blueprint.id, "quantity": self.quantity}
+        if self.expires_at is not None:
+            data["expires_at"] = self.expires_at
+        return data
+
     def __repr__(self):
         return f"<ItemInstance {self.item_blueprint.name} x{self.quantity}>"
 
@@ -104,6 +125,11 @@ class ContainerInstance(ItemInstance):
         super().__init__(item_blueprint, quantity)
         self.contents = []
 
+    def to_dict(self):
+        data = super().to_dict()
+        data["contents"] = [item.to_dict() for item in self.contents]
+        return data
+
     def current_capacity_used(self):
         return sum(item.total_weight() for item in self.contents)
 
@@ -122,10 +148,11 @@ class ContainerInstance(ItemInstance):
     def remove_item(self, item_name, quantity=1):
         for i, item in enumerate(self.contents):
             if item.item_blueprint.name.lower() == item_name.lower():
-                if item.quantity >= quantity:
+                if item.quantity == quantity:
+                    # The whole stack leaves; a container keeps its contents
+                    return self.contents.pop(i)
+                if item.quantity > quantity:
                     item.quantity -= quantity
-                    if item.quantity <= 0:
-                        return self.contents.pop(i)
                     return ItemInstance(item.item_blueprint, quantity)
         return None
 
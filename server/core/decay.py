@@ -0,0 +1,95 @@
+import heapq
+import itertools
+import threading
+import time
+from server.core.checkpoint import CHECKPOINTER
+from server.core.metrics import METRICS
+
+# Seconds a dropped stack stays on the floor after its last drop
+FLOOR_DECAY_SECONDS = 30 * 60
+SWEEP_INTERVAL = 10
+
+
+class DecaySweeper:
+    """Expires player-dropped floor items from a heap ordered by expiry time.
+
+    Each sweep pops only the entries that are due, so its cost follows how
+    many stacks expire rather than how many rooms exist. A stack has at most
+    one entry: topping it up with another drop only moves its expires_at, and
+    the entry re-arms itself when it comes due early. A due stack is removed
+    only if it is still on that room's floor, under the room's floor_lock.
+    """
+
+    def __init__(self, decay_seconds=FLOOR_DECAY_SECONDS):
+        self.decay_seconds = decay_seconds
+        self.lock = threading.Lock()
+        self.heap = []  # (expires_at, seq, room, item_instance)
+        self.tracked = set()  # id() of every item with an entry in the heap
+        self.seq = itertools.count()
+
+    def expiry(self):
+        return time.time() + self.decay_seconds
+
+    def schedule(self, room, item_instance, expires_at=None):
+        if expires_at is None:
+            expires_at = self.expiry()
+        item_instance.expires_at = expires_at
+        with self.lock:
+            if id(item_instance) in self.tracked:
+                return
+            self.tracked.add(id(item_instance))
+            heapq.heappush(self.heap, (expires_at, next(self.seq), room, item_instance))
+
+    def clear(self):
+        with self.lock:
+            self.heap = []
+            self.tracked = set()
+
+    def sweep(self, now=None):
+        """Removes every stack whose time is up; returns how many were removed."""
+        now = time.time() if now is None else now
+        due = []
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                _, _, room, item = heapq.heappop(self.heap)
+                if item.expires_at is not None and item.expires_at > now:
+                    # Topped up since it was scheduled
+                    heapq.heappush(self.heap, (item.expires_at, next(self.seq), room, item))
+                    continue
+                self.tracked.discard(id(item))
+                due.append((room, item))
+        removed = 0
+        for room, item in due:
+            with room.floor_lock:
+                if item.expires_at is not None and item.expires_at > now:
+                    # A drop topped it up after it was taken off the heap
+                    self.schedule(room, item, item.expires_at)
+                    continue
+                floor = room.item_instances
+                index = next((i for i, existing in enumerate(floor) if existing is item), None)
+                if index is not None:
+                    del floor[index]
+            if index is not None:
+                CHECKPOINTER.mark_dirty(room)
+                removed += 1
+        if removed:
+            METRICS.inc("floor_items_decayed_total", removed)
+        return removed
+
+    def start(self, interval=SWEEP_INTERVAL):
+        def sweep_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"[ERROR] Floor decay sweep failed: {e}")
+        thread = threading.Thread(target=sweep_loop, name="floor-decay", daemon=True)
+        thread.start()
+        return thread
+
+    def __len__(self):
+        return len(self.heap)
+
+
+FLOOR_DECAY = DecaySweeper()
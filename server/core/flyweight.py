@@ -0,0 +1,129 @@
+import json
+import sys
+import threading
+
+
+class FrozenDict(dict):
+    """A dict that refuses changes, so one copy can be shared by every blueprint that has it.
+
+    It is still a dict, so json.dump, dict(d) and .get() work as before; copy and
+    deepcopy return the same object.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("shared content data is read-only; copy it with dict() first")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+class ContentPool:
+    """Shares repeated strings and effect dicts between loaded content.
+
+    name() interns identifiers (ids, direction words, zone and type names) with
+    sys.intern. text() keeps one copy of each distinct description or display
+    name. effects() returns one FrozenDict per distinct effects dict, so
+    content.Item blueprints and player.ITEMS_DATA entries with the same
+    effects share a single object. The pool keeps every distinct text it has
+    seen until clear(), which main.load_world calls before each load, so it
+    only ever holds the current content.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.texts = {}
+        self.effect_sets = {}  # canonical JSON -> FrozenDict
+        self.shared = 0  # values replaced by an existing copy
+        self.saved_bytes = 0
+
+    def name(self, value):
+        if not self.enabled or type(value) is not str:
+            return value
+        interned = sys.intern(value)
+        if interned is not value:
+            with self.lock:
+                self.shared += 1
+                self.saved_bytes += sys.getsizeof(value)
+        return interned
+
+    def text(self, value):
+        if not self.enabled or type(value) is not str:
+            return value
+        with self.lock:
+            existing = self.texts.setdefault(value, value)
+            if existing is not value:
+                self.shared += 1
+                self.saved_bytes += sys.getsizeof(value)
+        return existing
+
+    def effects(self, value):
+        if not self.enabled or not isinstance(value, dict):
+            return value
+        try:
+            key = json.dumps(value, sort_keys=True, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return value
+        with self.lock:
+            existing = self.effect_sets.get(key)
+            if existing is not None:
+                self.shared += 1
+                self.saved_bytes += dict_size(value)
+                return existing
+        frozen = self.freeze(value)
+        with self.lock:
+            return self.effect_sets.setdefault(key, frozen)
+
+    def freeze(self, value):
+        if isinstance(value, dict):
+            return FrozenDict((self.name(k), self.freeze(v)) for k, v in value.items())
+        if isinstance(value, list):
+            return tuple(self.freeze(v) for v in value)
+        return self.name(value)
+
+    def item_record(self, data):
+        """A shared copy of one raw items.json entry, as kept in player.ITEMS_DATA."""
+        if not self.enabled or not isinstance(data, dict):
+            return data
+        record = {}
+        for key, value in data.items():
+            if key == "effects":
+                value = self.effects(value)
+            elif key in ("name", "description"):
+                value = self.text(value)
+            else:
+                value = self.name(value)
+            record[self.name(key)] = value
+        return record
+
+    def clear(self):
+        with self.lock:
+            self.texts.clear()
+            self.effect_sets.clear()
+            self.shared = self.saved_bytes = 0
+
+    def report(self):
+        return (f"Content pool: {len(self.texts)} distinct texts, {len(self.effect_sets)} effect sets, "
+                f"{self.shared} duplicate copies dropped (~{self.saved_bytes / 1024:.1f} KB)")
+
+
+def dict_size(value):
+    """Shallow sizes of a dict and the dicts and lists nested in it."""
+    size = sys.getsizeof(value)
+    children = value.values() if isinstance(value, dict) else value
+    for child in children:
+        if isinstance(child, (dict, list)):
+            size += dict_size(child)
+    return size
+
+
+CONTENT_POOL = ContentPool()
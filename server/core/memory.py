@@ -0,0 +1,165 @@
+import sys
+import threading
+import tracemalloc
+from collections import Counter, deque
+from server.core import player as player_module
+from server.core.flyweight import CONTENT_POOL
+from server.core.spawn import MOB_FACTORY
+
+# Stack depth kept per allocation while tracing; more frames cost more memory
+TRACE_FRAMES = 1
+TOP_TYPES = 12
+TOP_LINES = 10
+
+LEAF_TYPES = (str, bytes, bytearray, int, float, bool, complex, type(None))
+CONTAINER_TYPES = (list, tuple, set, frozenset, deque)
+
+_baseline = None
+_trace_lock = threading.Lock()
+
+
+def followable(obj):
+    """Only the server's own objects are walked into; connections are sized but not entered."""
+    return type(obj).__module__.startswith("server.") and not hasattr(obj, "sendall")
+
+
+class Footprint:
+    """Deep sizes of object graphs, counting each object once across every measure() call.
+
+    Measure the shared things first (content blueprints) so that later
+    sections (rooms, players) are only charged for what they own.
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.counts = Counter()  # type name -> objects reached
+        self.bytes = Counter()  # type name -> their shallow sizes
+
+    def exclude(self, obj):
+        """Leaves obj, and anything reached only through it, out of every later measure()."""
+        self.seen.add(id(obj))
+
+    def measure(self, root):
+        """Returns (objects, bytes) reachable from root that no earlier call reached."""
+        objects = total = 0
+        stack = [root]
+        while stack:
+            obj = stack.pop()
+            if id(obj) in self.seen:
+                continue
+            self.seen.add(id(obj))
+            size = sys.getsizeof(obj)
+            name = type(obj).__name__
+            self.counts[name] += 1
+            self.bytes[name] += size
+            objects += 1
+            total += size
+            if isinstance(obj, LEAF_TYPES):
+                continue
+            try:
+                if isinstance(obj, dict):
+                    for key, value in list(obj.items()):
+                        stack.append(key)
+                        stack.append(value)
+                elif isinstance(obj, CONTAINER_TYPES):
+                    stack.extend(list(obj))
+                elif followable(obj):
+                    attrs = getattr(obj, "__dict__", None)
+                    if attrs is not None:
+                        stack.append(attrs)
+                    for slot in getattr(type(obj), "__slots__", ()):
+                        if hasattr(obj, slot):
+                            stack.append(getattr(obj, slot))
+            except RuntimeError:
+                # Changed by another thread while being copied; it's still counted shallow
+                pass
+        return objects, total
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def report_lines(world, mobs, items, players, linkdead):
+    """Deep sizes per subsystem and per zone, then the object types that make them up."""
+    footprint = Footprint()
+    zones = {}
+    for room in list(world.values()):
+        zones.setdefault(room.zone or "default", []).append(room)
+    sections = [
+        ("mob blueprints", mobs),
+        ("item blueprints", items),
+        ("player rule data", [player_module.CLASSES_DATA, player_module.RACES_DATA, player_module.ITEMS_DATA]),
+    ]
+    tables = {id(room.exit_table): room.exit_table for room in list(world.values()) if room.exit_table}
+    for table in tables.values():
+        # Its room list would otherwise charge every zone's rooms to the table
+        footprint.exclude(table.rooms)
+    sections.append(("exit table", list(tables.values())))
+    sections += [(f"zone {zone}", rooms) for zone, rooms in sorted(zones.items())]
+    sections += [
+        ("online players", list(players)),
+        ("linkdead players", list(linkdead.by_key.values())),
+        ("mob pool", list(MOB_FACTORY.pools.values())),
+    ]
+
+    lines = ["Memory by subsystem (deep size; shared objects counted once, first section wins):"]
+    grand = 0
+    for label, root in sections:
+        objects, size = footprint.measure(root)
+        grand += size
+        lines.append(f"  {label:<24} {objects:>9} objects {format_bytes(size):>10}")
+    lines.append(f"  {'total':<24} {len(footprint.seen):>9} objects {format_bytes(grand):>10}")
+
+    for label, rooms in sorted(zones.items()):
+        mob_count = sum(len(room.mob_instances) for room in rooms)
+        item_count = sum(len(room.item_instances) for room in rooms)
+        largest = max(rooms, key=lambda room: len(room.item_instances))
+        lines.append(f"  zone {label}: {len(rooms)} rooms, {mob_count} mob stacks, {item_count} floor stacks "
+                     f"(most: {largest.id} with {len(largest.item_instances)})")
+    queued = sum(getattr(player.user, "queued", 0) for player in list(players))
+    lines.append(f"  connection output queues: {format_bytes(queued)}")
+    lines.append(f"  {CONTENT_POOL.report()}")
+
+    lines.append("Largest types (shallow size of every object above):")
+    for name, size in footprint.bytes.most_common(TOP_TYPES):
+        lines.append(f"  {name:<24} {footprint.counts[name]:>9} objects {format_bytes(size):>10}")
+    return lines
+
+
+def trace_start(frames=TRACE_FRAMES):
+    """Starts tracemalloc if needed and takes the snapshot later diffs are against."""
+    global _baseline
+    with _trace_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        _baseline = tracemalloc.take_snapshot()
+
+
+def trace_diff(limit=TOP_LINES):
+    """Source lines whose allocations grew most since trace_start(), or None if not tracing."""
+    with _trace_lock:
+        if _baseline is None or not tracemalloc.is_tracing():
+            return None
+        snapshot = tracemalloc.take_snapshot()
+        baseline = _baseline
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = snapshot.filter_traces(filters).compare_to(baseline.filter_traces(filters), "lineno")
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"Allocation growth since baseline (traced now {format_bytes(current)}, peak {format_bytes(peak)}):"]
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        lines.append(f"  {format_bytes(stat.size_diff):>10} {stat.count_diff:>+8} blocks  "
+                     f"{frame.filename}:{frame.lineno}")
+    return lines
+
+
+def trace_stop():
+    global _baseline
+    with _trace_lock:
+        _baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
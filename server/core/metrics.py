@@ -0,0 +1,162 @@
+import bisect
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+# Histogram bucket upper bounds in seconds: 50us doubling up to ~6.5s, then +Inf
+BUCKETS = [0.00005 * 2 ** i for i in range(18)]
+
+
+class Histogram:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        i = bisect.bisect_left(BUCKETS, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q):
+        """Estimates a quantile by interpolating inside the bucket that holds it."""
+        with self.lock:
+            counts = list(self.counts)
+            total = self.count
+            top = self.max
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, c in enumerate(counts):
+            if seen + c >= rank and c:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else top
+                return min(top, lower + (upper - lower) * (rank - seen) / c)
+            seen += c
+        return top
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # (name, label) -> Histogram
+        self.counters = {}  # name -> number
+        self.gauges = {}  # name -> number
+        self.started = time.time()
+
+    def histogram(self, name, label=None):
+        key = (name, label)
+        hist = self.histograms.get(key)
+        if hist is None:
+            with self.lock:
+                hist = self.histograms.setdefault(key, Histogram())
+        return hist
+
+    def observe(self, name, seconds, label=None):
+        self.histogram(name, label).observe(seconds)
+
+    def inc(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge_add(self, name, amount):
+        with self.lock:
+            self.gauges[name] = self.gauges.get(name, 0) + amount
+
+    def timed(self, name, label=None):
+        """Decorator recording the wrapped call's duration in histogram name{label}."""
+        def decorate(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - started, label)
+            return wrapper
+        return decorate
+
+    def snapshot(self):
+        with self.lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            histograms = dict(self.histograms)
+        gauges["threads_active"] = threading.active_count()
+        hist_data = {}
+        for (name, label), hist in sorted(histograms.items(), key=lambda kv: (kv[0][0], kv[0][1] or "")):
+            hist_data.setdefault(name, {})[label or ""] = {
+                "count": hist.count, "sum": hist.sum, "max": hist.max,
+                "p50": hist.quantile(0.5), "p95": hist.quantile(0.95), "p99": hist.quantile(0.99),
+                "buckets": list(hist.counts),
+            }
+        return {"uptime_seconds": time.time() - self.started, "counters": counters,
+                "gauges": gauges, "histograms": hist_data}
+
+    def to_prometheus(self, snapshot=None):
+        snap = snapshot or self.snapshot()
+        lines = []
+        for name, value in sorted(snap["counters"].items()):
+            lines += [f"# TYPE mud_{name} counter", f"mud_{name} {value}"]
+        for name, value in sorted(snap["gauges"].items()):
+            lines += [f"# TYPE mud_{name} gauge", f"mud_{name} {value}"]
+        for name, series in snap["histograms"].items():
+            label_key = "verb" if name == "command_seconds" else "op"
+            lines.append(f"# TYPE mud_{name} histogram")
+            for label, data in series.items():
+                labels = f'{label_key}="{label}",' if label else ""
+                running = 0
+                for bound, c in zip(BUCKETS + ["+Inf"], data["buckets"]):
+                    running += c
+                    le = bound if bound == "+Inf" else f"{bound:g}"
+                    lines.append(f'mud_{name}_bucket{{{labels}le="{le}"}} {running}')
+                labels = "{" + labels.rstrip(",") + "}" if labels else ""
+                lines.append(f"mud_{name}_sum{labels} {data['sum']:.6f}")
+                lines.append(f"mud_{name}_count{labels} {data['count']}")
+        return "\n".join(lines) + "\n"
+
+    def report_lines(self):
+        """Human-readable summary for the in-game metrics command."""
+        snap = self.snapshot()
+        lines = [f"Uptime: {snap['uptime_seconds']:.0f}s"]
+        for name, value in sorted({**snap["gauges"], **snap["counters"]}.items()):
+            lines.append(f"{name}: {value}")
+        for name, series in snap["histograms"].items():
+            lines.append(f"{name}:")
+            lines.append(f"  {'':<20} {'count':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+            for label, data in series.items():
+                lines.append(f"  {label or '-':<20} {data['count']:>8} {data['p50'] * 1000:>8.2f} "
+                             f"{data['p95'] * 1000:>8.2f} {data['p99'] * 1000:>8.2f} {data['max'] * 1000:>8.2f}")
+        return lines
+
+    def write_file(self, path):
+        snap = self.snapshot()
+        text = json.dumps(snap, indent=2) if path.endswith(".json") else self.to_prometheus(snap)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def start_exporter(self, path, interval):
+        """Writes the registry to path every interval seconds from a daemon thread."""
+        def export_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_file(path)
+                except Exception as e:
+                    print(f"[ERROR] Failed to write metrics to {path}: {e}")
+        thread = threading.Thread(target=export_loop, name="metrics-exporter", daemon=True)
+        thread.start()
+        return thread
+
+
+METRICS = Registry()
@@ -1,7 +1,16 @@
 import json
 import math # For floor
+from server.core.content import ItemInstance, ContainerInstance
+from server.core.flyweight import CONTENT_POOL
+from server.core.metrics import METRICS
+from server.core.telnet import PRIORITY_NORMAL
+from server.core.user import UserManager
 
-# Globals populated by load_game_data()
+CLASSES_FILE = "server/data/classes.json"
+RACES_FILE = "server/data/races.json"
+ITEMS_FILE = "server/data/items.json"
+
+# Globals populated by load_game_data(), or by set_game_data() when the server preloads them
 CLASSES_DATA = {}
 RACES_DATA = {}
 ITEMS_DATA = {}
@@ -16,16 +25,25 @@ ANSI_RESET = "\033[0m"
 def load_game_data():
     global CLASSES_DATA, RACES_DATA, ITEMS_DATA
     try:
-        with open("server/data/classes.json", "r") as f: CLASSES_DATA = json.load(f)
+        with open(CLASSES_FILE, "r") as f: CLASSES_DATA = json.load(f)
     except Exception as e: print(f"ERROR loading classes.json: {e}")
     try:
-        with open("server/data/races.json", "r") as f: RACES_DATA = json.load(f)
+        with open(RACES_FILE, "r") as f: RACES_DATA = json.load(f)
     except Exception as e: print(f"ERROR loading races.json: {e}")
     try:
-        with open("server/data/items.json", "r") as f: ITEMS_DATA = json.load(f)
+        with open(ITEMS_FILE, "r") as f: ITEMS_DATA = share_items(json.load(f))
     except FileNotFoundError: ITEMS_DATA = {}; print("INFO: server/data/items.json not found.")
     except Exception as e: print(f"ERROR loading items.json: {e}")
 
+def share_items(data):
+    # Same strings and effect dicts as the content.Item blueprints
+    return {CONTENT_POOL.name(k): CONTENT_POOL.item_record(v) for k, v in data.items()}
+
+def set_game_data(classes, races, items):
+    """Installs rule data the caller has already loaded; items as returned by share_items()."""
+    global CLASSES_DATA, RACES_DATA, ITEMS_DATA
+    CLASSES_DATA, RACES_DATA, ITEMS_DATA = classes, races, items
+
 class Player:
     EQUIPMENT_SLOT_HEAD = "Head"; EQUIPMENT_SLOT_NECK = "Neck"; EQUIPMENT_SLOT_CHEST = "Chest"
     EQUIPMENT_SLOT_BACK = "Back"; EQUIPMENT_SLOT_SHOULDERS = "Shoulders"; EQUIPMENT_SLOT_WRISTS = "Wrists"
@@ -51,6 +69,10 @@ class Player:
         self.equipment = {slot: None for slot in Player.ALL_EQUIPMENT_SLOTS}
         self.inventory = [] # List of item data dictionaries or item IDs
         self.room_id = "STARTING_ROOM_ID"
+        self.room = None # Room object while connected
+        self.input_buffer = ""
+        self.muted = set() # Lower-case names whose chat isn't delivered to this player
+        self.account = "" # Account the character belongs to; names are only unique within one
         self.assign_standard_array({"STR":15,"DEX":14,"CON":13,"INT":12,"WIS":10,"CHA":8}, initial_setup=True)
         self.recalculate_all_stats(full_heal=True)
 
@@ -276,15 +298,123 @@ class Player:
         inventory_list.append(f"{ANSI_GREEN}--------------------{ANSI_RESET}")
         return "\n".join(inventory_list)
 
-```
-**Changes made to `player.py`:**
-1.  **`display_inventory()` method added**:
-    *   Checks if `self.inventory` is empty.
-    *   If not, it iterates through `self.inventory`.
-    *   It handles two cases for items in inventory:
-        *   If an item is a dictionary (as it would be if unequipped), it gets the "name".
-        *   If an item is a string (placeholder for if inventory stores item IDs from a save file), it tries to look up the name in `ITEMS_DATA`, defaulting to showing the ID.
-    *   Formats the list with a header and footer.
-    *   (Note: This basic version doesn't handle item quantities or stacking explicitly. A more advanced inventory would use `ItemInstance` objects.)
-
-Now, for the `main.py` part.
+    # --- Connection helpers used by server.main.handle_client ---
+    # self.user is the client connection (socket or TelnetConnection) while connected.
+
+    def send(self, msg, priority=PRIORITY_NORMAL):
+        """Queues msg for the client; PRIORITY_LOW output may be dropped for a slow reader."""
+        data = msg.encode()
+        try:
+            self.user.sendall(data, priority)
+        except OSError:
+            return
+        METRICS.inc("bytes_out_total", len(data))
+
+    def send_line(self, msg="", priority=PRIORITY_NORMAL):
+        self.send(msg + "\r\n", priority)
+
+    def prompt(self):
+        """Sends the command prompt and pushes out any output a compressed stream is holding."""
+        self.send("\r\n> ")
+        if hasattr(self.user, "flush"):
+            try:
+                self.user.flush()
+            except OSError:
+                pass
+
+    def read_line(self):
+        """Returns the next input line without its line ending, or None on disconnect."""
+        while "\n" not in self.input_buffer:
+            try:
+                data = self.user.recv(1024)
+            except OSError:
+                return None
+            if not data:
+                return None
+            METRICS.inc("bytes_in_total", len(data))
+            self.input_buffer += data.decode(errors="ignore")
+        line, self.input_buffer = self.input_buffer.split("\n", 1)
+        return line.rstrip("\r")
+
+    def look(self):
+        room = self.room
+        self.send_line(f"\r\n{ANSI_GREEN}{room.name}{ANSI_RESET}")
+        self.send_line(room.description)
+        for mob in room.mob_instances:
+            self.send_line(f"{mob.mob_blueprint.name} (x{mob.quantity}) is here.")
+        if room.item_instances:
+            names = ", ".join(f"{item.item_blueprint.name} x{item.quantity}" for item in room.item_instances)
+            self.send_line(f"Items here: {names}")
+        self.send_line(f"Exits: {', '.join(room.exit_names()) or 'none'}")
+
+    def list_inventory(self):
+        if not self.inventory:
+            self.send_line("You are carrying nothing.")
+            return
+        self.send_line("You are carrying:")
+        for item in self.inventory:
+            self.send_line(f"- {item.item_blueprint.name} x{item.quantity}")
+            if hasattr(item, "contents"):
+                for line in item.list_contents(1):
+                    self.send_line(line)
+
+    def add_item(self, item_instance):
+        if not hasattr(item_instance, "contents"):
+            for existing in self.inventory:
+                if existing.item_blueprint.id == item_instance.item_blueprint.id and not hasattr(existing, "contents"):
+                    existing.quantity += item_instance.quantity
+                    return
+        self.inventory.append(item_instance)
+
+    def find_container(self, container_name):
+        for item in self.inventory:
+            if isinstance(item, ContainerInstance) and item.item_blueprint.name.lower() == container_name:
+                return item
+        return None
+
+    def take_item_from_container(self, item_name, container_name):
+        container = self.find_container(container_name)
+        if not container:
+            self.send_line(f"You don't have a {container_name}.")
+            return
+        item = container.remove_item(item_name)
+        if not item:
+            self.send_line(f"There is no {item_name} in the {container.item_blueprint.name}.")
+            return
+        self.add_item(item)
+        self.send_line(f"You take the {item.item_blueprint.name} from the {container.item_blueprint.name}.")
+
+    def put_item_into_container(self, item_name, container_name):
+        container = self.find_container(container_name)
+        if not container:
+            self.send_line(f"You don't have a {container_name}.")
+            return
+        for item in self.inventory:
+            if item is not container and item.item_blueprint.name.lower() == item_name:
+                moved = ItemInstance(item.item_blueprint, 1) if not hasattr(item, "contents") else item
+                if not container.add_item(moved):
+                    self.send_line(f"The {item.item_blueprint.name} won't fit.")
+                    return
+                if moved is item or item.quantity <= 1:
+                    self.inventory.remove(item)
+                else:
+                    item.quantity -= 1
+                self.send_line(f"You put the {item.item_blueprint.name} in the {container.item_blueprint.name}.")
+                return
+        self.send_line(f"You don't have a {item_name}.")
+
+    def inspect_container(self, container_name):
+        container = self.find_container(container_name)
+        if not container:
+            self.send_line(f"You don't have a {container_name}.")
+            return
+        lines = container.list_contents()
+        self.send_line(f"The {container.item_blueprint.name} contains:" if lines else f"The {container.item_blueprint.name} is empty.")
+        for line in lines:
+            self.send_line(line)
+
+    def load_inventory(self, data, items):
+        self.inventory = UserManager.deserialize_inventory(data, items)
+
+    def save_inventory(self):
+        return UserManager.serialize_inventory(self.inventory)
@@ -0,0 +1,151 @@
+import bisect
+import threading
+import time
+from collections import namedtuple
+
+STATUS_ONLINE = "online"
+STATUS_LINKDEAD = "linkdead"
+STATUS_OFFLINE = "offline"
+
+# What who and finger show; built from the Player by the session code, never by readers
+Presence = namedtuple("Presence", "name player_class level room status since")
+
+
+def presence_key(player):
+    """Character names are only unique within an account, so entries are keyed by both."""
+    return (player.name.lower(), player.account)
+
+
+class PresenceRegistry:
+    """Who is in the game, kept current by the session code on every transition.
+
+    handle_client calls update() on login, resume and each move, linkdead()
+    when the connection drops and remove() when the character leaves for good
+    (linkdead expiry or a crash). Readers never touch a Player, a Room or
+    users.json: lookup() is a binary search plus a scan of the characters
+    gone since startup, and snapshot() returns an immutable tuple sorted by
+    name. The sorted name list is maintained on each login and
+    logout, so a snapshot only has to be re-collected (not re-sorted) after a
+    change, and readers in between share the same tuple.
+
+    Under server.gateway every worker keeps a full registry: the listener
+    reports changes to the worker's own players, and the gateway passes them
+    to apply() on every other worker.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}  # presence_key -> Presence, online and linkdead
+        self.owners = {}  # presence_key -> the Player the entry describes
+        self.names = []  # sorted keys of entries
+        self.last_seen = {}  # presence_key -> Presence of characters gone since startup
+        self.published = ()
+        self.stale = False
+        # Called as listener(key, Presence or None) for every change made here, in
+        # order; shard workers use it to copy their players' entries to each other
+        self.listener = None
+
+    def update(self, player, status=STATUS_ONLINE):
+        room = player.room.name if player.room is not None else "nowhere"
+        key = presence_key(player)
+        with self.lock:
+            self.owners[key] = player
+            old = self.entries.get(key)
+            since = old.since if old is not None and old.status == status else time.time()
+            entry = Presence(player.name, player.player_class_name, player.level, room, status, since)
+            if entry != old:
+                self.store(key, entry)
+                if self.listener is not None:
+                    self.listener(key, entry)
+
+    def moved(self, player):
+        """Refreshes an online player's entry; characters not in the registry are left out."""
+        if self.owners.get(presence_key(player)) is player:
+            self.update(player)
+
+    def linkdead(self, player):
+        if self.owners.get(presence_key(player)) is player:
+            self.update(player, STATUS_LINKDEAD)
+
+    def remove(self, player):
+        """Drops the entry if it still describes this Player (a newer session may own the character)."""
+        key = presence_key(player)
+        with self.lock:
+            if self.owners.get(key) is not player:
+                return
+            del self.owners[key]
+            self.drop(key)
+            if self.listener is not None:
+                self.listener(key, None)
+
+    def forget(self, player):
+        """Stops tracking a Player that is carried on elsewhere (a shard migration); its entry stays."""
+        key = presence_key(player)
+        with self.lock:
+            if self.owners.get(key) is player:
+                del self.owners[key]
+
+    def apply(self, key, entry):
+        """Takes a change reported by another registry's listener; None means the character left."""
+        with self.lock:
+            if key in self.owners:
+                return
+            if entry is not None:
+                self.store(key, entry)
+            elif key in self.entries:
+                self.drop(key)
+
+    def store(self, key, entry):
+        # Caller holds self.lock
+        if key not in self.entries:
+            bisect.insort(self.names, key)
+            self.last_seen.pop(key, None)
+        self.entries[key] = entry
+        self.stale = True
+
+    def drop(self, key):
+        # Caller holds self.lock
+        entry = self.entries.pop(key)
+        del self.names[bisect.bisect_left(self.names, key)]
+        self.last_seen[key] = entry._replace(status=STATUS_OFFLINE, since=time.time())
+        self.stale = True
+
+    def snapshot(self):
+        """Every online and linkdead character, sorted by name, as one immutable tuple."""
+        with self.lock:
+            if self.stale:
+                self.published = tuple(self.entries[key] for key in self.names)
+                self.stale = False
+            return self.published
+
+    def lookup(self, name):
+        """Presences of the characters with that name seen since startup, online ones first."""
+        name = name.lower()
+        with self.lock:
+            start = bisect.bisect_left(self.names, (name, ""))
+            found = []
+            for key in self.names[start:]:
+                if key[0] != name:
+                    break
+                found.append(self.entries[key])
+            found += [entry for key, entry in self.last_seen.items() if key[0] == name]
+            return found
+
+    def online(self, name):
+        """(key, Presence) for every connected character with that name."""
+        name = name.lower()
+        with self.lock:
+            start = bisect.bisect_left(self.names, (name, ""))
+            found = []
+            for key in self.names[start:]:
+                if key[0] != name:
+                    break
+                if self.entries[key].status == STATUS_ONLINE:
+                    found.append((key, self.entries[key]))
+            return found
+
+    def __len__(self):
+        return len(self.entries)
+
+
+PRESENCE = PresenceRegistry()
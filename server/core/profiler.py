@@ -0,0 +1,107 @@
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_DIR = "server/profiles"
+DEFAULT_INTERVAL = 0.005
+MAX_DURATION = 300
+
+# thread ident -> verb currently being handled on that thread
+ACTIVITY = {}
+
+_active = None
+_active_lock = threading.Lock()
+# Numbers the runs of this process, so two started in the same second get different files
+_run_numbers = itertools.count(1)
+
+
+def set_activity(verb):
+    ACTIVITY[threading.get_ident()] = verb
+
+
+def clear_activity():
+    ACTIVITY.pop(threading.get_ident(), None)
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Samples every thread's stack with sys._current_frames() and counts collapsed stacks.
+
+    Each stack is rooted at the command its thread was handling ("cmd:take"),
+    or at the thread name when it was idle, so output from all sessions folds
+    together by verb in a flamegraph.
+    """
+
+    def __init__(self, duration, interval=DEFAULT_INTERVAL, output_dir=PROFILE_DIR):
+        self.duration = duration
+        self.interval = interval
+        # The pid keeps runs from different processes (the server, headless --profile) apart
+        name = f"{time.strftime('profile-%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_run_numbers)}.collapsed"
+        self.path = os.path.join(output_dir, name)
+        self.stacks = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="sampling-profiler", daemon=True)
+
+    def sample(self):
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(frame_label(frame))
+                frame = frame.f_back
+            verb = ACTIVITY.get(ident)
+            root = f"cmd:{verb}" if verb else names.get(ident, f"thread-{ident}")
+            labels.append(root)
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def run(self):
+        global _active
+        deadline = time.perf_counter() + self.duration
+        try:
+            while time.perf_counter() < deadline and not self.stopped.is_set():
+                started = time.perf_counter()
+                self.sample()
+                time.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
+            self.write()
+        except Exception as e:
+            print(f"[ERROR] Profiler failed: {e}")
+        finally:
+            with _active_lock:
+                _active = None
+
+    def stop(self):
+        """Ends the run early and waits for the profile to be written."""
+        self.stopped.set()
+        self.thread.join()
+
+    def write(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"[*] Profile written: {self.path} ({self.samples} samples)")
+
+
+def start(duration, interval=DEFAULT_INTERVAL):
+    """Starts a profiling run in the background; returns None if one is already running."""
+    global _active
+    if duration <= 0:
+        raise ValueError(f"profile duration must be positive, not {duration}")
+    with _active_lock:
+        if _active is not None:
+            return None
+        _active = SamplingProfiler(min(duration, MAX_DURATION), interval)
+        _active.thread.start()
+        return _active
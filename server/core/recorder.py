@@ -0,0 +1,158 @@
+import itertools
+import json
+import os
+import threading
+import time
+from server.core.checkpoint import CHECKPOINTER
+
+RECORDINGS_DIR = "server/recordings"
+# Every file here is copied into the recording when it starts
+DATA_DIR = "server/data"
+# Copied with every account's password hash removed; replay sets its own
+ACCOUNTS_FILE = os.path.join(DATA_DIR, "users.json")
+# Logged in place of the characters of a line typed at a password prompt
+REDACTED = "*"
+
+
+class RecordedConnection:
+    """Passes everything through to conn, logging the input recv() returns.
+
+    After secret() the next line read is logged as a "secret" event with the
+    text before its line ending cut out; whatever follows in the same chunk
+    (commands typed ahead) stays in the event as it was read.
+    """
+
+    def __init__(self, conn, recorder, generation, session):
+        self.conn = conn
+        self.recorder = recorder
+        self.generation = generation
+        self.session = session
+        self.hidden = False
+
+    def secret(self):
+        self.hidden = True
+
+    def recv(self, size):
+        data = self.conn.recv(size)
+        if data:
+            text = data.decode("latin-1")
+            if self.hidden:
+                end = next((i for i, ch in enumerate(text) if ch in "\r\n"), len(text))
+                self.hidden = end == len(text)
+                self.recorder.event(self.generation, self.session, "secret", text[end:])
+            else:
+                self.recorder.event(self.generation, self.session, "in", text)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+class SessionRecorder:
+    """Records connections to a JSON-lines file for server.tools.replay.
+
+    The first line holds the contents of DATA_DIR (world, accounts and the
+    room checkpoint) as of the start, with the password hashes taken out of
+    ACCOUNTS_FILE; every line after it is one event in the order it
+    happened: {"t": seconds since start, "s": session, "e": kind, "d": data}.
+    Kinds are "open", "in" (input exactly as recv() returned it, after
+    telnet negotiation is stripped), "secret" (input read at a password
+    prompt, with the password cut out), "token" (the resume token the
+    session was given) and "close". Connections made before the recording
+    started are not captured.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.file = None
+        self.path = None
+        self.started = 0.0
+        self.generation = 0
+        self.sessions = itertools.count(1)
+
+    @property
+    def recording(self):
+        return self.file is not None
+
+    def start(self, directory=RECORDINGS_DIR):
+        """Starts a new recording; returns its path, or None if one is already running."""
+        if self.file is not None:
+            return None
+        # So the snapshot has the rooms as they are now, not as last checkpointed
+        CHECKPOINTER.checkpoint()
+        with self.lock:
+            if self.file is not None:
+                return None
+            files = {}
+            for name in sorted(os.listdir(DATA_DIR)):
+                path = os.path.join(DATA_DIR, name)
+                if os.path.isfile(path) and not name.endswith(".tmp"):
+                    with open(path, "r") as f:
+                        files[path] = f.read()
+            if ACCOUNTS_FILE in files:
+                files[ACCOUNTS_FILE] = scrub_accounts(files[ACCOUNTS_FILE])
+                if files[ACCOUNTS_FILE] is None:
+                    del files[ACCOUNTS_FILE]
+            os.makedirs(directory, exist_ok=True)
+            self.path = os.path.join(directory, time.strftime("%Y%m%d-%H%M%S") + ".jsonl")
+            self.file = open(self.path, "w")
+            self.started = time.time()
+            self.generation += 1
+            self.sessions = itertools.count(1)
+            self.file.write(json.dumps({"version": 2, "started": self.started, "files": files}) + "\n")
+            self.file.flush()
+        return self.path
+
+    def stop(self):
+        """Ends the recording; returns its path, or None if none was running."""
+        with self.lock:
+            if self.file is None:
+                return None
+            self.file.close()
+            self.file = None
+            return self.path
+
+    def wrap(self, conn, addr):
+        """Returns conn wrapped to record its input, or conn itself when not recording."""
+        with self.lock:
+            if self.file is None:
+                return conn
+            generation, session = self.generation, next(self.sessions)
+        self.event(generation, session, "open", str(addr))
+        return RecordedConnection(conn, self, generation, session)
+
+    def note(self, conn, kind, data=""):
+        if isinstance(conn, RecordedConnection):
+            self.event(conn.generation, conn.session, kind, data)
+
+    def secret(self, conn):
+        """Keeps the next line read from conn (a password) out of the recording."""
+        if isinstance(conn, RecordedConnection):
+            conn.secret()
+
+    def event(self, generation, session, kind, data):
+        with self.lock:
+            if self.file is None or generation != self.generation:
+                return
+            entry = {"t": round(time.time() - self.started, 6), "s": session, "e": kind, "d": data}
+            try:
+                self.file.write(json.dumps(entry) + "\n")
+                self.file.flush()
+            except (OSError, ValueError) as e:
+                print(f"[ERROR] Session recording stopped: {e}")
+                self.file = None
+
+
+def scrub_accounts(text):
+    """users.json with every password set to None, or None if it can't be parsed."""
+    try:
+        accounts = json.loads(text)
+        for account in accounts.values():
+            account["password"] = None
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"[ERROR] Leaving {ACCOUNTS_FILE} out of the recording: {e}")
+        return None
+    return json.dumps(accounts, indent=2)
+
+
+RECORDER = SessionRecorder()
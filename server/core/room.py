@@ -1,17 +1,108 @@
 import json
-from server.core.content import MobInstance, ItemInstance
+import threading
+from array import array
+from server.core.content import ItemInstance, ContainerInstance
+from server.core.flyweight import CONTENT_POOL
+from server.core.spawn import MOB_FACTORY
+
+# Most separate item stacks a room's floor will hold
+MAX_FLOOR_STACKS = 50
+
+# Walkable directions; a direction's code is its position here
+DIRECTIONS = ("north", "south", "east", "west", "northeast", "northwest", "southeast", "southwest", "up", "down")
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTIONS)}
+
+# Exit slot values that aren't room indices
+NO_EXIT = -1
+NOWHERE = -2  # the exit names a room id that isn't loaded
+
+
+class ExitTable:
+    """Every room's exits as one flat int array, len(DIRECTIONS) slots per room.
+
+    Rooms are numbered by their position in `rooms`; a slot holds the index
+    of the room that direction leads to, NO_EXIT or NOWHERE, so moving is two
+    array reads. Exits under names that aren't DIRECTIONS, and the ids behind
+    NOWHERE slots, are kept as authored in `other` so saving writes back the
+    same ids.
+    """
+
+    def __init__(self, rooms):
+        self.rooms = list(rooms.values())
+        authored = [room.exits for room in self.rooms]
+        width = len(DIRECTIONS)
+        self.slots = array("i", [NO_EXIT]) * (len(self.rooms) * width)
+        self.other = {}  # room index -> {exit name: target id}
+        for index, room in enumerate(self.rooms):
+            room.index = index
+            room.exit_table = self
+            room.authored_exits = None
+        for index, exits in enumerate(authored):
+            for name, target_id in exits.items():
+                code = DIRECTION_CODES.get(name)
+                target = rooms.get(target_id)
+                if code is not None and target is not None:
+                    self.slots[index * width + code] = target.index
+                    continue
+                if code is not None:
+                    self.slots[index * width + code] = NOWHERE
+                self.other.setdefault(index, {})[name] = target_id
+
+    def exits_of(self, index):
+        base = index * len(DIRECTIONS)
+        exits = {}
+        for code, name in enumerate(DIRECTIONS):
+            target = self.slots[base + code]
+            if target >= 0:
+                exits[name] = self.rooms[target].id
+        exits.update(self.other.get(index, ()))
+        return exits
+
+    def exit_names(self, index):
+        base = index * len(DIRECTIONS)
+        names = [name for code, name in enumerate(DIRECTIONS) if self.slots[base + code] >= 0]
+        names.extend(self.other.get(index, ()))
+        return names
+
 
 class Room:
-    def __init__(self, room_id, name, description, exits, mob_instances=None, item_instances=None):
+    def __init__(self, room_id, name, description, exits, mob_instances=None, item_instances=None, zone=None, mob_spawns=None):
         self.id = room_id
         self.name = name
         self.description = description
-        self.exits = exits
+        # Kept until an ExitTable takes over the room's exits
+        self.authored_exits = exits
+        self.exit_table = None
+        self.index = None
         self.mob_instances = mob_instances if mob_instances else []
         self.item_instances = item_instances if item_instances else []
+        # Held by anything that adds or removes floor stacks: commands and the decay sweep
+        self.floor_lock = threading.Lock()
+        self.zone = zone
+        # Authored (Mob, quantity) pairs the room is repopulated from
+        self.mob_spawns = mob_spawns if mob_spawns else []
+
+    @property
+    def exits(self):
+        """Exit name -> target room id, as authored (directions in DIRECTIONS order)."""
+        if self.exit_table is None:
+            return dict(self.authored_exits or {})
+        return self.exit_table.exits_of(self.index)
+
+    def exit_names(self):
+        if self.exit_table is None:
+            return list(self.authored_exits or {})
+        return self.exit_table.exit_names(self.index)
+
+    def exit_to(self, code):
+        """The room through the exit in direction code, or NO_EXIT / NOWHERE."""
+        if self.exit_table is None:
+            return NO_EXIT
+        target = self.exit_table.slots[self.index * len(DIRECTIONS) + code]
+        return self.exit_table.rooms[target] if target >= 0 else target
 
     def to_dict(self):
-        return {
+        data = {
             "name": self.name,
             "description": self.description,
             "exits": self.exits,
@@ -20,52 +111,105 @@ class Room:
             # Save items as list of dicts (including nested containers)
             "items": [item.to_dict() for item in self.item_instances]
         }
+        if self.zone:
+            data["zone"] = self.zone
+        return data
+
+    def add_floor_item(self, item_instance):
+        """Puts an item on the floor, merging it into a matching stack.
+
+        Stacks only merge when both decay or both don't, so a dropped item never
+        puts a decay timer on authored floor items. Returns the stack that now
+        holds the item, or None if the floor is full.
+        """
+        decays = item_instance.expires_at is not None
+        with self.floor_lock:
+            if not hasattr(item_instance, "contents"):
+                for existing in self.item_instances:
+                    if (existing.item_blueprint.id == item_instance.item_blueprint.id and not hasattr(existing, "contents")
+                            and (existing.expires_at is not None) == decays):
+                        existing.quantity += item_instance.quantity
+                        if decays:
+                            # Topped up: the sweep re-checks this under the same lock
+                            existing.expires_at = max(existing.expires_at, item_instance.expires_at)
+                        return existing
+            if len(self.item_instances) >= MAX_FLOOR_STACKS:
+                return None
+            self.item_instances.append(item_instance)
+            return item_instance
+
+    def state_dict(self):
+        """The room's changeable contents, as written by world checkpoints."""
+        return {
+            "mobs": [mob.to_dict() for mob in list(self.mob_instances)],
+            "items": [item.to_dict() for item in list(self.item_instances)],
+        }
 
     @staticmethod
-    def load_rooms(file_path):
+    def load_contents(room_data, mobs, items):
+        """Builds (mob_instances, item_instances) from a room's "mobs" and "items" lists."""
+        mob_list = []
+        for mob_data in room_data.get("mobs", []):
+            mob_id = mob_data.get("id")
+            quantity = mob_data.get("quantity", 1)
+            current_hp = mob_data.get("current_hp")
+            template = mobs.get(mob_id)
+            if template:
+                mob = MOB_FACTORY.spawn(template, quantity, current_hp)
+                if mob:
+                    mob_list.append(mob)
+
+        # Recursive load for containers inside items
+        def load_item_recursive(d):
+            template = items.get(d["item_id"] if "item_id" in d else d["id"])
+            if not template:
+                return None
+            quantity = d.get("quantity", 1)
+            if "contents" in d:
+                container = ContainerInstance(template, quantity)
+                for c in d["contents"]:
+                    ci = load_item_recursive(c)
+                    if ci:
+                        container.add_item(ci)
+                return container
+            else:
+                return ItemInstance(template, quantity, d.get("expires_at"))
+
+        item_list = []
+        for item_data in room_data.get("items", []):
+            inst = load_item_recursive(item_data)
+            if inst:
+                item_list.append(inst)
+        return mob_list, item_list
+
+    @staticmethod
+    def load_rooms(file_path, mobs=None, items=None):
         with open(file_path, 'r') as f:
-            data = json.load(f)
+            return Room.build_rooms(json.load(f), mobs, items)
+
+    @staticmethod
+    def build_rooms(data, mobs=None, items=None):
+        mobs = mobs or {}
+        items = items or {}
         rooms = {}
+        pool = CONTENT_POOL
         for room_id, room_data in data.items():
-            mob_list = []
-            for mob_data in room_data.get("mobs", []):
-                mob_id = mob_data.get("id")
-                quantity = mob_data.get("quantity", 1)
-                current_hp = mob_data.get("current_hp")
-                template = mobs.get(mob_id)
-                if template:
-                    mob_list.append(MobInstance(template, quantity, current_hp))
-
-            item_list = []
-            for item_data in room_data.get("items", []):
-                # Recursive load for containers inside items
-                def load_item_recursive(d):
-                    template = items.get(d["item_id"] if "item_id" in d else d["id"])
-                    if not template:
-                        return None
-                    quantity = d.get("quantity", 1)
-                    if "contents" in d:
-                        container = ContainerInstance(template, quantity)
-                        for c in d["contents"]:
-                            ci = load_item_recursive(c)
-                            if ci:
-                                container.add_item(ci)
-                        return container
-                    else:
-                        return ItemInstance(template, quantity)
-
-                inst = load_item_recursive(item_data)
-                if inst:
-                    item_list.append(inst)
-
+            mob_list, item_list = Room.load_contents(room_data, mobs, items)
+            spawns = [(mobs[m["id"]], m.get("quantity", 1)) for m in room_data.get("mobs", []) if m.get("id") in mobs]
+            # Exit targets are the same ids as the rooms' keys; share one string for both
+            exits = {pool.name(direction): pool.name(target) for direction, target in room_data.get("exits", {}).items()}
+            room_id = pool.name(room_id)
             rooms[room_id] = Room(
                 room_id,
-                room_data.get("name", room_id),
-                room_data.get("description", ""),
-                room_data.get("exits", {}),
+                pool.text(room_data.get("name", room_id)),
+                pool.text(room_data.get("description", "")),
+                exits,
                 mob_list,
-                item_list
+                item_list,
+                pool.name(room_data.get("zone")),
+                spawns
             )
+        ExitTable(rooms)
         return rooms
 
     @staticmethod
@@ -0,0 +1,140 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from server.core.metrics import METRICS
+
+# Per-session token bucket: refills at COMMAND_RATE tokens a second up to COMMAND_BURST
+COMMAND_RATE = 10.0
+COMMAND_BURST = 30.0
+# Lines a session may have waiting; anything past this is dropped
+MAX_QUEUED_COMMANDS = 100
+SCHEDULER_WORKERS = 4
+
+
+class CommandQueue:
+    """One session's pending commands and token bucket."""
+
+    def __init__(self, execute, burst):
+        self.execute = execute  # execute(line) runs one command for this session
+        self.commands = deque()  # (line, cost, queued_at)
+        self.tokens = burst
+        self.refilled = time.monotonic()
+        self.scheduled = False  # sitting in the ready queue or throttle heap, or running
+        self.running = False
+        self.closed = False
+        self.dropped = 0
+
+
+class Scheduler:
+    """Runs queued commands round-robin across sessions on a small worker pool.
+
+    A worker takes the session at the head of the ready queue, runs exactly
+    one of its commands and puts it back at the tail if it has more, so a
+    session with a hundred pasted lines gets the same turn rate as one with a
+    single command. A session whose next command costs more tokens than it
+    has left waits in a heap keyed by when its bucket will cover the cost.
+    """
+
+    def __init__(self, workers=SCHEDULER_WORKERS, rate=COMMAND_RATE, burst=COMMAND_BURST):
+        self.workers = workers
+        self.rate = rate
+        self.burst = burst
+        self.limited = True  # False skips the token buckets; round-robin still applies
+        self.cond = threading.Condition()
+        self.ready = deque()
+        self.throttled = []  # (ready_at, seq, queue)
+        self.seq = itertools.count()
+        self.threads = []
+        self.active = 0  # commands running right now
+
+    def open(self, execute):
+        with self.cond:
+            if not self.threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self.work_loop, name=f"scheduler-{i}", daemon=True)
+                    thread.start()
+                    self.threads.append(thread)
+        return CommandQueue(execute, self.burst)
+
+    def submit(self, queue, line, cost=1):
+        """Queues line for the session; returns False if it was dropped."""
+        with self.cond:
+            if queue.closed:
+                return False
+            if len(queue.commands) >= MAX_QUEUED_COMMANDS:
+                queue.dropped += 1
+                METRICS.inc("commands_dropped_total")
+                return False
+            queue.commands.append((line, min(cost, self.burst), time.perf_counter()))
+            if not queue.scheduled:
+                queue.scheduled = True
+                self.ready.append(queue)
+                self.cond.notify()
+        METRICS.gauge_add("commands_queued", 1)
+        return True
+
+    def close(self, queue):
+        """Drops the session's queued commands and waits for a running one to finish."""
+        with self.cond:
+            queue.closed = True
+            discarded = len(queue.commands)
+            queue.commands.clear()
+            while queue.running:
+                self.cond.wait()
+        if discarded:
+            METRICS.gauge_add("commands_queued", -discarded)
+
+    def wait_idle(self, timeout=None):
+        """Blocks until no command is queued, throttled or running; returns False on timeout."""
+        with self.cond:
+            return self.cond.wait_for(lambda: not (self.ready or self.throttled or self.active), timeout)
+
+    def next_queue(self):
+        # Caller holds self.cond
+        while True:
+            now = time.monotonic()
+            while self.throttled and self.throttled[0][0] <= now:
+                self.ready.append(heapq.heappop(self.throttled)[2])
+            while self.ready:
+                queue = self.ready.popleft()
+                if queue.closed or not queue.commands:
+                    queue.scheduled = False
+                    self.cond.notify_all()  # may be what wait_idle() is waiting on
+                    continue
+                queue.tokens = min(self.burst, queue.tokens + (now - queue.refilled) * self.rate)
+                queue.refilled = now
+                cost = queue.commands[0][1]
+                if not self.limited or queue.tokens >= cost:
+                    return queue
+                heapq.heappush(self.throttled, (now + (cost - queue.tokens) / self.rate, next(self.seq), queue))
+                METRICS.inc("commands_throttled_total")
+            self.cond.wait(self.throttled[0][0] - now if self.throttled else None)
+
+    def work_loop(self):
+        while True:
+            with self.cond:
+                queue = self.next_queue()
+                line, cost, queued_at = queue.commands.popleft()
+                queue.tokens -= cost
+                queue.running = True
+                self.active += 1
+            METRICS.gauge_add("commands_queued", -1)
+            METRICS.observe("command_queue_seconds", time.perf_counter() - queued_at)
+            try:
+                queue.execute(line)
+            except Exception as e:
+                print(f"[ERROR] Scheduled command failed: {e}")
+            with self.cond:
+                queue.running = False
+                self.active -= 1
+                if queue.closed or not queue.commands:
+                    queue.scheduled = False
+                    self.cond.notify_all()
+                else:
+                    self.ready.append(queue)
+                    self.cond.notify()
+
+
+SCHEDULER = Scheduler()
@@ -0,0 +1,128 @@
+import secrets
+import threading
+import time
+from server.core.presence import PRESENCE
+
+# Seconds a dropped session stays in memory waiting for its owner to reconnect
+LINKDEAD_GRACE = 300
+SWEEP_INTERVAL = 30
+# Seconds a re-login waits for the character's old session to let go of it
+TAKEOVER_TIMEOUT = 10.0
+
+
+class LinkdeadSession:
+    def __init__(self, username, user_data, player, token, expires_at):
+        self.username = username
+        self.user_data = user_data
+        self.player = player
+        self.token = token
+        self.expires_at = expires_at
+
+
+class LinkdeadRegistry:
+    """Players whose socket dropped, kept whole so a reconnect can reattach them.
+
+    Entries are found either by (account, character name), for a normal
+    re-login, or by the resume token handed out when the session started.
+
+    Connected sessions are registered too (attach), so a login for a
+    character whose old connection is still open, such as a half-open mobile
+    link, doesn't build a second Player: take_over() hangs up the old
+    connection, waits for that session to finish its teardown and park the
+    Player, and reclaims it like any other parked session. A session parks
+    only after everything else is torn down, so whoever reclaims it gets a
+    Player that nothing is still cleaning up.
+    """
+
+    def __init__(self, grace=LINKDEAD_GRACE):
+        self.grace = grace
+        self.lock = threading.Condition()
+        self.by_key = {}
+        self.by_token = {}
+        self.live = {}  # (account, character name) -> Player of a connected session
+
+    @staticmethod
+    def new_token():
+        return secrets.token_urlsafe(16)
+
+    def park(self, username, user_data, player, token):
+        entry = LinkdeadSession(username, user_data, player, token, time.time() + self.grace)
+        with self.lock:
+            old = self.by_key.pop((username, player.name), None)
+            if old:
+                self.by_token.pop(old.token, None)
+            self.by_key[(username, player.name)] = entry
+            self.by_token[token] = entry
+            if self.live.get((username, player.name)) is player:
+                del self.live[(username, player.name)]
+            self.lock.notify_all()
+        return entry
+
+    def attach(self, username, player):
+        with self.lock:
+            self.live[(username, player.name)] = player
+
+    def detach(self, username, player):
+        """Forgets a connected session that ended without parking."""
+        with self.lock:
+            if self.live.get((username, player.name)) is player:
+                del self.live[(username, player.name)]
+                self.lock.notify_all()
+
+    def take_over(self, username, character_name, timeout=TAKEOVER_TIMEOUT):
+        """Disconnects the character's live session and returns its parked entry, or None."""
+        key = (username, character_name)
+        with self.lock:
+            player = self.live.get(key)
+        if player is None:
+            return None
+        player.send_line("\r\nThis character has been taken over by a new connection.")
+        try:
+            player.user.hang_up()
+        except OSError:
+            pass
+        with self.lock:
+            self.lock.wait_for(lambda: key in self.by_key or self.live.get(key) is not player, timeout)
+            entry = self.by_key.get(key)
+            return self._take(entry) if entry else None
+
+    def _take(self, entry):
+        self.by_key.pop((entry.username, entry.player.name), None)
+        self.by_token.pop(entry.token, None)
+        return entry if entry.expires_at > time.time() else None
+
+    def reclaim(self, username, character_name):
+        with self.lock:
+            entry = self.by_key.get((username, character_name))
+            return self._take(entry) if entry else None
+
+    def reclaim_token(self, token):
+        with self.lock:
+            entry = self.by_token.get(token)
+            return self._take(entry) if entry else None
+
+    def sweep(self):
+        """Drops expired entries; their state was already saved when they were parked."""
+        now = time.time()
+        with self.lock:
+            expired = [e for e in self.by_key.values() if e.expires_at <= now]
+            for entry in expired:
+                self._take(entry)
+        return expired
+
+    def start_sweeper(self, interval=SWEEP_INTERVAL):
+        def sweep_loop():
+            while True:
+                time.sleep(interval)
+                for entry in self.sweep():
+                    PRESENCE.remove(entry.player)
+                    print(f"[-] Linkdead session expired: {entry.username}/{entry.player.name}")
+        thread = threading.Thread(target=sweep_loop, name="linkdead-sweeper", daemon=True)
+        thread.start()
+        return thread
+
+    def __len__(self):
+        return len(self.by_key)
+
+
+LINKDEAD = LinkdeadRegistry()
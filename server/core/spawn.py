@@ -0,0 +1,98 @@
+import threading
+from server.core.content import MobInstance
+from server.core.metrics import METRICS
+
+# Released instances kept per blueprint; anything past this is left to the GC
+POOL_LIMIT = 1024
+
+
+class MobFactory:
+    """Creates MobInstance objects per Mob blueprint, reusing released ones.
+
+    Each blueprint is checked once, the first time it spawns, and the result
+    is cached until a reload replaces the blueprint. populate() repopulates a
+    whole area in one call: it releases the rooms' current mobs into the pool
+    first, so the spawns that follow reuse those objects instead of allocating
+    new ones and leaving the old ones for the GC.
+
+    Only release instances that are no longer in any room; they are reset and
+    handed out again.
+    """
+
+    def __init__(self, pool_limit=POOL_LIMIT):
+        self.pool_limit = pool_limit
+        self.lock = threading.Lock()
+        self.templates = {}  # blueprint id -> (blueprint, starting hp or None if invalid)
+        self.pools = {}  # blueprint id -> released MobInstances
+        self.created = 0
+        self.reused = 0
+
+    def template(self, blueprint):
+        # Caller holds self.lock
+        cached = self.templates.get(blueprint.id)
+        if cached is not None and cached[0] is blueprint:
+            return cached[1]
+        hp = blueprint.hp
+        if isinstance(hp, bool) or not isinstance(hp, int) or hp <= 0:
+            print(f"[ERROR] Mob '{blueprint.id}' has invalid hp {hp!r}; it will not spawn")
+            hp = None
+        self.templates[blueprint.id] = (blueprint, hp)
+        return hp
+
+    def spawn(self, blueprint, quantity=1, current_hp=None):
+        """Returns a MobInstance of blueprint, or None if the blueprint is invalid."""
+        with self.lock:
+            return self.spawn_locked(blueprint, quantity, current_hp)
+
+    def spawn_locked(self, blueprint, quantity, current_hp):
+        hp = self.template(blueprint)
+        if hp is None:
+            return None
+        pool = self.pools.get(blueprint.id)
+        if pool:
+            mob = pool.pop()
+            mob.mob_blueprint = blueprint
+            mob.quantity = quantity
+            mob.current_hp = current_hp if current_hp is not None else hp
+            self.reused += 1
+            return mob
+        self.created += 1
+        return MobInstance(blueprint, quantity, current_hp if current_hp is not None else hp)
+
+    def release(self, mobs):
+        with self.lock:
+            self.release_locked(mobs)
+
+    def release_locked(self, mobs):
+        for mob in mobs:
+            pool = self.pools.get(mob.mob_blueprint.id)
+            if pool is None:
+                pool = self.pools[mob.mob_blueprint.id] = []
+            if len(pool) < self.pool_limit:
+                pool.append(mob)
+
+    @METRICS.timed("spawn_seconds", "populate")
+    def populate(self, rooms):
+        """Replaces every room's mobs with fresh ones from its spawn list; returns mobs spawned."""
+        rooms = list(rooms)
+        spawned = 0
+        with self.lock:
+            for room in rooms:
+                self.release_locked(room.mob_instances)
+            for room in rooms:
+                mob_list = []
+                for blueprint, quantity in room.mob_spawns:
+                    mob = self.spawn_locked(blueprint, quantity, None)
+                    if mob is not None:
+                        mob_list.append(mob)
+                room.mob_instances = mob_list
+                spawned += len(mob_list)
+        METRICS.inc("mobs_spawned_total", spawned)
+        return spawned
+
+    def report(self):
+        pooled = sum(len(pool) for pool in self.pools.values())
+        return f"Mob pool: {pooled} pooled, {self.created} created, {self.reused} reused"
+
+
+MOB_FACTORY = MobFactory()
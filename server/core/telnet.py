@@ -0,0 +1,275 @@
+import socket
+import threading
+import time
+import zlib
+from collections import deque
+from server.core.metrics import METRICS
+
+IAC = 255
+DONT = 254
+DO = 253
+WONT = 252
+WILL = 251
+SB = 250
+SE = 240
+
+COMPRESS2 = 86  # MCCP2
+
+# Output waiting for a slow client. Past the soft limit low-priority output is
+# dropped; a client that stays over it for OVERFLOW_TIMEOUT, or passes the hard
+# limit, is disconnected.
+OUTPUT_QUEUE_LIMIT = 64 * 1024
+OUTPUT_QUEUE_HARD_LIMIT = 512 * 1024
+OVERFLOW_TIMEOUT = 10.0
+# Unflushed output is written anyway once this much has built up
+WRITE_CHUNK = 16 * 1024
+# How long close() waits for queued output to reach the client
+CLOSE_DRAIN_TIMEOUT = 2.0
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+
+# Markers queued alongside output for the writer thread
+FLUSH = "flush"
+START_COMPRESSION = "start_compression"
+
+
+class TelnetConnection:
+    """Wraps a client socket: strips telnet commands from input and queues output.
+
+    sendall() never blocks on the client. Output is queued and a writer thread
+    per connection sends it, coalescing everything up to each flush() (called
+    at every prompt) into one write. The queue is bounded as described above,
+    so a client that stops reading only ever stalls its own writer.
+
+    With a compress_level the server offers IAC WILL COMPRESS2 (MCCP2) on
+    connect. Once the client answers IAC DO COMPRESS2, the writer sends
+    everything after that point through a single zlib stream.
+    """
+
+    def __init__(self, sock, compress_level=None):
+        self.sock = sock
+        self.level = compress_level
+        self.state = "data"
+        self.verb = None
+        self.compress_requested = False
+        self.compressor = None
+        self.raw_bytes = 0  # bytes fed into the compressor
+        self.wire_bytes = 0  # compressed bytes written to the socket
+        self.cpu_seconds = 0.0
+
+        self.cond = threading.Condition()
+        self.queue = deque()
+        self.queued = 0  # bytes queued and not yet written
+        self.peak_queued = 0
+        self.dropped = 0
+        self.overflow_since = None
+        self.closing = False
+        self.closed = False
+        self.writer = threading.Thread(target=self.write_loop, name="telnet-writer", daemon=True)
+        self.writer.start()
+        if compress_level is not None:
+            self.send_raw(bytes([IAC, WILL, COMPRESS2]))
+
+    def recv(self, size):
+        while True:
+            data = self.sock.recv(size)
+            if not data:
+                return data
+            data = self.filter(data)
+            if data:
+                return data
+
+    def filter(self, data):
+        """Returns data with telnet commands removed, answering any negotiation in it."""
+        if self.state == "data" and IAC not in data:
+            return data
+        out = bytearray()
+        for byte in data:
+            state = self.state
+            if state == "data":
+                if byte == IAC:
+                    self.state = "iac"
+                else:
+                    out.append(byte)
+            elif state == "iac":
+                if byte == IAC:
+                    out.append(IAC)
+                    self.state = "data"
+                elif byte in (WILL, WONT, DO, DONT):
+                    self.verb = byte
+                    self.state = "option"
+                elif byte == SB:
+                    self.state = "sb"
+                else:
+                    self.state = "data"
+            elif state == "option":
+                self.negotiate(self.verb, byte)
+                self.state = "data"
+            elif state == "sb":
+                if byte == IAC:
+                    self.state = "sb_iac"
+            elif state == "sb_iac":
+                self.state = "data" if byte == SE else "sb"
+        return bytes(out)
+
+    def negotiate(self, verb, option):
+        if option == COMPRESS2 and self.level is not None:
+            if verb == DO and not self.compress_requested:
+                self.compress_requested = True
+                self.enqueue(START_COMPRESSION)
+                self.flush()
+                METRICS.inc("mccp_sessions_total")
+            return
+        # Refuse anything the client asks for that we never offered
+        if verb == DO:
+            self.send_raw(bytes([IAC, WONT, option]))
+        elif verb == WILL:
+            self.send_raw(bytes([IAC, DONT, option]))
+
+    def send_raw(self, data):
+        self.sendall(data)
+        self.flush()
+
+    def sendall(self, data, priority=PRIORITY_NORMAL):
+        """Queues data for the client; raises OSError once the connection is gone."""
+        with self.cond:
+            if self.closed:
+                raise OSError("connection closed")
+            if self.queued + len(data) > OUTPUT_QUEUE_LIMIT:
+                if priority < PRIORITY_NORMAL:
+                    self.dropped += 1
+                    METRICS.inc("output_dropped_total")
+                    return
+                now = time.monotonic()
+                if self.overflow_since is None:
+                    self.overflow_since = now
+                if (self.queued + len(data) > OUTPUT_QUEUE_HARD_LIMIT
+                        or now - self.overflow_since > OVERFLOW_TIMEOUT):
+                    self.abort()
+                    METRICS.inc("output_overflow_disconnects_total")
+                    print(f"[-] Disconnecting slow client: {self.queued} bytes of output queued")
+                    raise OSError("output queue overflow")
+            self.queued += len(data)
+            self.peak_queued = max(self.peak_queued, self.queued)
+            self.queue.append(data)
+            self.cond.notify()
+        METRICS.gauge_add("output_queue_bytes", len(data))
+
+    def flush(self):
+        self.enqueue(FLUSH)
+
+    def enqueue(self, marker):
+        with self.cond:
+            if self.closed:
+                return
+            self.queue.append(marker)
+            self.cond.notify()
+
+    def hang_up(self):
+        """Drops the client now; recv() returns and queued output is discarded."""
+        with self.cond:
+            self.abort()
+
+    def abort(self):
+        """Marks the connection dead and unblocks both the reader and the writer."""
+        self.closed = True
+        self.cond.notify_all()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def write_loop(self):
+        pending = []  # bytes ready for the socket since the last write
+        pending_size = 0
+        try:
+            while True:
+                with self.cond:
+                    while not self.queue and not self.closing and not self.closed:
+                        self.cond.wait()
+                    if self.closed or (self.closing and not self.queue):
+                        break
+                    batch = list(self.queue)
+                    self.queue.clear()
+
+                try:
+                    for item in batch:
+                        if item is FLUSH or item is START_COMPRESSION:
+                            if self.compressor is not None:
+                                pending.append(self.compress(self.compressor.flush, zlib.Z_SYNC_FLUSH))
+                            self.write(pending)
+                            pending, pending_size = [], 0
+                            if item is START_COMPRESSION:
+                                self.write([bytes([IAC, SB, COMPRESS2, IAC, SE])])
+                                self.compressor = zlib.compressobj(self.level)
+                            continue
+                        if self.compressor is not None:
+                            self.raw_bytes += len(item)
+                            item = self.compress(self.compressor.compress, item)
+                        pending.append(item)
+                        pending_size += len(item)
+                        if pending_size >= WRITE_CHUNK:
+                            self.write(pending)
+                            pending, pending_size = [], 0
+                finally:
+                    self.dequeued(sum(len(item) for item in batch if isinstance(item, bytes)))
+
+            if self.compressor is not None:
+                pending.append(self.compress(self.compressor.flush, zlib.Z_FINISH))
+            self.write(pending)
+        except OSError:
+            pass
+        finally:
+            with self.cond:
+                self.abort()
+                leftover = sum(len(item) for item in self.queue if isinstance(item, bytes))
+                self.queue.clear()
+            self.dequeued(leftover)
+
+    def compress(self, fn, data):
+        started = time.thread_time()
+        out = fn(data)
+        self.cpu_seconds += time.thread_time() - started
+        self.wire_bytes += len(out)
+        return out
+
+    def write(self, chunks):
+        data = b"".join(chunks)
+        if data:
+            self.sock.sendall(data)
+
+    def dequeued(self, size):
+        if not size:
+            return
+        with self.cond:
+            self.queued -= size
+            if self.queued <= OUTPUT_QUEUE_LIMIT:
+                self.overflow_since = None
+        METRICS.gauge_add("output_queue_bytes", -size)
+
+    def compression_report(self):
+        if self.compressor is None:
+            return "Compression: off"
+        ratio = self.raw_bytes / self.wire_bytes if self.wire_bytes else 0.0
+        return (f"Compression: MCCP2 level {self.level}, {self.raw_bytes} -> {self.wire_bytes} bytes "
+                f"({ratio:.2f}x), {self.cpu_seconds * 1000:.2f} ms CPU")
+
+    def queue_report(self):
+        return f"Output queue: {self.queued} bytes, peak {self.peak_queued}, {self.dropped} dropped"
+
+    def close(self):
+        """Lets the writer drain what is queued (bounded by CLOSE_DRAIN_TIMEOUT), then closes."""
+        with self.cond:
+            self.closing = True
+            self.cond.notify_all()
+        self.writer.join(CLOSE_DRAIN_TIMEOUT)
+        if self.writer.is_alive():
+            with self.cond:
+                self.abort()
+            self.writer.join(CLOSE_DRAIN_TIMEOUT)
+        if self.compressor is not None:
+            METRICS.inc("mccp_raw_bytes_total", self.raw_bytes)
+            METRICS.inc("mccp_wire_bytes_total", self.wire_bytes)
+            METRICS.inc("mccp_cpu_seconds_total", self.cpu_seconds)
+        self.sock.close()
@@ -0,0 +1,96 @@
+"""Connections a session can run on.
+
+handle_client, Player and UserManager only ever use this interface of a
+session's connection:
+
+    recv(size)       next input bytes, or b"" once the client is gone
+    sendall(data, priority=PRIORITY_NORMAL)
+    flush()          end of a burst of output; called at every prompt
+    hang_up()        drop the client now, so a blocked recv() returns
+    close()
+
+TelnetConnection provides it over a TCP socket. MemoryConnection provides it
+in process, for replays and headless simulation.
+"""
+import socket
+import threading
+from collections import deque
+from server.core.telnet import TelnetConnection
+
+
+def open_connection(conn, compress_level=None):
+    """Wraps a raw socket in a TelnetConnection; anything else is already a connection."""
+    if isinstance(conn, socket.socket):
+        return TelnetConnection(conn, compress_level)
+    return conn
+
+
+class MemoryConnection:
+    """An in-process connection: feed() supplies input, output goes to sink or a buffer.
+
+    sink(data), if given, is called with each sendall() on whichever thread
+    produced the output; otherwise output is kept for data().
+    """
+
+    def __init__(self, sink=None):
+        self.cond = threading.Condition()
+        self.input = deque()
+        self.output = []
+        self.sink = sink
+        self.reading = False  # blocked in recv() with nothing left to return
+        self.eof = False
+        self.finished = False  # set by whoever runs the session once it has returned
+
+    def recv(self, size):
+        with self.cond:
+            while not self.input and not self.eof:
+                self.reading = True
+                self.cond.notify_all()
+                self.cond.wait()
+            self.reading = False
+            if not self.input:
+                return b""
+            data = self.input.popleft()
+            if len(data) > size:
+                self.input.appendleft(data[size:])
+                data = data[:size]
+            return data
+
+    def feed(self, data):
+        with self.cond:
+            self.input.append(data)
+            self.reading = False
+            self.cond.notify_all()
+
+    def hang_up(self):
+        """Makes recv() return b"" once the queued input is used up."""
+        with self.cond:
+            self.eof = True
+            self.cond.notify_all()
+
+    def finish(self):
+        with self.cond:
+            self.finished = True
+            self.cond.notify_all()
+
+    def wait_reading(self, timeout=None):
+        """Blocks until the session is waiting for more input (or has ended); False on timeout."""
+        with self.cond:
+            return self.cond.wait_for(lambda: (self.reading and not self.input) or self.finished, timeout)
+
+    def sendall(self, data, priority=None):
+        if self.sink is not None:
+            self.sink(data)
+            return
+        with self.cond:
+            self.output.append(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.hang_up()
+
+    def data(self):
+        with self.cond:
+            return b"".join(self.output)
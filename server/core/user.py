@@ -1,12 +1,42 @@
 import os
 import json
+import copy
+import hashlib
+import hmac
+import threading
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from server.core.content import ItemInstance, ContainerInstance
+from server.core.metrics import METRICS
+from server.core.recorder import RECORDER
 
 USERS_FILE = "server/data/users.json"
 
+# Passwords are stored as "pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>".
+# Anything else is a legacy plaintext password, upgraded on its next login.
+PASSWORD_SCHEME = "pbkdf2_sha256"
+PASSWORD_ITERATIONS = 200000
+# hashlib releases the GIL while hashing, so this caps the cores a login
+# burst can take away from game sessions.
+KDF_WORKERS = 2
+_kdf_pool = ThreadPoolExecutor(max_workers=KDF_WORKERS, thread_name_prefix="kdf")
+
+# Resident copy of users.json, loaded once; every change goes through _users_lock
+_users = None
+_users_lock = threading.RLock()
+
+# Saved inventories are {"v": INVENTORY_FORMAT, "items": [...]} where each entry is
+# [depth, item_id, quantity] in pre-order, with a trailing 1 marking containers.
+# A bare list is the original nested {"item_id", "quantity", "contents"} format.
+INVENTORY_FORMAT = 2
+
+# Seconds between writes of the characters changed since the last one
+SAVE_INTERVAL = 2
+
 class UserManager:
     @staticmethod
+    @METRICS.timed("persistence_seconds", "load_users")
     def load_users():
         if os.path.exists(USERS_FILE):
             with open(USERS_FILE, "r") as f:
@@ -14,43 +44,144 @@ class UserManager:
         return {}
 
     @staticmethod
+    @METRICS.timed("persistence_seconds", "save_users")
     def save_users(users):
-        with open(USERS_FILE, "w") as f:
-            json.dump(users, f, indent=2)
+        with _users_lock:
+            tmp_path = USERS_FILE + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(users, f, indent=2)
+            os.replace(tmp_path, USERS_FILE)
+
+    @staticmethod
+    def accounts():
+        """The resident account index, loaded from USERS_FILE on first use."""
+        global _users
+        if _users is None:
+            with _users_lock:
+                if _users is None:
+                    _users = UserManager.load_users()
+        return _users
+
+    @staticmethod
+    def reload_users():
+        global _users
+        with _users_lock:
+            _users = UserManager.load_users()
+
+    @staticmethod
+    def hash_password(password):
+        def derive():
+            salt = os.urandom(16)
+            digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PASSWORD_ITERATIONS)
+            return f"{PASSWORD_SCHEME}${PASSWORD_ITERATIONS}${salt.hex()}${digest.hex()}"
+        return _kdf_pool.submit(derive).result()
+
+    @staticmethod
+    def verify_password(password, stored):
+        """Returns (matches, needs_rehash)."""
+        if not isinstance(stored, str):
+            return False, False
+        if not stored.startswith(PASSWORD_SCHEME + "$"):
+            return hmac.compare_digest(password.encode(), stored.encode()), True
+        _, iterations, salt, expected = stored.split("$")
+        def derive():
+            return hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), int(iterations))
+        digest = _kdf_pool.submit(derive).result()
+        return hmac.compare_digest(digest.hex(), expected), int(iterations) != PASSWORD_ITERATIONS
 
     @staticmethod
     def serialize_inventory(inventory):
-        def serialize_item(inst):
-            data = {
-                "item_id": inst.item_blueprint.id,
-                "quantity": inst.quantity
-            }
+        entries = []
+        stack = [(iter(inventory), 0)]
+        while stack:
+            inst = next(stack[-1][0], None)
+            if inst is None:
+                stack.pop()
+                continue
+            depth = stack[-1][1]
             if hasattr(inst, "contents"):
-                data["contents"] = [serialize_item(i) for i in inst.contents]
-            return data
-        return [serialize_item(item) for item in inventory]
+                entries.append([depth, inst.item_blueprint.id, inst.quantity, 1])
+                stack.append((iter(inst.contents), depth + 1))
+            else:
+                entries.append([depth, inst.item_blueprint.id, inst.quantity])
+        return {"v": INVENTORY_FORMAT, "items": entries}
 
     @staticmethod
-    def deserialize_inventory(data):
-        def deserialize_item(d):
-            blueprint = items.get(d["item_id"])
-            if not blueprint:
-                return None
+    def _legacy_entries(data):
+        """Flattens the original nested format into [depth, item_id, quantity(, 1)] entries."""
+        stack = [(iter(data), 0)]
+        while stack:
+            d = next(stack[-1][0], None)
+            if d is None:
+                stack.pop()
+                continue
+            depth = stack[-1][1]
             if "contents" in d:
-                container = ContainerInstance(blueprint, d["quantity"])
-                for sub in d["contents"]:
-                    item = deserialize_item(sub)
-                    if item:
-                        container.add_item(item)
-                return container
-            return ItemInstance(blueprint, d["quantity"])
-        return [deserialize_item(item) for item in data if deserialize_item(item)]
+                yield [depth, d["item_id"], d["quantity"], 1]
+                stack.append((iter(d["contents"]), depth + 1))
+            else:
+                yield [depth, d["item_id"], d["quantity"]]
 
     @staticmethod
-    def authenticate_or_create(conn):
+    def deserialize_inventory(data, items):
+        if isinstance(data, dict):
+            if data.get("v") != INVENTORY_FORMAT:
+                print(f"[ERROR] Unsupported inventory format {data.get('v')!r}; inventory not loaded")
+                return []
+            entries = data.get("items", [])
+        else:
+            entries = UserManager._legacy_entries(data)
+        inventory = []
+        containers = []  # containers[d] receives the entries at depth d + 1
+        skip_below = None  # depth of an unknown item whose contents are dropped
+        orphans = 0
+        lookup = items.get
+        for entry in entries:
+            depth = entry[0]
+            if skip_below is not None:
+                if depth > skip_below:
+                    continue
+                skip_below = None
+            # Deeper than the open containers: the one it was in is missing
+            orphan = depth > len(containers)
+            if not orphan and len(containers) > depth:
+                del containers[depth:]
+            blueprint = lookup(entry[1])
+            if not blueprint:
+                skip_below = depth
+                continue
+            if len(entry) > 3:
+                inst = ContainerInstance(blueprint, entry[2])
+                if not orphan:
+                    containers.append(inst)
+            else:
+                inst = ItemInstance(blueprint, entry[2])
+            if orphan:
+                # Kept at the top level; the open containers still take the rows after it
+                orphans += 1
+                inventory.append(inst)
+            elif depth:
+                containers[depth - 1].add_item(inst)
+            else:
+                inventory.append(inst)
+        if orphans:
+            print(f"[ERROR] {orphans} saved inventory entries had no container; moved to the top level")
+        return inventory
+
+    @staticmethod
+    def authenticate_or_create(conn, resume=None):
+        """Runs the login prompts; returns (account_name, character_data) or (None, None).
+
+        resume, if given, is called with the token from a "RESUME <token>" line and
+        returns (account_name, character_data) for a live session, or None.
+        """
         def send(msg):
             try:
-                conn.sendall((msg + "\r\n").encode())
+                data = (msg + "\r\n").encode()
+                conn.sendall(data)
+                if hasattr(conn, "flush"):
+                    conn.flush()
+                METRICS.inc("bytes_out_total", len(data))
             except:
                 pass
 
@@ -61,6 +192,7 @@ class UserManager:
                     data = conn.recv(1024)
                     if not data:
                         return None
+                    METRICS.inc("bytes_in_total", len(data))
                     buffer += data.decode(errors='ignore')
                     if "\n" in buffer or "\r" in buffer:
                         break
@@ -68,8 +200,12 @@ class UserManager:
             except:
                 return None
 
+        def recv_password():
+            RECORDER.secret(conn)
+            return recv_line()
+
         try:
-            users = UserManager.load_users()
+            users = UserManager.accounts()
 
             while True:
                 send("Please enter your account name, or type NEW to create one:")
@@ -80,6 +216,13 @@ class UserManager:
                 if not name:
                     continue
 
+                if resume and name.upper().startswith("RESUME "):
+                    resumed = resume(name[7:].strip())
+                    if resumed:
+                        return resumed
+                    send("That session has expired. Please log in.")
+                    continue
+
                 if name.upper() == "NEW":
                     while True:
                         send("Choose a new account name:")
@@ -91,12 +234,12 @@ class UserManager:
                             continue
 
                         send("Enter a password:")
-                        password = recv_line()
+                        password = recv_password()
                         if password is None or not password.strip():
                             continue
 
                         send("Confirm password:")
-                        confirm = recv_line()
+                        confirm = recv_password()
                         if confirm is None or confirm.strip() != password.strip():
                             send("Passwords did not match. Start over.")
                             continue
@@ -106,8 +249,8 @@ class UserManager:
                         if character_name is None or not character_name.strip():
                             continue
 
-                        users[account_name] = {
-                            "password": password,
+                        account = {
+                            "password": UserManager.hash_password(password),
                             "characters": {
                                 character_name: {
                                     "name": character_name,
@@ -127,20 +270,31 @@ class UserManager:
                                 }
                             }
                         }
-                        UserManager.save_users(users)
-                        return account_name, users[account_name]["characters"][character_name]
+                        with _users_lock:
+                            if account_name in users:
+                                send("That account already exists.")
+                                continue
+                            users[account_name] = account
+                            UserManager.save_users(users)
+                        return account_name, copy.deepcopy(account["characters"][character_name])
 
                 elif name in users:
                     for _ in range(3):
                         send("Enter your password:")
-                        password = recv_line()
+                        password = recv_password()
                         if password is None:
                             return None, None
-                        if password == users[name].get("password"):
+                        matches, needs_rehash = UserManager.verify_password(password, users[name].get("password"))
+                        if matches:
+                            if needs_rehash:
+                                password_hash = UserManager.hash_password(password)
+                                with _users_lock:
+                                    users[name]["password"] = password_hash
+                                    UserManager.save_users(users)
                             characters = users[name].get("characters", {})
                             if not characters:
                                 send("No characters found. Creating default...")
-                                characters["Default"] = {
+                                default_character = {
                                     "name": "Default",
                                     "current_room_id": "start",
                                     "class": "Newbie",
@@ -156,11 +310,13 @@ class UserManager:
                                     },
                                     "inventory": []
                                 }
-                                users[name]["characters"] = characters
-                                UserManager.save_users(users)
+                                with _users_lock:
+                                    characters["Default"] = default_character
+                                    users[name]["characters"] = characters
+                                    UserManager.save_users(users)
 
                             character_name = list(characters.keys())[0]
-                            return name, characters[character_name]
+                            return name, copy.deepcopy(characters[character_name])
                         else:
                             send("Incorrect password. Try again.")
                     send("Too many failed attempts. Connection closing.")
@@ -174,8 +330,84 @@ class UserManager:
             return None, None
 
     @staticmethod
+    def find_characters(character_name):
+        """Copies of the saved data of every character with that name (any case), in any account."""
+        wanted = character_name.lower()
+        users = UserManager.accounts()
+        with _users_lock:
+            return [copy.deepcopy(data) for account in users.values()
+                    for name, data in account.get("characters", {}).items() if name.lower() == wanted]
+
+    @staticmethod
+    def is_admin(account_name):
+        return bool(UserManager.accounts().get(account_name, {}).get("admin"))
+
+    @staticmethod
+    @METRICS.timed("persistence_seconds", "save_character_data")
     def save_character_data(account_name, character_name, updated_data):
-        users = UserManager.load_users()
-        if account_name in users and character_name in users[account_name].get("characters", {}):
-            users[account_name]["characters"][character_name].update(updated_data)
+        users = UserManager.accounts()
+        with _users_lock:
+            if account_name in users and character_name in users[account_name].get("characters", {}):
+                users[account_name]["characters"][character_name].update(copy.deepcopy(updated_data))
+                UserManager.save_users(users)
+
+    @staticmethod
+    @METRICS.timed("persistence_seconds", "save_character_batch")
+    def save_character_batch(updates):
+        """Applies several (account_name, character_name, data) updates with one write."""
+        users = UserManager.accounts()
+        with _users_lock:
+            for account_name, character_name, updated_data in updates:
+                if account_name in users and character_name in users[account_name].get("characters", {}):
+                    users[account_name]["characters"][character_name].update(copy.deepcopy(updated_data))
             UserManager.save_users(users)
+
+
+class CharacterSaver:
+    """Collects character changes and writes them to USERS_FILE in one batch per interval.
+
+    mark_dirty() only keeps the latest data for that character, so a player
+    walking across ten rooms between flushes costs one update in one write.
+    flush() writes whatever is pending; main calls it at shutdown.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.dirty = {}  # (account_name, character_name) -> data to apply
+        self.write_lock = threading.Lock()
+
+    def mark_dirty(self, account_name, character_name, data):
+        # Callers replace the values they change, so a shallow copy is a stable view
+        with self.lock:
+            self.dirty[(account_name, character_name)] = dict(data)
+
+    def flush(self):
+        """Writes the pending changes; returns how many characters were saved."""
+        with self.write_lock:
+            with self.lock:
+                dirty, self.dirty = self.dirty, {}
+            if dirty:
+                try:
+                    UserManager.save_character_batch([(a, n, d) for (a, n), d in dirty.items()])
+                except Exception:
+                    # Keep them for the next attempt, unless marked again meanwhile
+                    with self.lock:
+                        for key, data in dirty.items():
+                            self.dirty.setdefault(key, data)
+                    raise
+            return len(dirty)
+
+    def start(self, interval=SAVE_INTERVAL):
+        def save_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"[ERROR] Character save failed: {e}")
+        thread = threading.Thread(target=save_loop, name="character-saver", daemon=True)
+        thread.start()
+        return thread
+
+
+CHARACTER_SAVER = CharacterSaver()
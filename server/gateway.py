@@ -0,0 +1,356 @@
+"""Sharded deployment: one gateway process owns the sockets, worker processes own zones.
+
+    python -m server.gateway --workers 4
+
+The gateway logs players in and forwards each input line to the worker that
+owns the zone of the player's current room. Workers run the normal
+handle_command against their own copy of the world; when a move ends in a
+zone a worker doesn't own, it hands the player's state back to the gateway,
+which re-attaches it on the owning worker. Rooms without a "zone" key belong
+to DEFAULT_ZONE. All users.json writes happen in the gateway. Presence
+changes, global channel messages and tells a worker can't deliver itself
+are relayed to the other workers, so who, finger and chat span every shard.
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import queue
+import socket
+import threading
+from collections import deque
+
+import server.main as game
+from server.core.channels import CHANNELS
+from server.core.checkpoint import CHECKPOINTER
+from server.core.metrics import METRICS
+from server.core.presence import PRESENCE
+from server.core.room import Room
+from server.core.telnet import PRIORITY_LOW
+from server.core.transport import open_connection
+from server.core.user import UserManager
+
+DEFAULT_ZONE = "default"
+SAVE_BATCH = 256
+# How often an idle worker checks that the gateway is still alive
+PARENT_CHECK_INTERVAL = 1.0
+
+
+def zone_of(room):
+    return room.zone or DEFAULT_ZONE
+
+
+def assign_zones(zones, workers):
+    """Round-robin over the sorted zone names, so every process derives the same map."""
+    return {zone: i % workers for i, zone in enumerate(sorted(zones))}
+
+
+class ShardOutput:
+    """Stands in for a player's socket inside a worker; output is collected per command.
+
+    PRIORITY_LOW output is chat from other players, not a reply to this
+    player's command, so it is pushed to the gateway as soon as it is sent.
+    """
+
+    def __init__(self, sid, send):
+        self.sid = sid
+        self.send = send
+        self.chunks = []
+
+    def sendall(self, data, priority=None):
+        if priority == PRIORITY_LOW:
+            self.send(("push", self.sid, data))
+        else:
+            self.chunks.append(data)
+
+    def flush(self):
+        pass
+
+    def recv(self, size):
+        return b""
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def snapshot(player, user_data):
+    user_data["current_room_id"] = player.room.id
+    user_data["inventory"] = player.save_inventory()
+    return user_data
+
+
+def run_worker(index, pipe, owned):
+    """Worker process loop. Every attach or line gets exactly one reply: out or migrate."""
+    # Workers restore room contents but several of them can't share one journal
+    CHECKPOINTER.read_only = True
+    game.load_world()
+    send_lock = threading.Lock()
+
+    def send(msg):
+        # The chat fan-out thread sends as well as this one
+        with send_lock:
+            pipe.send(msg)
+
+    game.save_character = lambda account, name, data: send(("save", account, name, data))
+    PRESENCE.listener = lambda key, entry: send(("presence", key, entry))
+    CHANNELS.relay = lambda key, sender_name, text: send(("chat", key, sender_name, text))
+    sessions = {}  # sid -> (player, username, user_data, is_admin)
+    parent = multiprocessing.parent_process()
+    print(f"[*] Shard worker {index} (pid {os.getpid()}) owns zones: {', '.join(sorted(owned))}")
+
+    while True:
+        try:
+            # Forked siblings hold copies of the gateway's pipe ends, so a dead
+            # gateway doesn't always show up as EOF here.
+            if not pipe.poll(PARENT_CHECK_INTERVAL):
+                if parent is not None and not parent.is_alive():
+                    break
+                continue
+            msg = pipe.recv()
+        except (EOFError, OSError):
+            break
+        kind, sid = msg[0], msg[1]
+        if kind == "presence":
+            PRESENCE.apply(msg[1], msg[2])
+            continue
+        if kind == "chat":
+            CHANNELS.receive(msg[1], msg[2], msg[3])
+            continue
+        try:
+            if kind == "attach":
+                _, _, username, user_data, is_admin, greeting = msg
+                player = game.new_player(ShardOutput(sid, send), username, user_data)
+                sessions[sid] = (player, username, user_data, is_admin)
+                CHANNELS.connect(player, player.room, user_data.get("channels_off", ()))
+                PRESENCE.update(player)
+                if greeting:
+                    player.send_line(greeting)
+                player.look()
+            elif kind == "line":
+                player, username, user_data, is_admin = sessions[sid]
+                game.handle_command(player, username, user_data, is_admin, msg[2])
+            elif kind == "detach":
+                player, username, user_data, _ = sessions.pop(sid)
+                CHANNELS.disconnect(player)
+                PRESENCE.remove(player)
+                send(("save", username, player.name, snapshot(player, user_data)))
+                continue
+
+            player, username, user_data, is_admin = sessions[sid]
+            if zone_of(player.room) not in owned:
+                # Whatever this worker printed came from its stale copy of the room;
+                # the owning worker shows the room again on attach.
+                player.user.drain()
+                del sessions[sid]
+                CHANNELS.disconnect(player)
+                PRESENCE.forget(player)
+                send(("migrate", sid, username, snapshot(player, user_data), is_admin))
+            else:
+                player.prompt()
+                send(("out", sid, player.user.drain()))
+        except Exception as e:
+            print(f"[ERROR] Shard worker {index} failed handling {kind} for session {sid}: {e}")
+            if kind != "detach":
+                send(("out", sid, b"Something went wrong.\r\n\r\n> "))
+
+
+class GatewaySession:
+    def __init__(self, sid, conn, username):
+        self.sid = sid
+        self.conn = conn
+        self.username = username
+        self.worker = None
+        self.busy = False  # an attach or line is waiting on its reply
+        self.pending = deque()
+        self.closed = False
+
+
+class Gateway:
+    def __init__(self, workers):
+        rooms = Room.load_rooms(game.WORLD_FILE)
+        self.room_zones = {room_id: zone_of(room) for room_id, room in rooms.items()}
+        self.zone_workers = assign_zones(set(self.room_zones.values()), workers)
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.sid_counter = itertools.count(1)
+        self.saves = queue.Queue()
+        self.outboxes = []
+        self.pipes = []
+        self.processes = []
+        for index in range(workers):
+            owned = {zone for zone, w in self.zone_workers.items() if w == index}
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(target=run_worker, args=(index, child, owned),
+                                           name=f"shard-{index}", daemon=True)
+            proc.start()
+            self.pipes.append(parent)
+            self.processes.append(proc)
+            self.outboxes.append(queue.Queue())
+
+    def worker_for(self, room_id):
+        zone = self.room_zones.get(room_id, self.room_zones.get("start", DEFAULT_ZONE))
+        return self.zone_workers.get(zone, 0)
+
+    def start(self):
+        # Gateway threads only ever queue messages for workers, so a worker that
+        # is slow to read its pipe can't stall a pump thread mid-send.
+        for index in range(len(self.pipes)):
+            threading.Thread(target=self.sender, args=(index,), name=f"shard-send-{index}", daemon=True).start()
+            threading.Thread(target=self.pump, args=(index,), name=f"shard-pump-{index}", daemon=True).start()
+        threading.Thread(target=self.saver, name="shard-saver", daemon=True).start()
+
+    def sender(self, index):
+        pipe, outbox = self.pipes[index], self.outboxes[index]
+        while True:
+            pipe.send(outbox.get())
+
+    def saver(self):
+        """Coalesces the character saves workers report into batched users.json writes."""
+        while True:
+            updates = [self.saves.get()]
+            while len(updates) < SAVE_BATCH:
+                try:
+                    updates.append(self.saves.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                UserManager.save_character_batch(updates)
+            except Exception as e:
+                print(f"[ERROR] Failed to save {len(updates)} character updates: {e}")
+
+    def submit(self, session, msg):
+        """Sends msg to the session's worker now, or queues it behind the one in flight."""
+        with self.lock:
+            if session.busy:
+                session.pending.append(msg)
+                return
+            self.dispatch(session, msg)
+
+    def dispatch(self, session, msg):
+        # Caller holds self.lock
+        if msg[0] == "detach":
+            self.sessions.pop(session.sid, None)
+        else:
+            session.busy = True
+        self.outboxes[session.worker].put(msg)
+
+    def complete(self, session):
+        with self.lock:
+            session.busy = False
+            if session.pending:
+                self.dispatch(session, session.pending.popleft())
+
+    def pump(self, index):
+        pipe = self.pipes[index]
+        while True:
+            try:
+                msg = pipe.recv()
+            except (EOFError, OSError):
+                print(f"[ERROR] Shard worker {index} exited")
+                return
+            kind = msg[0]
+            if kind == "save":
+                self.saves.put(msg[1:])
+                continue
+            if kind in ("presence", "chat"):
+                for other, outbox in enumerate(self.outboxes):
+                    if other != index:
+                        outbox.put(msg)
+                continue
+            session = self.sessions.get(msg[1])
+            if session is None:
+                continue
+            if kind == "push":
+                if not session.closed:
+                    try:
+                        session.conn.sendall(msg[2], PRIORITY_LOW)
+                        session.conn.flush()
+                        METRICS.inc("bytes_out_total", len(msg[2]))
+                    except OSError:
+                        pass
+            elif kind == "out":
+                if not session.closed:
+                    try:
+                        session.conn.sendall(msg[2])
+                        session.conn.flush()
+                        METRICS.inc("bytes_out_total", len(msg[2]))
+                    except OSError:
+                        pass
+                self.complete(session)
+            elif kind == "migrate":
+                _, sid, username, user_data, is_admin = msg
+                with self.lock:
+                    session.worker = self.worker_for(user_data["current_room_id"])
+                    self.outboxes[session.worker].put(("attach", sid, username, user_data, is_admin, None))
+                METRICS.inc("shard_migrations_total")
+
+    def handle_client(self, conn, addr):
+        print(f"[+] Connection from {addr}")
+        METRICS.gauge_add("sessions_active", 1)
+        session = None
+        try:
+            conn = open_connection(conn, game.MCCP_LEVEL)
+            username, user_data = UserManager.authenticate_or_create(conn)
+            if not username:
+                return
+            is_admin = UserManager.is_admin(username)
+            session = GatewaySession(next(self.sid_counter), conn, username)
+            session.worker = self.worker_for(user_data.get("current_room_id", "start"))
+            with self.lock:
+                self.sessions[session.sid] = session
+            self.submit(session, ("attach", session.sid, username, user_data, is_admin, "\r\nWelcome to the MUD!"))
+
+            buffer = ""
+            while True:
+                data = conn.recv(1024)
+                if not data:
+                    break
+                METRICS.inc("bytes_in_total", len(data))
+                buffer += data.decode(errors="ignore")
+                while "\n" in buffer:
+                    line, buffer = buffer.split("\n", 1)
+                    self.submit(session, ("line", session.sid, line.rstrip("\r")))
+        except OSError:
+            pass
+        except Exception as e:
+            print(f"[ERROR] Exception handling client {addr}: {e}")
+        finally:
+            if session:
+                session.closed = True
+                self.submit(session, ("detach", session.sid))
+            METRICS.gauge_add("sessions_active", -1)
+            try:
+                conn.close()
+            except OSError:
+                pass
+            print(f"[-] Connection closed: {addr}")
+
+    def serve(self, host, port):
+        self.start()
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.bind((host, port))
+            s.listen()
+            print(f"[*] MUD gateway listening on {host}:{port} with {len(self.processes)} shard workers")
+            while True:
+                conn, addr = s.accept()
+                threading.Thread(target=self.handle_client, args=(conn, addr), daemon=True).start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the MUD as a gateway plus zone-sharded worker processes")
+    parser.add_argument("--host", default=game.HOST)
+    parser.add_argument("--port", type=int, default=game.PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    # Workers are forked before the gateway starts any threads
+    gateway = Gateway(max(1, args.workers))
+    METRICS.start_exporter(game.METRICS_FILE, game.METRICS_INTERVAL)
+    gateway.serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,45 @@
 import socket
 import threading
-from server.core.user import UserManager
+import time
+from server.core import content, memory, profiler
+from server.core import player as player_module
+from server.core.channels import CHANNELS, GLOBAL_CHANNELS, clean_text
+from server.core.checkpoint import CHECKPOINTER
+from server.core.decay import FLOOR_DECAY
+from server.core.flyweight import CONTENT_POOL
+from server.core.loader import ContentLoader
+from server.core.metrics import METRICS
+from server.core.presence import PRESENCE, STATUS_LINKDEAD, STATUS_OFFLINE, presence_key
+from server.core.recorder import RECORDER
+from server.core.scheduler import SCHEDULER
+from server.core.session import LINKDEAD
+from server.core.spawn import MOB_FACTORY
+from server.core.telnet import PRIORITY_LOW
+from server.core.transport import open_connection
+from server.core.user import CHARACTER_SAVER, UserManager
 from server.core.player import Player
-from server.core.room import Room
+from server.core.room import DIRECTION_CODES, NO_EXIT, NOWHERE, ExitTable, Room
 from server.core.content import Mob, Item, ItemInstance
 
 HOST = "127.0.0.1"
 PORT = 4000
+WORLD_FILE = "server/data/world.json"
+
+# zlib level (0-9) for MCCP2 output compression; None stops the server offering it
+MCCP_LEVEL = 6
+
+# Metrics are exported as Prometheus text, or JSON if the path ends in .json
+METRICS_FILE = "server/metrics.prom"
+METRICS_INTERVAL = 15
 
 world = {}
 mobs = {}
 items = {}
+players = set()  # Player objects with a live connection
+
+# Character persistence hook; changes are batched into users.json every few
+# seconds, and shard workers point this back at the gateway
+save_character = CHARACTER_SAVER.mark_dirty
 
 COMMAND_ALIASES = {
     "l": "look",
@@ -19,7 +48,8 @@ COMMAND_ALIASES = {
     "c": "stats",
 }
 
-DIRECTIONS = {
+# Movement command -> direction code (see room.DIRECTIONS)
+DIRECTIONS = {command: DIRECTION_CODES[name] for command, name in {
     "n": "north", "north": "north",
     "s": "south", "south": "south",
     "e": "east", "east": "east",
@@ -30,14 +60,46 @@ DIRECTIONS = {
     "sw": "southwest", "southwest": "southwest",
     "u": "up", "up": "up",
     "d": "down", "down": "down"
-}
+}.items()}
+
+# Verbs that get their own latency histogram; anything else is recorded as "unknown"
+METRIC_VERBS = {"look", "stats", "inventory", "use", "drop", "take", "put", "inspect", "reload", "metrics", "profile", "mccp", "repopulate", "record", "memory", "say", "tell", "shout", "ooc", "mute", "unmute", "channel", "who", "finger"}
+
+# Scheduler token cost per verb; anything not listed costs 1
+VERB_COSTS = {"stats": 2, "inspect": 2, "metrics": 2, "profile": 5, "reload": 10, "repopulate": 10, "record": 10, "memory": 10}
 
+def command_verb(command):
+    if command in DIRECTIONS or command.startswith("go "):
+        return "move"
+    verb = command.split(" ", 1)[0]
+    if verb == "inv":
+        return "inventory"
+    return verb if verb in METRIC_VERBS else "unknown"
+
+def command_cost(msg):
+    command = msg.strip().lower()
+    return VERB_COSTS.get(command_verb(COMMAND_ALIASES.get(command, command)), 1)
+
+@METRICS.timed("world_load_seconds")
 def load_world():
     global world, mobs, items
-    try:
-        world = Room.load_rooms("server/data/world.json")
-    except Exception as e:
-        print(f"[ERROR] Failed to load world: {e}")
+    # Rooms changed in the world being replaced are saved before it goes
+    CHECKPOINTER.checkpoint()
+    # Every file is read and parsed at once; objects are then built in dependency order
+    loader = ContentLoader({"world": WORLD_FILE, "mobs": content.MOBS_FILE, "items": content.ITEMS_FILE,
+                            "classes": player_module.CLASSES_FILE, "races": player_module.RACES_FILE})
+    loader.parse()
+    # Start the pool afresh, or every reload would add the edited texts to the old ones;
+    # the world being replaced keeps the copies it already has
+    CONTENT_POOL.clear()
+    # Player rule data too, so the first login doesn't read it from disk
+    player_module.set_game_data(loader.build("classes", dict, {}), loader.build("races", dict, {}),
+                                loader.build("items", player_module.share_items, {}))
+    mobs = loader.build("mobs", Mob.build_mobs, {})
+    items = loader.build("items", Item.build_items, {})
+    world = loader.build("world", lambda data: Room.build_rooms(data, mobs, items), None)
+    if world is None:
+        print(f"[ERROR] Failed to load world from {WORLD_FILE}: {loader.files['world'].error}")
         world = {
             "start": Room(
                 "start",
@@ -46,190 +108,447 @@ def load_world():
                 {}
             )
         }
+        ExitTable(world)
 
     try:
-        mobs = Mob.load_mobs()
+        restored = CHECKPOINTER.restore(world, mobs, items)
+        if restored:
+            print(f"[*] Restored contents of {restored} rooms from checkpoint")
     except Exception as e:
-        print(f"[ERROR] Failed to load mobs: {e}")
-        mobs = {}
+        print(f"[ERROR] Failed to restore world checkpoint: {e}")
+    for line in loader.finish():
+        print(line)
 
-    try:
-        items = Item.load_items()
-    except Exception as e:
-        print(f"[ERROR] Failed to load items: {e}")
-        items = {}
+    # Sessions still stand in rooms of the world just replaced
+    for player in list(players):
+        player.room = world.get(player.room.id, world.get("start"))
+        CHANNELS.enter(player, player.room)
+        PRESENCE.moved(player)
 
-def handle_client(conn, addr):
-    print(f"[+] Connection from {addr}")
-    try:
-        username, user_data = UserManager.authenticate_or_create(conn)
-        if not username:
-            conn.close()
-            print(f"[-] Connection closed: {addr}")
+    # Old entries point at the rooms just replaced
+    FLOOR_DECAY.clear()
+    for room in world.values():
+        for item in room.item_instances:
+            if item.expires_at is not None:
+                FLOOR_DECAY.schedule(room, item, item.expires_at)
+
+def move(player, code, username, user_data):
+    """Moves the player through the exit in direction code; False if the room has no such exit."""
+    target = player.room.exit_to(code)
+    if target == NO_EXIT:
+        return False
+    if target == NOWHERE:
+        player.send_line("The exit leads nowhere.")
+        return True
+    player.room = target
+    CHANNELS.enter(player, target)
+    PRESENCE.moved(player)
+    player.look()
+    user_data["current_room_id"] = target.id
+    save_character(username, player.name, user_data)
+    return True
+
+def new_player(conn, username, user_data):
+    """A Player for a character coming into the game, built from its saved data."""
+    player = Player(conn, player_class_name=user_data.get("class", "Fighter"), name=user_data["name"])
+    player.account = username
+    player.level = user_data.get("level", player.level)
+    player.recalculate_all_stats(full_heal=True)
+    player.room = world.get(user_data.get("current_room_id", "start"), world.get("start"))
+    player.muted = set(user_data.get("muted", []))
+    player.load_inventory(user_data.get("inventory", []), items)
+    return player
+
+def chat(player, username, user_data, verb, args):
+    """say, tell, shout, ooc, mute, unmute and channel; args keeps the player's own case."""
+    if verb in ("mute", "unmute"):
+        name = args.lower()
+        if not name:
+            muted = ", ".join(sorted(player.muted)) or "no one"
+            player.send_line(f"You are ignoring {muted}.")
             return
+        if verb == "mute":
+            player.muted.add(name)
+            player.send_line(f"You will no longer hear {args}.")
+        else:
+            player.muted.discard(name)
+            player.send_line(f"You can hear {args} again.")
+        user_data["muted"] = sorted(player.muted)
+        save_character(username, player.name, user_data)
+        return
 
-        current_room_id = user_data.get("current_room_id", "start")
-        room = world.get(current_room_id, world.get("start"))
-        player = Player(user_data["name"], conn, room)
+    if verb == "channel":
+        parts = args.lower().split()
+        if len(parts) != 2 or parts[0] not in GLOBAL_CHANNELS or parts[1] not in ("on", "off"):
+            player.send_line(f"Use: channel <{' | '.join(GLOBAL_CHANNELS)}> <on | off>")
+            return
+        CHANNELS.subscribe(player, parts[0], parts[1] == "on")
+        off = set(user_data.get("channels_off", []))
+        if parts[1] == "on":
+            off.discard(parts[0])
+        else:
+            off.add(parts[0])
+        user_data["channels_off"] = sorted(off)
+        save_character(username, player.name, user_data)
+        player.send_line(f"Channel {parts[0]} is now {parts[1]}.")
+        return
 
-        # Load inventory
-        player.load_inventory(user_data.get("inventory", []), items)
+    if verb == "tell":
+        name, _, args = args.partition(" ")
+        targets = CHANNELS.find(name) if name else []
+        elsewhere = []
+        if name and CHANNELS.relay is not None:
+            # Characters on other shard workers are only known to the presence registry
+            here = {presence_key(target) for target in targets}
+            elsewhere = [(key, entry) for key, entry in PRESENCE.online(name) if key not in here]
+        text = clean_text(args)
+        if not text:
+            player.send_line("Tell whom what?")
+        elif not targets and not elsewhere:
+            player.send_line(f"No one called {name} is online.")
+        elif len(targets) + len(elsewhere) > 1:
+            shown = targets[0].name if targets else elsewhere[0][1].name
+            player.send_line(f"More than one {shown} is online, so tell can't pick one.")
+        elif targets:
+            target = targets[0]
+            CHANNELS.tell(target, player, f"{player.name} tells you, '{text}'")
+            player.send_line(f"You tell {target.name}, '{text}'")
+        else:
+            key, entry = elsewhere[0]
+            CHANNELS.tell_elsewhere(key, player, f"{player.name} tells you, '{text}'")
+            player.send_line(f"You tell {entry.name}, '{text}'")
+        return
 
-        player.send_line("\r\nWelcome to the MUD!")
-        player.look()
+    text = clean_text(args)
+    if not text:
+        player.send_line(f"{verb.capitalize()} what?")
+    elif verb == "say":
+        CHANNELS.say(player.room, player, f"{player.name} says, '{text}'")
+        player.send_line(f"You say, '{text}'")
+    elif not CHANNELS.subscribed(player, verb):
+        player.send_line(f"You have {verb} turned off; type 'channel {verb} on' to use it.")
+    elif verb == "shout":
+        CHANNELS.publish("shout", player, f"{player.name} shouts, '{text}'")
+        player.send_line(f"You shout, '{text}'")
+    else:
+        CHANNELS.publish("ooc", player, f"[OOC] {player.name}: {text}")
+        player.send_line(f"[OOC] You: {text}")
 
-        while True:
-            player.send("\r\n> ")
-            msg = player.read_line()
-            if msg is None:
-                user_data["current_room_id"] = player.room.id
-                user_data["inventory"] = player.save_inventory()
-                UserManager.save_character_data(username, player.name, user_data)
-                break
+def handle_command(player, username, user_data, is_admin, msg):
+    """Runs one line of player input for a logged-in session."""
+    command = msg.strip().lower()
+    if not command:
+        return
 
-            command = msg.strip().lower()
-            if not command:
-                continue
-
-            command = COMMAND_ALIASES.get(command, command)
-
-            responded = False
-
-            if command in DIRECTIONS:
-                dir = DIRECTIONS[command]
-                if dir in player.room.exits:
-                    new_room_id = player.room.exits[dir]
-                    if new_room_id in world:
-                        player.room = world[new_room_id]
-                        player.look()
-                        user_data["current_room_id"] = player.room.id
-                        UserManager.save_character_data(username, player.name, user_data)
-                    else:
-                        player.send_line("The exit leads nowhere.")
-                    responded = True
-                else:
-                    player.send_line("You can't go that way.")
-                    responded = True
-
-            elif command.startswith("go "):
-                dir = command[3:].strip()
-                dir = DIRECTIONS.get(dir)
-                if dir and dir in player.room.exits:
-                    new_room_id = player.room.exits[dir]
-                    if new_room_id in world:
-                        player.room = world[new_room_id]
-                        player.look()
-                        user_data["current_room_id"] = player.room.id
-                        UserManager.save_character_data(username, player.name, user_data)
-                    else:
-                        player.send_line("The exit leads nowhere.")
-                    responded = True
-                else:
-                    player.send_line("Unknown direction.")
-                    responded = True
+    command = COMMAND_ALIASES.get(command, command)
+    started = time.perf_counter()
+    verb = command_verb(command)
+    profiler.set_activity(verb)
 
-            elif command == "look":
-                player.look()
-                responded = True
+    responded = False
 
-            elif command == "stats":
-                stats = user_data.get("stats", {})
-                player.send_line(f"\r\n{user_data['name']} the {user_data.get('class', 'Adventurer')}")
-                player.send_line("-------------------------")
-                for key in ["HP", "Mana", "STR", "DEX", "INT", "CON", "WIS", "CHA"]:
-                    player.send_line(f"{key}: {stats.get(key, 0)}")
-                player.send_line("\r\nEquipment: (coming soon)")
-                player.send_line("Inventory: (coming soon)")
-                responded = True
+    if command in DIRECTIONS:
+        if not move(player, DIRECTIONS[command], username, user_data):
+            player.send_line("You can't go that way.")
+        responded = True
+
+    elif command.startswith("go "):
+        code = DIRECTIONS.get(command[3:].strip())
+        if code is None or not move(player, code, username, user_data):
+            player.send_line("Unknown direction.")
+        responded = True
 
-            elif command in ("inventory", "inv"):
-                player.list_inventory()
+    elif verb in ("say", "tell", "shout", "ooc", "mute", "unmute", "channel"):
+        parts = msg.strip().split(None, 1)
+        chat(player, username, user_data, verb, parts[1] if len(parts) > 1 else "")
+        responded = True
+
+    elif command == "who":
+        online = PRESENCE.snapshot()
+        lines = [f"{len(online)} in the game:"]
+        for entry in online:
+            status = " (linkdead)" if entry.status == STATUS_LINKDEAD else ""
+            lines.append(f"  {entry.name:<16} {entry.player_class:<12} level {entry.level:<3} {entry.room}{status}")
+        player.send_line("\r\n".join(lines))
+        responded = True
+
+    elif command.startswith("finger "):
+        name = command[7:].strip()
+        lines = []
+        for entry in PRESENCE.lookup(name):
+            since = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.since))
+            where = f"in {entry.room}" if entry.status != STATUS_OFFLINE else f"last seen in {entry.room}"
+            lines.append(f"{entry.name}, level {entry.level} {entry.player_class}: {entry.status} since {since}, {where}.")
+        if not lines:
+            for data in UserManager.find_characters(name):
+                lines.append(f"{data.get('name', name)}, level {data.get('level', 1)} {data.get('class', 'Fighter')}: offline.")
+        player.send_line("\r\n".join(lines) or f"There is no character called {name}.")
+        responded = True
+
+    elif command == "look":
+        player.look()
+        responded = True
+
+    elif command == "stats":
+        stats = user_data.get("stats", {})
+        player.send_line(f"\r\n{user_data['name']} the {user_data.get('class', 'Adventurer')}")
+        player.send_line("-------------------------")
+        for key in ["HP", "Mana", "STR", "DEX", "INT", "CON", "WIS", "CHA"]:
+            player.send_line(f"{key}: {stats.get(key, 0)}")
+        player.send_line("\r\nEquipment: (coming soon)")
+        player.send_line("Inventory: (coming soon)")
+        responded = True
+
+    elif command in ("inventory", "inv"):
+        player.list_inventory()
+        responded = True
+
+    elif command.startswith("use "):
+        item_name = command[4:].strip()
+        for inv_item in player.inventory:
+            if inv_item.item_blueprint.name.lower() == item_name:
+                if inv_item.use():
+                    player.send_line(f"You use the {inv_item.item_blueprint.name}.")
+                    if inv_item.quantity == 0:
+                        player.inventory.remove(inv_item)
+                else:
+                    player.send_line(f"You have no {item_name} left.")
                 responded = True
+                break
+        if not responded:
+            player.send_line(f"You don't have a {item_name}.")
+            responded = True
 
-            elif command.startswith("use "):
-                item_name = command[4:].strip()
-                for inv_item in player.inventory:
-                    if inv_item.item_blueprint.name.lower() == item_name:
-                        if inv_item.use():
-                            player.send_line(f"You use the {inv_item.item_blueprint.name}.")
-                            if inv_item.quantity == 0:
-                                player.inventory.remove(inv_item)
-                        else:
-                            player.send_line(f"You have no {item_name} left.")
+    elif command.startswith("drop "):
+        item_name = command[5:].strip()
+        for inv_item in player.inventory:
+            if inv_item.item_blueprint.name.lower() == item_name:
+                if inv_item.quantity > 0:
+                    stack = player.room.add_floor_item(ItemInstance(inv_item.item_blueprint, 1, FLOOR_DECAY.expiry()))
+                    if stack is None:
+                        player.send_line("There is no room to drop anything else here.")
                         responded = True
                         break
-                if not responded:
-                    player.send_line(f"You don't have a {item_name}.")
-                    responded = True
-
-            elif command.startswith("drop "):
-                item_name = command[5:].strip()
-                for inv_item in player.inventory:
-                    if inv_item.item_blueprint.name.lower() == item_name:
-                        if inv_item.quantity > 0:
-                            inv_item.quantity -= 1
-                            player.room.item_instances.append(
-                                ItemInstance(inv_item.item_blueprint, 1)
-                            )
-                            player.send_line(f"You drop the {inv_item.item_blueprint.name}.")
-                            if inv_item.quantity == 0:
-                                player.inventory.remove(inv_item)
-                        responded = True
-                        break
-                if not responded:
-                    player.send_line(f"You don't have a {item_name}.")
-                    responded = True
-
-            elif command.startswith("take "):
-                item_name = command[5:].strip().lower()
-                if " from " in item_name:
-                    item_part, container_part = item_name.split(" from ", 1)
-                    player.take_item_from_container(item_part.strip(), container_part.strip())
-                else:
-                    for item in player.room.item_instances:
-                        if item.item_blueprint.name.lower() == item_name:
-                            if item.quantity > 1:
-                                item.quantity -= 1
-                            else:
-                                player.room.item_instances.remove(item)
-                            player.add_item(ItemInstance(item.item_blueprint, 1))
-                            player.send_line(f"You pick up the {item.item_blueprint.name}.")
-                            break
-                    else:
-                        player.send_line(f"There is no {item_name} here.")
-                    responded = True
-
-            elif command.startswith("put "):
-                try:
-                    parts = command[4:].split(" in ", 1)
-                    if len(parts) == 2:
-                        item_name, container_name = parts
-                        player.put_item_into_container(item_name.strip(), container_name.strip())
-                    else:
-                        player.send_line("Use: put [item] in [container]")
-                except:
-                    player.send_line("Something went wrong putting the item in.")
+                    inv_item.quantity -= 1
+                    FLOOR_DECAY.schedule(player.room, stack)
+                    CHECKPOINTER.mark_dirty(player.room)
+                    player.send_line(f"You drop the {inv_item.item_blueprint.name}.")
+                    if inv_item.quantity == 0:
+                        player.inventory.remove(inv_item)
                 responded = True
+                break
+        if not responded:
+            player.send_line(f"You don't have a {item_name}.")
+            responded = True
 
-            elif command.startswith("inspect "):
-                container_name = command[8:].strip()
-                player.inspect_container(container_name)
-                responded = True
+    elif command.startswith("take "):
+        item_name = command[5:].strip().lower()
+        if " from " in item_name:
+            item_part, container_part = item_name.split(" from ", 1)
+            player.take_item_from_container(item_part.strip(), container_part.strip())
+        else:
+            room = player.room
+            with room.floor_lock:
+                taken = None
+                for item in room.item_instances:
+                    if item.item_blueprint.name.lower() == item_name:
+                        if item.quantity > 1:
+                            item.quantity -= 1
+                        else:
+                            room.item_instances.remove(item)
+                        taken = item.item_blueprint
+                        break
+            if taken:
+                CHECKPOINTER.mark_dirty(room)
+                player.add_item(ItemInstance(taken, 1))
+                player.send_line(f"You pick up the {taken.name}.")
+            else:
+                player.send_line(f"There is no {item_name} here.")
+            responded = True
 
-            elif command == "reload":
-                load_world()
-                player.send_line("World reloaded.")
-                responded = True
+    elif command.startswith("put "):
+        try:
+            parts = command[4:].split(" in ", 1)
+            if len(parts) == 2:
+                item_name, container_name = parts
+                player.put_item_into_container(item_name.strip(), container_name.strip())
+            else:
+                player.send_line("Use: put [item] in [container]")
+        except:
+            player.send_line("Something went wrong putting the item in.")
+        responded = True
+
+    elif command.startswith("inspect "):
+        container_name = command[8:].strip()
+        player.inspect_container(container_name)
+        responded = True
+
+    elif command == "mccp":
+        if hasattr(player.user, "compression_report"):
+            player.send_line(player.user.compression_report())
+        else:
+            player.send_line("Compression is not available on this connection.")
+        responded = True
+
+    elif command == "reload":
+        load_world()
+        player.send_line("World reloaded.")
+        responded = True
+
+    elif (command == "repopulate" or command.startswith("repopulate ")) and is_admin:
+        zone = command[11:].strip()
+        rooms = [room for room in world.values() if not zone or room.zone == zone]
+        if not rooms:
+            player.send_line(f"No rooms in zone '{zone}'.")
+        else:
+            spawned = MOB_FACTORY.populate(rooms)
+            for room in rooms:
+                CHECKPOINTER.mark_dirty(room)
+            player.send_line(f"Repopulated {len(rooms)} rooms with {spawned} mobs. {MOB_FACTORY.report()}")
+        responded = True
+
+    elif (command == "record" or command == "record stop") and is_admin:
+        if command == "record":
+            path = RECORDER.start()
+            player.send_line(f"Recording new sessions to {path}" if path else "A recording is already running.")
+        else:
+            path = RECORDER.stop()
+            player.send_line(f"Recording saved to {path}" if path else "No recording is running.")
+        responded = True
+
+    elif (command == "memory" or command.startswith("memory ")) and is_admin:
+        arg = command[7:].strip()
+        if arg == "":
+            lines = memory.report_lines(world, mobs, items, players, LINKDEAD)
+        elif arg == "trace":
+            memory.trace_start()
+            lines = ["Allocation tracing on; baseline taken. Use 'memory diff' to compare."]
+        elif arg == "diff":
+            lines = memory.trace_diff() or ["Not tracing; use 'memory trace' first."]
+        elif arg == "trace stop":
+            memory.trace_stop()
+            lines = ["Allocation tracing off."]
+        else:
+            lines = ["Use: memory [trace | diff | trace stop]"]
+        for line in lines:
+            player.send_line(line)
+        responded = True
+
+    elif command == "metrics" and is_admin:
+        for line in METRICS.report_lines():
+            player.send_line(line)
+        responded = True
+
+    elif (command == "profile" or command.startswith("profile ")) and is_admin:
+        arg = command[8:].strip()
+        if arg and (not arg.isdigit() or int(arg) < 1):
+            player.send_line("Use: profile [seconds], where seconds is 1 or more")
+        else:
+            run = profiler.start(int(arg) if arg else 10)
+            if run:
+                player.send_line(f"Profiling for {run.duration}s; output will be written to {run.path}")
+            else:
+                player.send_line("A profile is already running.")
+        responded = True
+
+    if not responded:
+        if command:  # avoid extra prompt for blank input
+            player.send_line("I don't understand that command.")
+
+    METRICS.observe("command_seconds", time.perf_counter() - started, verb)
+    profiler.clear_activity()
 
-            if not responded:
-                if command:  # avoid extra prompt for blank input
-                    player.send_line("I don't understand that command.")
+
+def handle_client(conn, addr):
+    print(f"[+] Connection from {addr}")
+    METRICS.gauge_add("sessions_active", 1)
+    commands = None
+    dropped = False
+    try:
+        conn = RECORDER.wrap(open_connection(conn, MCCP_LEVEL), addr)
+        resumed = []
+        def resume(token):
+            entry = LINKDEAD.reclaim_token(token)
+            if entry:
+                resumed.append(entry)
+                return entry.username, entry.user_data
+            return None
+
+        username, user_data = UserManager.authenticate_or_create(conn, resume)
+        if not username:
+            return
+        is_admin = UserManager.is_admin(username)
+
+        # A linkdead session for this character is reattached as-is, and a
+        # connected one is disconnected first and then reattached the same way
+        entry = resumed[0] if resumed else (LINKDEAD.reclaim(username, user_data["name"])
+                                            or LINKDEAD.take_over(username, user_data["name"]))
+        if entry:
+            player, user_data = entry.player, entry.user_data
+            player.user = conn
+            player.input_buffer = ""
+            # The world may have been reloaded while the session was linkdead
+            player.room = world.get(player.room.id, world.get("start"))
+            METRICS.inc("sessions_resumed_total")
+            player.send_line("\r\nReconnected.")
+        else:
+            player = new_player(conn, username, user_data)
+            player.send_line("\r\nWelcome to the MUD!")
+        token = LINKDEAD.new_token()
+        RECORDER.note(conn, "token", token)
+        player.send_line(f"Resume token: {token} (type RESUME {token} at the login prompt to reconnect)")
+        player.look()
+        player.prompt()
+
+        # This thread only reads; the scheduler runs the commands and sends each prompt
+        def execute(msg):
+            handle_command(player, username, user_data, is_admin, msg)
+            player.prompt()
+        commands = SCHEDULER.open(execute)
+        LINKDEAD.attach(username, player)
+        players.add(player)
+        CHANNELS.connect(player, player.room, user_data.get("channels_off", ()))
+        PRESENCE.update(player)
+
+        while True:
+            msg = player.read_line()
+            if msg is None:
+                dropped = True
+                break
+
+            if not SCHEDULER.submit(commands, msg, command_cost(msg)):
+                player.send_line("You are sending commands too quickly; that one was ignored.", PRIORITY_LOW)
 
     except Exception as e:
         print(f"[ERROR] Exception handling client {addr}: {e}")
         import traceback
         traceback.print_exc()
     finally:
+        if commands:
+            SCHEDULER.close(commands)
+            players.discard(player)
+            CHANNELS.disconnect(player)
+            if dropped:
+                PRESENCE.linkdead(player)
+                try:
+                    user_data["current_room_id"] = player.room.id
+                    user_data["inventory"] = player.save_inventory()
+                    save_character(username, player.name, user_data)
+                except Exception as e:
+                    print(f"[ERROR] Failed to save {username}/{player.name}: {e}")
+                # Last step: from here a RESUME or re-login can reclaim the player
+                LINKDEAD.park(username, user_data, player, token)
+                print(f"[-] {username}/{player.name} is linkdead")
+            else:
+                PRESENCE.remove(player)
+                LINKDEAD.detach(username, player)
+        RECORDER.note(conn, "close")
+        profiler.clear_activity()
+        METRICS.gauge_add("sessions_active", -1)
+        if getattr(conn, "compressor", None):
+            print(f"[*] {addr} {conn.compression_report()}")
+        if getattr(conn, "dropped", 0):
+            print(f"[*] {addr} {conn.queue_report()}")
         try:
             conn.close()
         except:
@@ -237,14 +556,28 @@ def handle_client(conn, addr):
         print(f"[-] Connection closed: {addr}")
 
 def main():
+    # Accounts load alongside the content, so the first login doesn't wait on users.json
+    users = threading.Thread(target=UserManager.accounts, name="users-preload", daemon=True)
+    users.start()
     load_world()
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind((HOST, PORT))
-        s.listen()
-        print(f"[*] MUD server listening on {HOST}:{PORT}")
-        while True:
-            conn, addr = s.accept()
-            threading.Thread(target=handle_client, args=(conn, addr), daemon=True).start()
+    users.join()
+    METRICS.start_exporter(METRICS_FILE, METRICS_INTERVAL)
+    LINKDEAD.start_sweeper()
+    CHECKPOINTER.start()
+    CHARACTER_SAVER.start()
+    FLOOR_DECAY.start()
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.bind((HOST, PORT))
+            s.listen()
+            print(f"[*] MUD server listening on {HOST}:{PORT}")
+            while True:
+                conn, addr = s.accept()
+                threading.Thread(target=handle_client, args=(conn, addr), daemon=True).start()
+    finally:
+        CHECKPOINTER.checkpoint()
+        CHARACTER_SAVER.flush()
 
 if __name__ == "__main__":
     main()
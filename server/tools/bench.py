@@ -0,0 +1,528 @@
+"""Microbenchmarks for the server's hot paths.
+
+Every case runs against generated fixtures at several data sizes, so the
+report shows how each path scales and not just its constant factor.
+
+    python -m server.tools.bench                      # all cases, default sizes
+    python -m server.tools.bench --filter inventory --json after.json
+    python -m server.tools.bench --compare before.json
+
+The "scale" column is the log-log slope of per-op time against size between
+neighbouring sizes: ~0 is constant, ~1 linear, ~2 quadratic.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+from server import main as server_main
+from server.core import content, user as user_module
+from server.core import player as player_module
+from server.core.channels import ChannelHub
+from server.core.checkpoint import Checkpointer
+from server.core.content import Item, Mob, ItemInstance, ContainerInstance
+from server.core.player import Player
+from server.core.room import Room
+from server.core.spawn import MobFactory
+from server.core.transport import MemoryConnection
+from server.core.user import UserManager
+
+CASES = []
+
+
+def case(name, sizes, quick_sizes=None, repeat=None):
+    """Registers fn(size, workdir) -> zero-argument callable that performs one operation."""
+    def register(fn):
+        CASES.append({"name": name, "sizes": sizes, "quick_sizes": quick_sizes or sizes[:2],
+                      "repeat": repeat, "setup": fn})
+        return fn
+    return register
+
+
+# --- Fixture generators ---
+
+def make_items_data(count):
+    data = {}
+    for i in range(count):
+        kind = i % 4
+        data[f"item{i}"] = {
+            "name": f"Item {i}",
+            "description": f"Generated item number {i}.",
+            "type": ["weapon", "armor", "container", "misc"][kind],
+            "weight": 0.5 + (i % 7),
+            "equip_slots": [Player.ALL_EQUIPMENT_SLOTS[i % len(Player.ALL_EQUIPMENT_SLOTS)]] if kind < 2 else [],
+            "container_capacity": 0,
+            "effects": {"bonus_stats": {"STR": i % 3}, "bonus_ac": i % 2, "bonus_hp": i % 5},
+            "properties": {"armor_type": "light", "base_ac_value": 11} if kind == 1 else {},
+        }
+    return data
+
+
+def make_mobs_data(count):
+    return {f"mob{i}": {"name": f"Mob {i}", "hp": 10 + i % 20, "attack": 1 + i % 5,
+                        "description": f"Generated mob number {i}."} for i in range(count)}
+
+
+def make_world_data(rooms, mob_ids, item_ids):
+    data = {}
+    for i in range(rooms):
+        exits = {"east": f"room{(i + 1) % rooms}", "west": f"room{(i - 1) % rooms}"}
+        data[f"room{i}"] = {
+            "name": f"Room {i}",
+            "description": "A generated room. The walls are generated, the floor is generated.",
+            "exits": exits,
+            "mobs": [{"id": mob_ids[i % len(mob_ids)], "quantity": 1 + i % 3}],
+            "items": [
+                {"item_id": item_ids[i % len(item_ids)], "quantity": 1 + i % 4},
+                {"item_id": item_ids[(i + 1) % len(item_ids)], "quantity": 1,
+                 "contents": [{"item_id": item_ids[(i + 2) % len(item_ids)], "quantity": 2}]},
+            ],
+        }
+    return data
+
+
+def make_registries(item_count=200, mob_count=50):
+    items = {}
+    for item_id, d in make_items_data(item_count).items():
+        items[item_id] = Item(item_id, d["name"], d["type"], d["effects"], d["description"],
+                              d["weight"], None, d["container_capacity"])
+    mobs = {mob_id: Mob(mob_id, d["name"], d["hp"], d["attack"], d["description"])
+            for mob_id, d in make_mobs_data(mob_count).items()}
+    return items, mobs
+
+
+def make_inventory(items, count):
+    blueprints = list(items.values())
+    inventory = []
+    for i in range(count):
+        if i % 10 == 9:
+            bag = ContainerInstance(blueprints[i % len(blueprints)], 1)
+            for j in range(5):
+                bag.add_item(ItemInstance(blueprints[(i + j + 1) % len(blueprints)], 1 + j))
+            inventory.append(bag)
+        else:
+            inventory.append(ItemInstance(blueprints[i % len(blueprints)], 1 + i % 3))
+    return inventory
+
+
+def make_users_data(accounts, password="pw"):
+    return {f"acct{i}": {"password": password, "characters": {f"char{i}": {
+        "name": f"char{i}", "current_room_id": "room0", "class": "Newbie",
+        "stats": {"HP": 20, "Mana": 10}, "inventory": []}}} for i in range(accounts)}
+
+
+def write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+    return path
+
+
+# --- Cases ---
+
+@case("room.load_rooms", [100, 1000, 10000], [100, 1000])
+def bench_load_rooms(size, workdir):
+    items, mobs = make_registries()
+    path = write_json(os.path.join(workdir, "world.json"), make_world_data(size, list(mobs), list(items)))
+    return lambda: Room.load_rooms(path, mobs, items)
+
+
+@case("room.checkpoint", [100, 1000, 10000], [100, 10000])
+def bench_checkpoint(size, workdir):
+    """Journals 10 dirty rooms out of a world of size rooms; should not grow with size."""
+    items, mobs = make_registries()
+    world = Room.load_rooms(write_json(os.path.join(workdir, "world.json"),
+                                       make_world_data(size, list(mobs), list(items))), mobs, items)
+    checkpointer = Checkpointer(os.path.join(workdir, "world_state.json"),
+                                os.path.join(workdir, "world_state.journal"))
+    dirty = list(world.values())[:10]
+    def run():
+        for room in dirty:
+            checkpointer.mark_dirty(room)
+        checkpointer.checkpoint()
+    return run
+
+
+def gc_profile(fn, factory, runs=20):
+    """Runs fn runs times; returns mob allocations and collector activity per run."""
+    pauses, started = [], []
+    def callback(phase, info):
+        if phase == "start":
+            started.append(time.perf_counter())
+        elif started:
+            pauses.append(time.perf_counter() - started.pop())
+    created = factory.created
+    gc.callbacks.append(callback)
+    try:
+        for _ in range(runs):
+            fn()
+    finally:
+        gc.callbacks.remove(callback)
+    return {"mob_allocs": (factory.created - created) // runs,
+            "gc_runs": round(len(pauses) / runs, 2),
+            "gc_pause_us": round(sum(pauses) / runs * 1e6, 1)}
+
+
+def make_repopulate(size, workdir, pool_limit):
+    items, mobs = make_registries()
+    world = Room.load_rooms(write_json(os.path.join(workdir, "world.json"),
+                                       make_world_data(size, list(mobs), list(items))), mobs, items)
+    for room in world.values():
+        room.mob_spawns = room.mob_spawns * 4  # a few mob types per room
+    factory = MobFactory(pool_limit)
+    factory.populate(world.values())
+    run = lambda: factory.populate(world.values())
+    run.extra = gc_profile(run, factory)
+    return run
+
+
+@case("mob.repopulate", [100, 1000, 10000], [100, 10000])
+def bench_repopulate(size, workdir):
+    """Respawns every mob in a world of size rooms, recycling the previous instances."""
+    return make_repopulate(size, workdir, 10 ** 9)
+
+
+@case("mob.repopulate_unpooled", [100, 1000, 10000], [100, 10000])
+def bench_repopulate_unpooled(size, workdir):
+    """As mob.repopulate with recycling turned off, for comparison."""
+    return make_repopulate(size, workdir, 0)
+
+
+@case("item.load_items", [100, 1000, 10000], [100, 1000])
+def bench_load_items(size, workdir):
+    path = write_json(os.path.join(workdir, "items.json"), make_items_data(size))
+    def run():
+        content.ITEMS_FILE = path
+        return Item.load_items()
+    return run
+
+
+@case("mob.load_mobs", [100, 1000, 10000], [100, 1000])
+def bench_load_mobs(size, workdir):
+    path = write_json(os.path.join(workdir, "mobs.json"), make_mobs_data(size))
+    def run():
+        content.MOBS_FILE = path
+        return Mob.load_mobs()
+    return run
+
+
+def legacy_inventory_data(inventory):
+    """The original nested {"item_id", "quantity", "contents"} save format."""
+    def serialize_item(inst):
+        data = {"item_id": inst.item_blueprint.id, "quantity": inst.quantity}
+        if hasattr(inst, "contents"):
+            data["contents"] = [serialize_item(i) for i in inst.contents]
+        return data
+    return [serialize_item(item) for item in inventory]
+
+
+def encoded_size(data):
+    return len(json.dumps(data, separators=(",", ":")))
+
+
+@case("user.serialize_inventory", [10, 100, 1000, 10000], [10, 1000])
+def bench_serialize_inventory(size, workdir):
+    items, _ = make_registries()
+    inventory = make_inventory(items, size)
+    run = lambda: UserManager.serialize_inventory(inventory)
+    run.extra = {"bytes": encoded_size(run()), "legacy_bytes": encoded_size(legacy_inventory_data(inventory))}
+    return run
+
+
+@case("user.deserialize_inventory", [10, 100, 1000, 10000], [10, 1000])
+def bench_deserialize_inventory(size, workdir):
+    items, _ = make_registries()
+    data = UserManager.serialize_inventory(make_inventory(items, size))
+    return lambda: UserManager.deserialize_inventory(data, items)
+
+
+@case("user.deserialize_inventory_legacy", [10, 100, 1000, 10000], [10, 1000])
+def bench_deserialize_inventory_legacy(size, workdir):
+    items, _ = make_registries()
+    data = legacy_inventory_data(make_inventory(items, size))
+    return lambda: UserManager.deserialize_inventory(data, items)
+
+
+@case("user.save_character_data", [10, 100, 1000, 10000], [10, 1000])
+def bench_save_character_data(size, workdir):
+    path = write_json(os.path.join(workdir, "users.json"), make_users_data(size))
+    update = {"current_room_id": "room1", "inventory": []}
+    user_module.USERS_FILE = path
+    UserManager.reload_users()
+    return lambda: UserManager.save_character_data("acct0", "char0", update)
+
+
+@case("user.login_storm", [1, 8, 32], [1, 8], repeat=1)
+def bench_login_storm(size, workdir):
+    """size simultaneous logins against a 10k-account users.json; one op is the whole storm."""
+    password_hash = UserManager.hash_password("pw")
+    user_module.USERS_FILE = write_json(os.path.join(workdir, "users.json"),
+                                        make_users_data(10000, password_hash))
+    UserManager.reload_users()
+
+    def login(i, results):
+        client, server_end = socket.socketpair()
+        server = threading.Thread(target=lambda: results.append(UserManager.authenticate_or_create(server_end)))
+        server.start()
+        buffer = b""
+        for line, marker in ((None, b"create one:"), (f"acct{i}", b"password:"), ("pw", None)):
+            if line:
+                client.sendall(line.encode() + b"\r\n")
+            while marker and marker not in buffer:
+                buffer += client.recv(4096)
+            if marker:
+                buffer = buffer.split(marker, 1)[1]
+        server.join()
+        client.close()
+        server_end.close()
+
+    def run():
+        results = []
+        threads = [threading.Thread(target=login, args=(i, results)) for i in range(size)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(results) == size and all(r[0] for r in results)
+    return run
+
+
+@case("container.add_item", [10, 100, 1000, 10000], [10, 1000])
+def bench_container_add_item(size, workdir):
+    bag_blueprint = Item("bag", "Bag", "container", {}, "", 1.0, None, 10 ** 9)
+    bag = ContainerInstance(bag_blueprint)
+    for i in range(size):
+        bag.contents.append(ItemInstance(Item(f"b{i}", f"B {i}", "misc", {}, "", 0.1), 1))
+    extra = Item("extra", "Extra", "misc", {}, "", 0.1)
+    def run():
+        bag.add_item(ItemInstance(extra, 1))  # not stackable: scans capacity and contents, then appends
+        bag.contents.pop()
+    return run
+
+
+def make_equipped_player(size):
+    player_module.load_game_data()
+    with contextlib.redirect_stdout(io.StringIO()):
+        p = Player(None, "Fighter", "Dwarf")
+    gear = make_items_data(size * 4)
+    for slot, item_data in zip(Player.ALL_EQUIPMENT_SLOTS, list(gear.values())[:size]):
+        p.equipment[slot] = item_data
+    return p
+
+
+@case("player.recalculate_all_stats", [0, 5, 15], [0, 15])
+def bench_recalculate_all_stats(size, workdir):
+    p = make_equipped_player(size)
+    return lambda: p.recalculate_all_stats()
+
+
+@case("player.display_sheet", [0, 5, 15], [0, 15])
+def bench_display_sheet(size, workdir):
+    p = make_equipped_player(size)
+    p.recalculate_all_stats()
+    return p.display_sheet
+
+
+@case("chat.shout", [100, 1000, 10000], [100, 10000])
+def bench_chat_shout(size, workdir):
+    """One shout delivered to size subscribers, from publish() until every connection has it queued."""
+    hub = ChannelHub()
+    room = Room("hall", "Hall", "", {})
+    discard = lambda data: None
+    with contextlib.redirect_stdout(io.StringIO()):
+        listeners = [Player(MemoryConnection(discard), name=f"listener{i}") for i in range(size)]
+    for listener in listeners:
+        hub.connect(listener, room)
+    sender = listeners[0]
+    def run():
+        hub.publish("shout", sender, f"{sender.name} shouts, 'Is anyone there?'")
+        hub.wait_idle()
+    return run
+
+
+HARNESSES = []
+
+
+class DispatchHarness:
+    """Runs handle_client on one end of a socketpair and drives it line by line."""
+
+    def __init__(self, workdir, world, items, accounts):
+        self.users_path = write_json(os.path.join(workdir, "users.json"), make_users_data(accounts))
+        user_module.USERS_FILE = self.users_path
+        UserManager.reload_users()
+        server_main.world = world
+        server_main.items = items
+        # Measure dispatch cost, not the per-session rate limit
+        server_main.SCHEDULER.limited = False
+        self.client, server_end = socket.socketpair()
+        self.thread = threading.Thread(target=self.serve, args=(server_end,), daemon=True)
+        self.thread.start()
+        self.buffer = b""
+        self.until(b"create one:")
+        self.command("acct0", b"password:")
+        self.command("pw")
+
+    @staticmethod
+    def serve(conn):
+        with contextlib.redirect_stdout(io.StringIO()):
+            server_main.handle_client(conn, ("bench", 0))
+
+    def until(self, marker):
+        while marker not in self.buffer:
+            self.buffer += self.client.recv(65536)
+        _, self.buffer = self.buffer.split(marker, 1)
+
+    def command(self, line, marker=b"\r\n> "):
+        self.client.sendall(line.encode() + b"\r\n")
+        self.until(marker)
+
+    def close(self):
+        self.client.close()
+        self.thread.join(5)
+
+
+@case("main.dispatch_look_take_drop", [1, 100, 1000], [1, 1000])
+def bench_dispatch_floor(size, workdir):
+    items, mobs = make_registries()
+    world = Room.load_rooms(write_json(os.path.join(workdir, "world.json"),
+                                       make_world_data(2, list(mobs), list(items))), mobs, items)
+    floor = world["room0"].item_instances
+    floor.extend(ItemInstance(items[f"item{i % len(items)}"], 1) for i in range(size))
+    target = floor[-1].item_blueprint.name.lower()
+    harness = DispatchHarness(workdir, world, items, 10)
+    HARNESSES.append(harness)
+    def run():
+        harness.command("look")
+        harness.command(f"take {target}")
+        harness.command(f"drop {target}")
+        harness.command("inventory")
+    return run
+
+
+@case("main.dispatch_move", [10, 1000, 10000], [10, 1000])
+def bench_dispatch_move(size, workdir):
+    items, mobs = make_registries()
+    world = Room.load_rooms(write_json(os.path.join(workdir, "world.json"),
+                                       make_world_data(100, list(mobs), list(items))), mobs, items)
+    harness = DispatchHarness(workdir, world, items, size)
+    HARNESSES.append(harness)
+    def run():
+        harness.command("east")
+        harness.command("west")
+    return run
+
+
+# --- Runner ---
+
+def measure(fn, repeat, min_time):
+    timer = timeit.Timer(fn)
+    number, elapsed = 1, timer.timeit(1)
+    if elapsed < min_time:
+        number = max(1, int(min_time / max(elapsed, 1e-9)))
+    times = timer.repeat(repeat, number)
+    per_op = sorted(t / number for t in times)
+    return {"number": number, "best": per_op[0], "median": per_op[len(per_op) // 2]}
+
+
+def run_cases(name_filter, quick, repeat, min_time):
+    saved = (content.ITEMS_FILE, content.MOBS_FILE, user_module.USERS_FILE,
+             server_main.world, server_main.items, server_main.SCHEDULER.limited)
+    results = []
+    try:
+        for spec in CASES:
+            if name_filter and name_filter not in spec["name"]:
+                continue
+            previous = None
+            for size in (spec["quick_sizes"] if quick else spec["sizes"]):
+                workdir = tempfile.mkdtemp(prefix="mud-bench-")
+                try:
+                    fn = spec["setup"](size, workdir)
+                    timing = measure(fn, spec["repeat"] or repeat, min_time)
+                finally:
+                    while HARNESSES:
+                        HARNESSES.pop().close()
+                    shutil.rmtree(workdir, ignore_errors=True)
+                scale = None
+                if previous and previous["size"] > 0 and size > previous["size"]:
+                    scale = (math.log(timing["median"] / previous["median"])
+                             / math.log(size / previous["size"]))
+                result = {"case": spec["name"], "size": size, **timing, "scale": scale,
+                          **getattr(fn, "extra", {})}
+                results.append(result)
+                previous = result
+                print_result(result)
+    finally:
+        (content.ITEMS_FILE, content.MOBS_FILE, user_module.USERS_FILE,
+         server_main.world, server_main.items, server_main.SCHEDULER.limited) = saved
+        UserManager.reload_users()
+    return results
+
+
+RESULT_FIELDS = {"case", "size", "number", "best", "median", "scale"}
+
+
+def format_seconds(seconds):
+    for unit, factor in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= factor:
+            return f"{seconds / factor:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def print_result(result, baseline=None):
+    scale = f"{result['scale']:.2f}" if result["scale"] is not None else "-"
+    line = (f"{result['case']:<32} {result['size']:>7} {format_seconds(result['median']):>10} "
+            f"{format_seconds(result['best']):>10} {scale:>6}")
+    if baseline:
+        line += f" {result['median'] / baseline['median']:>6.2f}x"
+    extra = {k: v for k, v in result.items() if k not in RESULT_FIELDS}
+    if extra:
+        line += "  " + " ".join(f"{k}={v}" for k, v in extra.items())
+    print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Server hot-path microbenchmarks")
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="smallest and largest quick sizes only")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per timing batch")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="print median ratios against an earlier --json run")
+    parser.add_argument("--list", action="store_true", help="list cases and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for spec in CASES:
+            print(f"{spec['name']:<32} sizes={spec['sizes']}")
+        return 0
+
+    print(f"{'case':<32} {'size':>7} {'median':>10} {'best':>10} {'scale':>6}")
+    results = run_cases(args.filter, args.quick, args.repeat, args.min_time)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {(r["case"], r["size"]): r for r in json.load(f)["results"]}
+        print(f"\nAgainst {args.compare}:")
+        for result in results:
+            print_result(result, baseline.get((result["case"], result["size"])))
+
+    if args.json:
+        meta = {"python": sys.version.split()[0], "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        with open(args.json, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
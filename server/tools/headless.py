@@ -0,0 +1,232 @@
+"""Headless simulation: thousands of virtual sessions in one process, with no sockets.
+
+    python -m server.tools.headless --sessions 2000 --commands 50
+    python -m server.tools.headless --sessions 500 --duration 10 --profile
+
+Every session is the real handle_client running on a MemoryConnection,
+driven by a bot with server.tools.loadgen's command mix. A bot sends its
+next command as soon as the previous prompt arrives, so the run measures
+the game logic itself (login, dispatch, scheduling, output formatting)
+without network or syscall costs, and faster than real time.
+
+The run works in a scratch copy of server/data holding --sessions
+pre-created accounts. Their passwords are hashed with one PBKDF2 iteration
+(and PASSWORD_ITERATIONS is lowered to match), so a login costs a lookup
+rather than a deliberate 200k-round hash. Character saves, which happen on
+every move, are collected and written once at the end. All sessions log in
+before any command is sent, and the two phases are reported separately.
+--profile samples every thread during the command phase and writes a
+collapsed-stack file to server/profiles.
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from server import main as server_main
+from server.core import profiler
+from server.core import user as user_module
+from server.core.scheduler import SCHEDULER
+from server.core.transport import MemoryConnection
+from server.core.user import UserManager
+from server.tools.loadgen import ACCOUNT_PROMPT, BOT_PASSWORD, DEFAULT_MIX, PROMPT, Bot, parse_mix, percentile
+
+PASSWORD_PROMPT = "Enter your password:"
+# Each session runs handle_client on its own thread; keep their stacks small
+THREAD_STACK_SIZE = 256 * 1024
+# Seconds without any session making progress before the run is abandoned
+STALL_TIMEOUT = 30.0
+
+
+class VirtualBot(Bot):
+    """A loadgen bot whose connection is a MemoryConnection in this process."""
+
+    def __init__(self, account, mix, rng, events):
+        super().__init__(None, None, account, False, mix, 0, rng)
+        self.events = events
+        self.conn = MemoryConnection(self.receive)
+        self.marker = ACCOUNT_PROMPT
+        self.sent_at = None
+        self.commands = 0
+        self.thread = threading.Thread(target=self.serve, name=f"session-{account}", daemon=True)
+
+    def serve(self):
+        try:
+            server_main.handle_client(self.conn, ("headless", self.account))
+        finally:
+            self.conn.finish()
+
+    def receive(self, data):
+        # Called on the server thread that produced the output
+        self.text_bytes += len(data)
+        self.buffer += data.decode(errors="ignore")
+        if self.buffer.endswith(self.marker) or self.buffer.rstrip().endswith(self.marker):
+            self.events.put(self)
+
+    def send(self, line, marker=PROMPT):
+        self.marker = marker
+        self.buffer = ""
+        self.sent_at = time.perf_counter()
+        self.conn.feed((line + "\r\n").encode())
+
+
+def make_accounts(count):
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", BOT_PASSWORD.encode(), salt, 1)
+    password = f"{user_module.PASSWORD_SCHEME}$1${salt.hex()}${digest.hex()}"
+    return {f"bot{i}": {"password": password, "characters": {f"bot{i}": {
+        "name": f"bot{i}", "current_room_id": "start", "class": "Newbie",
+        "stats": {"HP": 20, "Mana": 10}, "inventory": []}}} for i in range(count)}
+
+
+def simulate(args, profile_dir):
+    events = queue.Queue()
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    bots = [VirtualBot(f"bot{i}", mix, random.Random(rng.random()), events) for i in range(args.sessions)]
+
+    previous_stack = threading.stack_size(THREAD_STACK_SIZE)
+    try:
+        started = time.perf_counter()
+        for bot in bots:
+            bot.thread.start()
+    finally:
+        threading.stack_size(previous_stack)
+
+    logged_in = []
+    finished = 0
+    commands_started = stop_at = run = None
+    cpu_started = 0.0
+    while finished < len(bots):
+        try:
+            bot = events.get(timeout=STALL_TIMEOUT)
+        except queue.Empty:
+            raise RuntimeError(f"no session made progress for {STALL_TIMEOUT}s "
+                               f"({len(logged_in)} logged in, {finished} finished)")
+        now = time.perf_counter()
+        if bot.marker == ACCOUNT_PROMPT:
+            bot.send(bot.account, PASSWORD_PROMPT)
+        elif bot.marker == PASSWORD_PROMPT:
+            bot.send(BOT_PASSWORD)
+        elif bot.login_time is None:
+            bot.login_time = now - started
+            bot.observe(bot.buffer)
+            logged_in.append(bot)
+            if len(logged_in) == len(bots):
+                # Everyone is in; start the command phase for all of them at once
+                login_elapsed = now - started
+                if args.profile:
+                    run = profiler.SamplingProfiler(profiler.MAX_DURATION, output_dir=profile_dir)
+                    run.thread.start()
+                commands_started = time.perf_counter()
+                cpu_started = time.process_time()
+                stop_at = commands_started + args.duration if args.duration else None
+                for waiting in logged_in:
+                    waiting.send(waiting.next_command())
+        else:
+            bot.latencies.append(now - bot.sent_at)
+            bot.commands += 1
+            bot.observe(bot.buffer)
+            if (stop_at and now >= stop_at) or (not stop_at and bot.commands >= args.commands):
+                finished += 1
+            else:
+                bot.send(bot.next_command())
+    elapsed = time.perf_counter() - commands_started
+    cpu = time.process_time() - cpu_started
+    if run:
+        run.stop()
+
+    for bot in bots:
+        bot.conn.hang_up()
+    for bot in bots:
+        bot.thread.join(STALL_TIMEOUT)
+    SCHEDULER.wait_idle(STALL_TIMEOUT)
+
+    latencies = sorted(latency for bot in bots for latency in bot.latencies)
+    logins = sorted(bot.login_time for bot in bots)
+    commands = len(latencies)
+    return {"sessions": len(bots), "login_seconds": login_elapsed,
+            "logins_per_second": len(bots) / login_elapsed if login_elapsed else 0.0,
+            "login_p50_ms": percentile(logins, 50) * 1000,
+            "commands": commands, "command_seconds": elapsed,
+            "commands_per_second": commands / elapsed if elapsed else 0.0,
+            "cpu_us_per_command": cpu / commands * 1e6 if commands else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000, "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "output_bytes": sum(bot.text_bytes for bot in bots),
+            "profile": run.path if run else None}
+
+
+def run(args):
+    repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    profile_dir = os.path.abspath(profiler.PROFILE_DIR)
+    workdir = tempfile.mkdtemp(prefix="mud-headless-")
+    cwd = os.getcwd()
+    saved = (server_main.save_character, user_module.PASSWORD_ITERATIONS, SCHEDULER.limited)
+    saves = {}  # (account, character) -> latest data
+    # Server output goes to stdout; keep it out of the report unless asked
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        shutil.copytree(os.path.join(repo_root, "server", "data"), os.path.join(workdir, "server", "data"))
+        os.chdir(workdir)
+        for name in ("world_state.json", "world_state.journal"):
+            if os.path.exists(os.path.join("server", "data", name)):
+                os.remove(os.path.join("server", "data", name))
+        with open(user_module.USERS_FILE, "w") as f:
+            json.dump(make_accounts(args.sessions), f)
+        user_module.PASSWORD_ITERATIONS = 1
+        server_main.save_character = lambda account, name, data: saves.__setitem__((account, name), dict(data))
+        SCHEDULER.limited = args.throttle
+        with quiet:
+            UserManager.reload_users()
+            server_main.load_world()
+            result = simulate(args, profile_dir)
+            started = time.perf_counter()
+            UserManager.save_character_batch([(a, n, d) for (a, n), d in saves.items()])
+            result["save_seconds"] = time.perf_counter() - started
+    finally:
+        os.chdir(cwd)
+        server_main.save_character, user_module.PASSWORD_ITERATIONS, SCHEDULER.limited = saved
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run virtual sessions against an in-process server, no sockets")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--commands", type=int, default=20, help="commands per session")
+    parser.add_argument("--duration", type=float, default=0.0, help="run the command phase for this many seconds instead")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="verb=weight list (move, look, inventory, take, drop, stats)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--throttle", action="store_true", help="keep per-session rate limits")
+    parser.add_argument("--profile", action="store_true", help="sample stacks during the command phase")
+    parser.add_argument("--verbose", action="store_true", help="show server output")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    print(f"{result['sessions']} sessions logged in in {result['login_seconds']:.2f}s "
+          f"({result['logins_per_second']:.0f}/s, p50 {result['login_p50_ms']:.1f} ms)")
+    print(f"{result['commands']} commands in {result['command_seconds']:.2f}s: "
+          f"{result['commands_per_second']:.0f} cmd/s, {result['cpu_us_per_command']:.0f} us CPU/cmd, "
+          f"p50 {result['p50_ms']:.2f} ms p95 {result['p95_ms']:.2f} ms p99 {result['p99_ms']:.2f} ms")
+    print(f"{result['output_bytes']} bytes of output; final character save {result['save_seconds'] * 1000:.0f} ms")
+    if result["profile"]:
+        print(f"Profile: {result['profile']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "result": result}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
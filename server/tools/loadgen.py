@@ -0,0 +1,357 @@
+"""Headless bot load generator for the telnet server.
+
+Opens N simulated sessions against a server on localhost, logs each one in
+through authenticate_or_create (a mix of NEW and existing accounts), then
+drives a weighted mix of movement, look, inventory, take/drop and stats.
+Throughput and command-to-prompt latency percentiles are reported for each
+concurrency stage.
+
+    python -m server.tools.loadgen --spawn --sessions 10,50,100 --duration 20
+
+--spawn starts server.main in a scratch copy of server/data so bot accounts
+never touch the real users.json; add --workers N to spawn the zone-sharded
+server.gateway instead. Without --spawn, a server must already be listening
+on --host/--port. A spawned server runs without per-session rate limits
+unless --throttle is given, since bots with no think time exceed them.
+
+--flood N adds N bots that paste bursts of commands without waiting for
+prompts. They are left out of the latency figures, so the report shows
+what they cost everyone else. "fairness" is Jain's index over per-bot
+command counts (1.0 = every bot got the same share).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+PROMPT = "\r\n> "
+ACCOUNT_PROMPT = "type NEW to create one:"
+BOT_PASSWORD = "botpass"
+
+DEFAULT_MIX = "move=40,look=20,inventory=10,take=10,drop=5,stats=15"
+FLOOD_BURST = 50
+FLOOD_INTERVAL = 0.1
+DEFAULT_ITEM = "simple sword"
+
+EXITS_RE = re.compile(r"Exits: (.*)")
+ITEMS_RE = re.compile(r"Items here: (.*)")
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+
+# MCCP2 (telnet option 86) offer, acceptance, and start-of-stream marker
+WILL_COMPRESS2 = bytes([255, 251, 86])
+DO_COMPRESS2 = bytes([255, 253, 86])
+START_COMPRESS2 = bytes([255, 250, 86, 255, 240])
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        verb, _, weight = part.partition("=")
+        mix[verb.strip()] = float(weight)
+    return mix
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Bot:
+    def __init__(self, host, port, account, new_account, mix, think, rng, compress=False):
+        self.host = host
+        self.port = port
+        self.account = account
+        self.new_account = new_account
+        self.verbs = list(mix)
+        self.weights = list(mix.values())
+        self.think = think
+        self.rng = rng
+        self.buffer = ""
+        self.exits = []
+        self.floor_items = []
+        self.carried = []
+        self.latencies = []
+        self.errors = 0
+        self.login_time = None
+        self.compress = compress
+        self.inflate = None
+        self.wire_bytes = 0
+        self.text_bytes = 0
+
+    async def expect(self, marker, timeout=10):
+        while marker not in self.buffer:
+            data = await asyncio.wait_for(self.reader.read(4096), timeout)
+            if not data:
+                raise ConnectionError("server closed the connection")
+            self.buffer += self.feed(data)
+        output, self.buffer = self.buffer.split(marker, 1)
+        return output
+
+    def feed(self, data):
+        """Decodes server output, accepting MCCP2 if enabled and inflating once it starts."""
+        self.wire_bytes += len(data)
+        if self.inflate:
+            data = self.inflate.decompress(data)
+        else:
+            if WILL_COMPRESS2 in data:
+                data = data.replace(WILL_COMPRESS2, b"")
+                if self.compress:
+                    self.writer.write(DO_COMPRESS2)
+            if START_COMPRESS2 in data:
+                data, compressed = data.split(START_COMPRESS2, 1)
+                self.inflate = zlib.decompressobj()
+                data += self.inflate.decompress(compressed)
+        self.text_bytes += len(data)
+        return data.decode(errors="ignore")
+
+    async def send(self, line):
+        self.writer.write((line + "\r\n").encode())
+        await self.writer.drain()
+
+    async def login(self):
+        started = time.perf_counter()
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        await self.expect(ACCOUNT_PROMPT)
+        if self.new_account:
+            steps = [("NEW", "Choose a new account name:"), (self.account, "Enter a password:"),
+                     (BOT_PASSWORD, "Confirm password:"), (BOT_PASSWORD, "Choose a character name:"),
+                     (self.account, None)]
+        else:
+            steps = [(self.account, "Enter your password:"), (BOT_PASSWORD, None)]
+        for line, marker in steps:
+            await self.send(line)
+            if marker:
+                await self.expect(marker)
+        self.observe(await self.expect(PROMPT))
+        self.login_time = time.perf_counter() - started
+
+    def observe(self, output):
+        output = ANSI_RE.sub("", output)
+        match = EXITS_RE.search(output)
+        if match:
+            self.exits = [] if match.group(1).strip() == "none" else [e.strip() for e in match.group(1).split(",")]
+            items = ITEMS_RE.search(output)
+            self.floor_items = ([i.rsplit(" x", 1)[0].lower() for i in items.group(1).split(", ")]
+                                if items else [])
+
+    def next_command(self):
+        verb = self.rng.choices(self.verbs, self.weights)[0]
+        if verb == "move":
+            return self.rng.choice(self.exits) if self.exits else "look"
+        if verb == "take":
+            name = self.rng.choice(self.floor_items) if self.floor_items else DEFAULT_ITEM
+            self.carried.append(name)
+            return f"take {name}"
+        if verb == "drop":
+            return f"drop {self.carried.pop() if self.carried else DEFAULT_ITEM}"
+        return verb
+
+    async def run(self, stop_at):
+        while time.perf_counter() < stop_at:
+            command = self.next_command()
+            started = time.perf_counter()
+            await self.send(command)
+            self.observe(await self.expect(PROMPT))
+            self.latencies.append(time.perf_counter() - started)
+            if self.think:
+                await asyncio.sleep(self.rng.expovariate(1 / self.think))
+
+    async def close(self):
+        try:
+            self.writer.close()
+            await self.writer.wait_closed()
+        except (OSError, AttributeError):
+            pass
+
+
+class FloodBot(Bot):
+    """Pastes bursts of look commands without waiting for prompts, like a spamming client."""
+
+    prompts = 0
+
+    async def run(self, stop_at):
+        async def discard_output():
+            while True:
+                data = await self.reader.read(65536)
+                if not data:
+                    return
+                self.prompts += self.feed(data).count(PROMPT)
+
+        reader = asyncio.ensure_future(discard_output())
+        try:
+            while time.perf_counter() < stop_at:
+                self.writer.write(("look\r\n" * FLOOD_BURST).encode())
+                await self.writer.drain()
+                await asyncio.sleep(FLOOD_INTERVAL)
+        finally:
+            reader.cancel()
+
+
+def jain_index(values):
+    total = sum(values)
+    squares = sum(v * v for v in values)
+    return total * total / (len(values) * squares) if squares else 0.0
+
+
+async def register_accounts(args, names):
+    """Creates the accounts that 'existing' bots will log into; returns those that succeeded."""
+    registered = []
+    for name in names:
+        bot = Bot(args.host, args.port, name, True, {"look": 1}, 0, random.Random())
+        try:
+            await bot.login()
+            registered.append(name)
+        except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+            print(f"[ERROR] Could not register {name}: {e!r}")
+        finally:
+            await bot.close()
+    return registered
+
+
+async def run_stage(args, sessions, mix, existing, run_id, stage):
+    rng = random.Random(args.seed)
+    bots = []
+    for i in range(sessions):
+        new_account = not existing or rng.random() < args.new_ratio
+        account = f"bot{run_id}s{stage}n{i}" if new_account else existing[i % len(existing)]
+        bots.append(Bot(args.host, args.port, account, new_account, mix, args.think / 1000,
+                        random.Random(rng.random()), args.compress))
+    flooders = [FloodBot(args.host, args.port, f"bot{run_id}s{stage}f{i}", True, mix, 0,
+                         random.Random(rng.random()), args.compress) for i in range(args.flood)]
+
+    async def drive(bot, stop_at):
+        try:
+            await bot.login()
+            await bot.run(stop_at)
+        except (OSError, ConnectionError, asyncio.TimeoutError):
+            bot.errors += 1
+        finally:
+            await bot.close()
+
+    started = time.perf_counter()
+    stop_at = started + args.duration
+    await asyncio.gather(*(drive(bot, stop_at) for bot in bots + flooders))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(l for bot in bots for l in bot.latencies)
+    logins = sorted(bot.login_time for bot in bots if bot.login_time is not None)
+    bot_p99s = [percentile(sorted(bot.latencies), 99) for bot in bots if bot.latencies]
+    return {
+        "sessions": sessions,
+        "commands": len(latencies),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "login_p50_ms": percentile(logins, 50) * 1000,
+        "login_p99_ms": percentile(logins, 99) * 1000,
+        "errors": sum(bot.errors for bot in bots),
+        "wire_bytes": sum(bot.wire_bytes for bot in bots),
+        "text_bytes": sum(bot.text_bytes for bot in bots),
+        "fairness": jain_index([len(bot.latencies) for bot in bots]),
+        "worst_bot_p99_ms": max(bot_p99s, default=0.0) * 1000,
+        "flood_commands": sum(bot.prompts for bot in flooders),
+    }
+
+
+def spawn_server(args):
+    """Runs server.main (or server.gateway) from a scratch directory holding a copy of server/data."""
+    repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    workdir = tempfile.mkdtemp(prefix="mud-loadgen-")
+    shutil.copytree(os.path.join(repo_root, "server", "data"), os.path.join(workdir, "server", "data"))
+    env = dict(os.environ, PYTHONPATH=repo_root)
+    launch = f"import server.main as m; m.HOST = {args.host!r}; m.PORT = {args.port}; m.main()"
+    if not args.throttle:
+        launch = "import server.core.scheduler as s; s.SCHEDULER.limited = False; " + launch
+    if args.workers:
+        launch = (f"import server.gateway as g; "
+                  f"g.main(['--host', {args.host!r}, '--port', '{args.port}', '--workers', '{args.workers}'])")
+    proc = subprocess.Popen([sys.executable, "-c", launch], cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL if args.quiet_server else None)
+    deadline = time.time() + 10
+    while time.time() < deadline and proc.poll() is None:
+        try:
+            asyncio.run(asyncio.wait_for(asyncio.open_connection(args.host, args.port), 1))
+            return proc, workdir
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("spawned server did not start listening")
+
+
+def print_results(results):
+    print(f"{'sessions':>8} {'cmds':>8} {'cmd/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'worst p99':>10} {'fairness':>8} {'login p50':>10} {'errors':>7} "
+          f"{'wire KB':>9} {'ratio':>6}")
+    for r in results:
+        ratio = r["text_bytes"] / r["wire_bytes"] if r["wire_bytes"] else 0.0
+        print(f"{r['sessions']:>8} {r['commands']:>8} {r['throughput']:>9.1f} {r['p50_ms']:>8.2f} "
+              f"{r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['worst_bot_p99_ms']:>10.2f} {r['fairness']:>8.3f} "
+              f"{r['login_p50_ms']:>10.2f} {r['errors']:>7} "
+              f"{r['wire_bytes'] / 1024:>9.1f} {ratio:>6.2f}")
+
+
+async def run(args):
+    mix = parse_mix(args.mix)
+    run_id = int(time.time())
+    stages = [int(s) for s in args.sessions.split(",")]
+    existing = await register_accounts(args, [f"bot{run_id}e{i}" for i in range(args.accounts)])
+    results = []
+    for stage, sessions in enumerate(stages):
+        result = await run_stage(args, sessions, mix, existing, run_id, stage)
+        results.append(result)
+        print(f"[*] {sessions} sessions: {result['throughput']:.1f} cmd/s, p99 {result['p99_ms']:.2f} ms"
+              + (f", {result['flood_commands']} flood commands served" if args.flood else ""))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Telnet bot load generator (localhost only)")
+    parser.add_argument("--host", default="127.0.0.1", choices=["127.0.0.1", "localhost", "::1"])
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--sessions", default="10,50,100", help="comma-separated concurrency stages")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per stage")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="verb=weight list (move, look, inventory, take, drop, stats)")
+    parser.add_argument("--think", type=float, default=0.0, help="mean think time between commands, ms")
+    parser.add_argument("--accounts", type=int, default=20, help="existing accounts to register before the run")
+    parser.add_argument("--new-ratio", type=float, default=0.2, help="fraction of bots that log in via NEW")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--compress", action="store_true", help="accept MCCP2 compression from the server")
+    parser.add_argument("--spawn", action="store_true", help="start a throwaway server for the run")
+    parser.add_argument("--quiet-server", action="store_true", help="discard spawned server output")
+    parser.add_argument("--throttle", action="store_true", help="keep the spawned server's per-session rate limits")
+    parser.add_argument("--flood", type=int, default=0, help="extra bots that paste command bursts without waiting")
+    parser.add_argument("--workers", type=int, default=0, help="with --spawn, run server.gateway with this many shard workers")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    proc = workdir = None
+    if args.spawn:
+        proc, workdir = spawn_server(args)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"mix": parse_mix(args.mix), "think_ms": args.think, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Memory report for the world, content and players, from outside the server.
+
+    python -m server.tools.memreport                     # the world in server/data as loaded
+    python -m server.tools.memreport --sessions 500      # after a headless run
+    python -m server.tools.memreport --sessions 500 --rounds 3 --trace
+    python -m server.tools.memreport --generate 50000     # what content sharing saves
+
+Prints the same report as the admin "memory" command. Without --sessions it
+loads server/data read-only. With --sessions it runs server.tools.headless
+--rounds times instead. --trace takes a tracemalloc baseline after the first
+round and prints what grew by the last one, so anything that keeps growing
+round after round (floor stacks, linkdead players, caches) stands out.
+
+--generate writes a world of that many rooms from server.tools.bench's
+fixtures, loads it with the content pool off and then on, and compares the
+deep size of the loaded content.
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+from server import main as server_main
+from server.core import memory
+from server.core import player as player_module
+from server.core.checkpoint import CHECKPOINTER
+from server.core.content import Item, Mob
+from server.core.flyweight import CONTENT_POOL
+from server.core.room import Room
+from server.core.session import LINKDEAD
+from server.tools import bench, headless
+from server.tools.loadgen import DEFAULT_MIX
+
+
+def content_size(workdir):
+    """Loads the generated content the way the server does; returns (objects, bytes) reachable.
+
+    The pool's own tables are counted too, so the comparison includes what sharing costs.
+    """
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            mobs = Mob.load_mobs()
+            items = Item.load_items()
+            player_module.load_game_data()
+            world = Room.load_rooms(os.path.join("server", "data", "world.json"), mobs, items)
+    finally:
+        os.chdir(cwd)
+    footprint = memory.Footprint()
+    objects = size = 0
+    for root in (mobs, items, player_module.ITEMS_DATA, world, CONTENT_POOL.texts, CONTENT_POOL.effect_sets):
+        counted = footprint.measure(root)
+        objects += counted[0]
+        size += counted[1]
+    return objects, size
+
+
+def compare_generated(rooms):
+    workdir = tempfile.mkdtemp(prefix="mud-memreport-")
+    enabled = CONTENT_POOL.enabled
+    try:
+        data_dir = os.path.join(workdir, "server", "data")
+        os.makedirs(data_dir)
+        items_data = bench.make_items_data(200)
+        mobs_data = bench.make_mobs_data(50)
+        bench.write_json(os.path.join(data_dir, "items.json"), items_data)
+        bench.write_json(os.path.join(data_dir, "mobs.json"), mobs_data)
+        bench.write_json(os.path.join(data_dir, "world.json"), bench.make_world_data(rooms, list(mobs_data), list(items_data)))
+        results = []
+        for pooled in (False, True):
+            CONTENT_POOL.clear()
+            CONTENT_POOL.enabled = pooled
+            results.append(content_size(workdir))
+        print(f"{rooms} rooms, {len(items_data)} items, {len(mobs_data)} mobs:")
+        for label, (objects, size) in zip(("unshared", "shared"), results):
+            print(f"  {label:<10} {objects:>9} objects {memory.format_bytes(size):>10}")
+        saved = results[0][1] - results[1][1]
+        print(f"  saved      {results[0][0] - results[1][0]:>9} objects {memory.format_bytes(saved):>10} "
+              f"({saved / results[0][1]:.0%})")
+        print(f"  {CONTENT_POOL.report()}")
+    finally:
+        CONTENT_POOL.enabled = enabled
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-subsystem memory report for the MUD server")
+    parser.add_argument("--sessions", type=int, default=0, help="populate with a headless run of this many sessions")
+    parser.add_argument("--commands", type=int, default=20, help="commands per session in each round")
+    parser.add_argument("--rounds", type=int, default=2, help="headless rounds to run")
+    parser.add_argument("--trace", action="store_true", help="diff tracemalloc snapshots between the first and last round")
+    parser.add_argument("--generate", type=int, metavar="ROOMS", help="compare generated content loaded with and without sharing")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        compare_generated(args.generate)
+        return 0
+
+    if args.trace:
+        memory.trace_start()
+    if args.sessions:
+        run_args = argparse.Namespace(sessions=args.sessions, commands=args.commands, duration=0.0, mix=DEFAULT_MIX,
+                                      seed=None, throttle=False, profile=False, verbose=False)
+        for round_number in range(max(1, args.rounds)):
+            result = headless.run(run_args)
+            print(f"round {round_number + 1}: {result['commands']} commands, "
+                  f"{result['commands_per_second']:.0f} cmd/s")
+            if args.trace and round_number == 0:
+                memory.trace_start()
+    else:
+        CHECKPOINTER.read_only = True
+        with contextlib.redirect_stdout(io.StringIO()):
+            server_main.load_world()
+
+    for line in memory.report_lines(server_main.world, server_main.mobs, server_main.items,
+                                    server_main.players, LINKDEAD):
+        print(line)
+    if args.trace:
+        for line in memory.trace_diff() or []:
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
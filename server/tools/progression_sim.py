@@ -0,0 +1,286 @@
+"""Offline batch simulator for character progression.
+
+Applies the same rules as server.core.player.Player (doubling next_level_xp,
+hit die + CON modifier, proficiency bonus, racial traits and gear bonuses) to
+whole populations at once with NumPy arrays, and reports HP, AC and level
+distributions against time played.
+
+    python -m server.tools.progression_sim --characters 1000000 --hours 24
+    python -m server.tools.progression_sim --check
+
+--check runs the conformance check against the scalar Player implementation.
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import sys
+
+import numpy as np
+
+from server.core import player as player_rules
+from server.core.player import Player
+
+STAT_KEYS = ["STR", "DEX", "CON", "INT", "WIS", "CHA"]
+STAT_CAP = 50
+START_NEXT_LEVEL_XP = 300
+
+# Upper bounds of each proficiency band, mirroring Player.calculate_proficiency_bonus
+PROFICIENCY_LEVELS = np.array([5, 9, 13, 17, 21, 25, 30, 40, 50, 60, 70, 80, 90])
+
+ARMOR_NONE, ARMOR_LIGHT, ARMOR_MEDIUM, ARMOR_HEAVY = 0, 1, 2, 3
+ARMOR_CODES = {"light": ARMOR_LIGHT, "medium": ARMOR_MEDIUM, "heavy": ARMOR_HEAVY}
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+class RuleTables:
+    """Per-class, per-race and per-loadout constants the vectorized rules index into."""
+
+    def __init__(self, classes_data, races_data, loadouts):
+        self.classes_data = classes_data
+        self.races_data = races_data
+        self.class_names = list(classes_data) or ["Fighter"]
+        self.race_names = list(races_data) or ["Human"]
+        self.loadouts = loadouts
+        self.assignments = [dict(zip(STAT_KEYS, perm))
+                            for perm in itertools.permutations(Player.STANDARD_ARRAY)]
+
+        self.has_class = np.array([bool(classes_data.get(c)) for c in self.class_names])
+        self.hit_die = np.array([(classes_data.get(c) or {}).get("hit_die", 6) for c in self.class_names])
+
+        self.race_asi = np.zeros((len(self.race_names), len(STAT_KEYS)), dtype=np.int64)
+        self.toughness = np.zeros(len(self.race_names), dtype=np.int64)
+        for r, race in enumerate(self.race_names):
+            race_data = races_data.get(race) or {}
+            for s, stat in enumerate(STAT_KEYS):
+                self.race_asi[r, s] = race_data.get("ability_score_increase", {}).get(stat, 0)
+            if any(t.get("name") == "Dwarven Toughness" for t in race_data.get("traits", [])):
+                self.toughness[r] = 1
+
+        self.base_stats = np.array([[a[stat] for stat in STAT_KEYS] for a in self.assignments])
+
+        n = len(loadouts)
+        self.gear_stats = np.zeros((n, len(STAT_KEYS)), dtype=np.int64)
+        self.gear_hp = np.zeros(n, dtype=np.int64)
+        self.gear_ac = np.zeros(n, dtype=np.int64)
+        self.armor_type = np.zeros(n, dtype=np.int64)
+        self.armor_base = np.zeros(n, dtype=np.int64)
+        self.armor_dex_cap = np.zeros(n, dtype=np.int64)
+        for i, equipment in enumerate(loadouts):
+            for item_data in equipment.values():
+                if not item_data:
+                    continue
+                effects = item_data.get("effects", {})
+                for s, stat in enumerate(STAT_KEYS):
+                    self.gear_stats[i, s] += effects.get("bonus_stats", {}).get(stat, 0)
+                self.gear_hp[i] += effects.get("bonus_hp", 0)
+                self.gear_ac[i] += effects.get("bonus_ac", 0)
+            chest = equipment.get(Player.EQUIPMENT_SLOT_CHEST)
+            if chest:
+                props = chest.get("properties", {})
+                self.armor_type[i] = ARMOR_CODES.get(props.get("armor_type"), ARMOR_NONE)
+                self.armor_base[i] = props.get("base_ac_value", 0)
+                self.armor_dex_cap[i] = props.get("dex_cap_bonus", 2)
+
+
+def build_loadouts(items_data, count, rng, equip_chance=0.5):
+    """Random gear sets drawn from items that declare equip_slots, keyed by Player slot."""
+    by_slot = {slot: [] for slot in Player.ALL_EQUIPMENT_SLOTS}
+    for item_data in items_data.values():
+        slots = item_data.get("equip_slots", [])
+        if isinstance(slots, str):
+            slots = [slots]
+        for slot in slots:
+            if slot in by_slot:
+                by_slot[slot].append(item_data)
+    loadouts = [{}]  # always include the naked character
+    for _ in range(count - 1):
+        equipment = {}
+        for slot, candidates in by_slot.items():
+            if candidates and rng.random() < equip_chance:
+                equipment[slot] = candidates[rng.integers(len(candidates))]
+        loadouts.append(equipment)
+    return loadouts
+
+
+class Population:
+    """Struct-of-arrays view of N characters sharing one RuleTables."""
+
+    def __init__(self, rules, class_idx, race_idx, assignment_idx, loadout_idx):
+        self.rules = rules
+        self.class_idx = class_idx
+        self.race_idx = race_idx
+        self.assignment_idx = assignment_idx
+        self.loadout_idx = loadout_idx
+        self.level = np.ones(len(class_idx), dtype=np.int64)
+        self.xp = np.zeros(len(class_idx), dtype=np.int64)
+        self.next_level_xp = np.full(len(class_idx), START_NEXT_LEVEL_XP, dtype=np.int64)
+
+        # Ability scores never change with level, so modifiers are computed once
+        scores = (rules.base_stats[assignment_idx] + rules.race_asi[race_idx]
+                  + rules.gear_stats[loadout_idx])
+        modifiers = (np.minimum(scores, STAT_CAP) - 10) // 2
+        self.con_mod = modifiers[:, STAT_KEYS.index("CON")]
+        self.dex_mod = modifiers[:, STAT_KEYS.index("DEX")]
+
+    @classmethod
+    def random(cls, rules, size, rng):
+        return cls(rules,
+                   rng.integers(len(rules.class_names), size=size),
+                   rng.integers(len(rules.race_names), size=size),
+                   rng.integers(len(rules.assignments), size=size),
+                   rng.integers(len(rules.loadouts), size=size))
+
+    def add_xp(self, amount):
+        # Player.add_xp levels up at most once per call, whatever the amount
+        self.xp += amount
+        leveled = self.xp >= self.next_level_xp
+        self.level[leveled] += 1
+        self.next_level_xp[leveled] *= 2
+        return leveled
+
+    def proficiency_bonus(self):
+        return 2 + np.searchsorted(PROFICIENCY_LEVELS, self.level, side="right")
+
+    def max_hp(self):
+        rules = self.rules
+        if not rules.classes_data:
+            return 10 + self.con_mod
+        hit_die = rules.hit_die[self.class_idx]
+        hp_per_level = np.maximum(1, (hit_die + 1) // 2 + self.con_mod)
+        hp = hit_die + self.con_mod + hp_per_level * (self.level - 1)
+        hp += rules.toughness[self.race_idx] * self.level + rules.gear_hp[self.loadout_idx]
+        hp = np.maximum(1, hp)
+        return np.where(rules.has_class[self.class_idx], hp, 10 + self.con_mod)
+
+    def ac(self):
+        rules = self.rules
+        armor = rules.armor_type[self.loadout_idx]
+        base = rules.armor_base[self.loadout_idx]
+        ac = np.select(
+            [armor == ARMOR_LIGHT, armor == ARMOR_MEDIUM, armor == ARMOR_HEAVY],
+            [base + self.dex_mod,
+             base + np.minimum(self.dex_mod, rules.armor_dex_cap[self.loadout_idx]),
+             base],
+            default=10 + self.dex_mod)
+        return ac + rules.gear_ac[self.loadout_idx]
+
+
+def distribution(values):
+    pct = np.percentile(values, PERCENTILES)
+    summary = {f"p{p}": float(v) for p, v in zip(PERCENTILES, pct)}
+    summary["mean"] = float(values.mean())
+    return summary
+
+
+def simulate(population, rng, seconds, step, samples, xp_per_second, xp_spread):
+    """Advance the population in `step`-second ticks and snapshot `samples` times."""
+    size = len(population.level)
+    rates = xp_per_second * rng.lognormal(0.0, xp_spread, size=size) / np.exp(xp_spread ** 2 / 2)
+    ticks = int(seconds // step)
+    sample_ticks = set(np.linspace(0, ticks, samples, dtype=np.int64).tolist())
+    report = []
+    for tick in range(ticks + 1):
+        if tick:
+            population.add_xp(rng.poisson(rates * step))
+        if tick in sample_ticks:
+            levels, counts = np.unique(population.level, return_counts=True)
+            report.append({
+                "seconds": tick * step,
+                "level": distribution(population.level),
+                "level_histogram": {int(l): int(c) for l, c in zip(levels, counts)},
+                "hp": distribution(population.max_hp()),
+                "ac": distribution(population.ac()),
+            })
+    return report
+
+
+def load_rule_tables(loadout_count, rng):
+    player_rules.load_game_data()
+    loadouts = build_loadouts(player_rules.ITEMS_DATA, loadout_count, rng)
+    return RuleTables(player_rules.CLASSES_DATA, player_rules.RACES_DATA, loadouts)
+
+
+def conformance_check(characters=200, ticks=40, seed=1):
+    """Replays identical XP grants through Player and Population; returns mismatch strings."""
+    rng = np.random.default_rng(seed)
+    rules = load_rule_tables(16, rng)
+    population = Population.random(rules, characters, rng)
+    grants = rng.poisson(250, size=(ticks, characters))
+
+    scalar = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(characters):
+            p = Player(None, rules.class_names[population.class_idx[i]],
+                       rules.race_names[population.race_idx[i]], name=f"sim{i}")
+            p.assign_standard_array(rules.assignments[population.assignment_idx[i]])
+            p.equipment.update(rules.loadouts[population.loadout_idx[i]])
+            p.recalculate_all_stats(full_heal=True)
+            scalar.append(p)
+
+        mismatches = []
+        for tick in range(ticks + 1):
+            if tick:
+                population.add_xp(grants[tick - 1])
+                for i, p in enumerate(scalar):
+                    p.add_xp(int(grants[tick - 1, i]))
+            vector = {
+                "level": population.level, "xp": population.xp,
+                "next_level_xp": population.next_level_xp, "max_hp": population.max_hp(),
+                "ac": population.ac(), "proficiency_bonus": population.proficiency_bonus(),
+            }
+            for i, p in enumerate(scalar):
+                for field, values in vector.items():
+                    if getattr(p, field) != values[i]:
+                        mismatches.append(f"tick {tick} char {i} {field}: "
+                                          f"Player={getattr(p, field)} sim={values[i]}")
+    return mismatches
+
+
+def print_report(report):
+    print(f"{'time':>8} {'lvl p50':>8} {'lvl p95':>8} {'hp p5':>7} {'hp p50':>7} "
+          f"{'hp p95':>7} {'ac p5':>6} {'ac p50':>6} {'ac p95':>6}")
+    for row in report:
+        hours = row["seconds"] / 3600
+        print(f"{hours:>7.1f}h {row['level']['p50']:>8.0f} {row['level']['p95']:>8.0f} "
+              f"{row['hp']['p5']:>7.0f} {row['hp']['p50']:>7.0f} {row['hp']['p95']:>7.0f} "
+              f"{row['ac']['p5']:>6.0f} {row['ac']['p50']:>6.0f} {row['ac']['p95']:>6.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch character progression simulator")
+    parser.add_argument("--characters", type=int, default=100000)
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--step", type=float, default=60.0, help="seconds per XP grant")
+    parser.add_argument("--samples", type=int, default=13)
+    parser.add_argument("--xp-per-second", type=float, default=1.0)
+    parser.add_argument("--xp-spread", type=float, default=0.5, help="lognormal sigma of player XP rates")
+    parser.add_argument("--loadouts", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", metavar="PATH", help="write the full report as JSON")
+    parser.add_argument("--check", action="store_true", help="run the conformance check against Player")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        mismatches = conformance_check()
+        for line in mismatches[:20]:
+            print(line)
+        print(f"[*] Conformance: {'FAIL' if mismatches else 'OK'} ({len(mismatches)} mismatches)")
+        return 1 if mismatches else 0
+
+    rng = np.random.default_rng(args.seed)
+    rules = load_rule_tables(args.loadouts, rng)
+    population = Population.random(rules, args.characters, rng)
+    report = simulate(population, rng, args.hours * 3600, args.step, args.samples,
+                      args.xp_per_second, args.xp_spread)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"characters": args.characters, "step": args.step, "report": report}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
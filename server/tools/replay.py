@@ -0,0 +1,228 @@
+"""Replays a session recording against an in-process server.
+
+    python -m server.tools.replay server/recordings/20260101-120000.jsonl
+    python -m server.tools.replay rec.jsonl --realtime
+    python -m server.tools.replay rec.jsonl --json after.json --compare before.json
+
+Recordings come from the admin "record" command (see server/core/recorder.py).
+The data files captured when the recording started are restored into a
+scratch directory, the world is loaded from them and each recorded
+connection is driven through handle_client on a MemoryConnection.
+
+Passwords are not recorded: every restored account gets REPLAY_PASSWORD,
+and it is typed wherever the recording has a "secret" line. A wrong
+password in the recording therefore replays as the right one.
+
+Events run one at a time in recorded order. After each input the replay
+waits until that session is blocked reading again and the command scheduler
+is idle, so every run sees the same interleaving and produces the same
+output. By default the events run back to back; --realtime keeps the
+recorded gaps between them. Each session's output is hashed with resume
+tokens masked out. --compare lists sessions whose hash differs from an
+earlier --json run and exits with status 1 if any do.
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from server import main as server_main
+from server.core import user as user_module
+from server.core.channels import CHANNELS
+from server.core.recorder import ACCOUNTS_FILE
+from server.core.scheduler import SCHEDULER
+from server.core.transport import MemoryConnection
+from server.core.user import CHARACTER_SAVER, UserManager
+
+TOKEN = re.compile(rb"Resume token: (\S+) \(type RESUME \1")
+# Seconds to wait for one event before giving up on the replay
+EVENT_TIMEOUT = 30.0
+# Password of every account restored from a recording
+REPLAY_PASSWORD = "replay"
+
+
+class ReplaySession:
+    def __init__(self, sid, addr):
+        self.sid = sid
+        self.conn = MemoryConnection()
+        self.inputs = 0
+        self.thread = threading.Thread(target=self.run, args=(addr,), name=f"replay-{sid}", daemon=True)
+
+    def run(self, addr):
+        try:
+            server_main.handle_client(self.conn, addr)
+        finally:
+            self.conn.finish()
+
+    def result(self):
+        output = TOKEN.sub(b"Resume token: * (type RESUME *", self.conn.data())
+        return {"inputs": self.inputs, "output_bytes": len(output),
+                "sha256": hashlib.sha256(output).hexdigest()}
+
+
+def read_recording(path):
+    with open(path, "r") as f:
+        header = json.loads(f.readline())
+        events = [json.loads(line) for line in f if line.strip()]
+    return header, events
+
+
+def restore_files(header, workdir):
+    for path, text in header["files"].items():
+        if path == ACCOUNTS_FILE and header.get("version", 1) >= 2:
+            text = restore_accounts(text)
+        target = os.path.join(workdir, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "w") as f:
+            f.write(text)
+
+
+def restore_accounts(text):
+    """The scrubbed users.json from a recording, with REPLAY_PASSWORD on every account."""
+    accounts = json.loads(text)
+    password = UserManager.hash_password(REPLAY_PASSWORD)
+    for account in accounts.values():
+        account["password"] = password
+    return json.dumps(accounts, indent=2)
+
+
+def settle(session):
+    """Waits until the session is waiting for input again and no command or chat is pending."""
+    if not session.conn.wait_reading(EVENT_TIMEOUT):
+        raise RuntimeError(f"session {session.sid} did not go back to reading input")
+    if not SCHEDULER.wait_idle(EVENT_TIMEOUT):
+        raise RuntimeError("command scheduler did not go idle")
+    if not CHANNELS.wait_idle(EVENT_TIMEOUT):
+        raise RuntimeError("chat messages were not delivered")
+
+
+def replay(events, realtime=False):
+    sessions = {}
+    tokens = {}  # token issued during recording -> token issued in this replay
+    started = time.perf_counter()
+    for event in events:
+        if realtime:
+            delay = started + event["t"] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        kind, sid = event["e"], event["s"]
+        if kind == "open":
+            session = sessions[sid] = ReplaySession(sid, ("replay", sid))
+            session.thread.start()
+            settle(session)
+            continue
+        session = sessions.get(sid)
+        if session is None:
+            continue
+        if kind == "in":
+            data = event["d"]
+            if "RESUME" in data:
+                for old, new in tokens.items():
+                    data = data.replace(old, new)
+            session.inputs += 1
+            session.conn.feed(data.encode("latin-1"))
+            settle(session)
+        elif kind == "secret":
+            # The password was cut from the front; a chunk with nothing left was all password
+            if event["d"]:
+                session.inputs += 1
+                session.conn.feed((REPLAY_PASSWORD + event["d"]).encode("latin-1"))
+                settle(session)
+        elif kind == "token":
+            issued = TOKEN.findall(session.conn.data())
+            if issued:
+                tokens[event["d"]] = issued[-1].decode()
+        elif kind == "close":
+            session.conn.hang_up()
+            session.thread.join(EVENT_TIMEOUT)
+            SCHEDULER.wait_idle(EVENT_TIMEOUT)
+    for session in sessions.values():
+        if not session.conn.finished:
+            session.conn.hang_up()
+            session.thread.join(EVENT_TIMEOUT)
+    elapsed = time.perf_counter() - started
+    return sessions, elapsed
+
+
+def run(path, realtime=False, verbose=False):
+    header, events = read_recording(path)
+    workdir = tempfile.mkdtemp(prefix="mud-replay-")
+    cwd = os.getcwd()
+    limited = SCHEDULER.limited
+    iterations = user_module.PASSWORD_ITERATIONS
+    # Server output goes to stdout; keep it out of the report unless asked
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        # Replay passwords guard nothing, so logins skip the key stretching
+        user_module.PASSWORD_ITERATIONS = 1
+        restore_files(header, workdir)
+        os.chdir(workdir)
+        # The recorded sessions already kept to the rate limit once; replays run flat out
+        SCHEDULER.limited = False
+        with quiet:
+            UserManager.reload_users()
+            server_main.load_world()
+            sessions, elapsed = replay(events, realtime)
+    finally:
+        # Saves still pending belong in the scratch copy of users.json
+        CHARACTER_SAVER.flush()
+        os.chdir(cwd)
+        SCHEDULER.limited = limited
+        user_module.PASSWORD_ITERATIONS = iterations
+        shutil.rmtree(workdir, ignore_errors=True)
+    inputs = sum(session.inputs for session in sessions.values())
+    combined = hashlib.sha256("".join(s.result()["sha256"] for _, s in sorted(sessions.items())).encode())
+    return {"recording": path, "events": len(events), "inputs": inputs, "elapsed": elapsed,
+            "inputs_per_second": inputs / elapsed if elapsed else 0.0,
+            "sha256": combined.hexdigest(),
+            "sessions": {str(sid): session.result() for sid, session in sorted(sessions.items())}}
+
+
+def compare(result, baseline):
+    """Returns the ids of sessions whose output differs from (or is missing in) baseline."""
+    old, new = baseline["sessions"], result["sessions"]
+    return sorted((sid for sid in set(old) | set(new)
+                   if old.get(sid, {}).get("sha256") != new.get(sid, {}).get("sha256")), key=int)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded session log against an in-process server")
+    parser.add_argument("recording")
+    parser.add_argument("--realtime", action="store_true", help="keep the recorded time between events")
+    parser.add_argument("--verbose", action="store_true", help="show server output")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="check output hashes against an earlier --json run")
+    args = parser.parse_args(argv)
+
+    result = run(args.recording, args.realtime, args.verbose)
+    print(f"{result['events']} events, {len(result['sessions'])} sessions, {result['inputs']} inputs "
+          f"in {result['elapsed']:.3f}s ({result['inputs_per_second']:.0f} inputs/s)")
+    for sid, session in result["sessions"].items():
+        print(f"  session {sid:>4}: {session['inputs']:>5} inputs {session['output_bytes']:>8} bytes  "
+              f"{session['sha256'][:16]}")
+    print(f"output sha256 {result['sha256']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            changed = compare(result, json.load(f))
+        if changed:
+            print(f"Output differs from {args.compare} for sessions: {', '.join(changed)}")
+            return 1
+        print(f"Output matches {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from server.core.checkpoint import Checkpointer
+from server.core.room import Room
+from server.core.spawn import MobFactory
+from server.tools.bench import make_registries
+from unittest import mock
+
+
+class RestoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.items, self.mobs = make_registries(4, 2)
+        self.factory = MobFactory()
+        patcher = mock.patch("server.core.checkpoint.MOB_FACTORY", self.factory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def checkpointer(self):
+        return Checkpointer(os.path.join(self.tmp.name, "state.json"), os.path.join(self.tmp.name, "state.journal"))
+
+    def test_replaced_mobs_go_back_to_the_pool(self):
+        blueprint = next(iter(self.mobs.values()))
+        saved = self.checkpointer()
+        room = Room("r1", "Room", "A room.", {}, mob_instances=[self.factory.spawn(blueprint, 3)])
+        saved.mark_dirty(room)
+        saved.checkpoint()
+
+        authored = self.factory.spawn(blueprint, 1)
+        fresh = {"r1": Room("r1", "Room", "A room.", {}, mob_instances=[authored])}
+        with mock.patch("server.core.room.MOB_FACTORY", self.factory):
+            self.assertEqual(self.checkpointer().restore(fresh, self.mobs, self.items), 1)
+        restored = fresh["r1"].mob_instances
+        self.assertEqual([(mob.mob_blueprint.id, mob.quantity) for mob in restored], [(blueprint.id, 3)])
+        # The saved mob was spawned from the authored one the restore replaced
+        self.assertIs(restored[0], authored)
+        self.assertEqual(self.factory.reused, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
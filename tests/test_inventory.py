@@ -0,0 +1,82 @@
+import contextlib
+import io
+import unittest
+from server.core.content import ContainerInstance, ItemInstance
+from server.core.player import Player
+from server.core.transport import MemoryConnection
+from server.core.user import INVENTORY_FORMAT, UserManager
+from server.tools.bench import make_inventory, make_registries
+
+
+def shape(inventory):
+    return [(inst.item_blueprint.id, inst.quantity, shape(inst.contents) if hasattr(inst, "contents") else None)
+            for inst in inventory]
+
+
+class InventoryFormatTest(unittest.TestCase):
+    def setUp(self):
+        self.items, _ = make_registries(20, 1)
+        self.ids = list(self.items)
+
+    def load(self, data):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            inventory = UserManager.deserialize_inventory(data, self.items)
+        return inventory, out.getvalue()
+
+    def test_round_trip(self):
+        inventory = make_inventory(self.items, 30)
+        loaded, errors = self.load(UserManager.serialize_inventory(inventory))
+        self.assertEqual(shape(loaded), shape(inventory))
+        self.assertEqual(errors, "")
+
+    def test_unsupported_version_is_not_loaded(self):
+        data = {"v": INVENTORY_FORMAT + 1, "items": [[0, self.ids[0], 1]]}
+        loaded, errors = self.load(data)
+        self.assertEqual(loaded, [])
+        self.assertIn("[ERROR] Unsupported inventory format", errors)
+
+    def test_entry_without_container_goes_to_top_level(self):
+        data = {"v": INVENTORY_FORMAT, "items": [[0, self.ids[0], 1], [2, self.ids[1], 3], [0, self.ids[2], 1]]}
+        loaded, errors = self.load(data)
+        self.assertEqual(shape(loaded), [(self.ids[0], 1, None), (self.ids[1], 3, None), (self.ids[2], 1, None)])
+        self.assertIn("[ERROR] 1 saved inventory entries had no container", errors)
+
+    def test_orphan_inside_nested_bags_leaves_them_open(self):
+        bag, pouch, potion, sword, gem, coin = (self.ids[i] for i in (2, 6, 3, 1, 5, 7))
+        data = {"v": INVENTORY_FORMAT, "items": [
+            [0, bag, 1, 1], [1, pouch, 1, 1], [2, potion, 1], [4, sword, 1], [2, gem, 1], [1, coin, 2]]}
+        loaded, errors = self.load(data)
+        self.assertEqual(shape(loaded), [
+            (bag, 1, [(pouch, 1, [(potion, 1, None), (gem, 1, None)]), (coin, 2, None)]),
+            (sword, 1, None)])
+        self.assertIn("[ERROR] 1 saved inventory entries had no container", errors)
+
+
+class TakeFromContainerTest(unittest.TestCase):
+    def setUp(self):
+        items, _ = make_registries(8, 1)
+        self.potion, self.bag, self.pouch = items["item3"], items["item2"], items["item6"]
+        self.player = Player(MemoryConnection(), name="Taker")
+        self.container = ContainerInstance(self.bag)
+        self.player.inventory.append(self.container)
+
+    def test_taking_the_last_unit(self):
+        self.container.add_item(ItemInstance(self.potion, 2))
+        self.player.take_item_from_container("item 3", "item 2")
+        self.player.take_item_from_container("item 3", "item 2")
+        self.assertEqual(shape(self.player.inventory), [(self.bag.id, 1, []), (self.potion.id, 2, None)])
+        self.player.take_item_from_container("item 3", "item 2")
+        self.assertIn(b"There is no item 3 in the Item 2.", self.player.user.data())
+
+    def test_taking_a_container_keeps_its_contents(self):
+        pouch = ContainerInstance(self.pouch)
+        pouch.add_item(ItemInstance(self.potion, 1))
+        self.container.add_item(pouch)
+        self.player.take_item_from_container("item 6", "item 2")
+        self.assertEqual(shape(self.player.inventory),
+                         [(self.bag.id, 1, []), (self.pouch.id, 1, [(self.potion.id, 1, None)])])
+
+
+if __name__ == "__main__":
+    unittest.main()
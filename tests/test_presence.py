@@ -0,0 +1,116 @@
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from server import main
+from server.core import user as user_module
+from server.core.presence import PRESENCE, PresenceRegistry
+from server.core.room import ExitTable, Room
+from server.core.scheduler import SCHEDULER
+from server.core.session import LINKDEAD
+from server.core.transport import MemoryConnection
+from server.core.user import CHARACTER_SAVER
+from server.tools.headless import make_accounts
+from server.tools.loadgen import BOT_PASSWORD
+
+
+class WhoAndFingerTest(unittest.TestCase):
+    """who and finger describe a character from its saved data, online or not."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved = user_module.USERS_FILE, user_module._users, main.world
+        accounts = make_accounts(4)
+        wizard = accounts["bot1"]["characters"]["bot1"]
+        wizard["class"] = "Wizard"
+        wizard["level"] = 4
+        # Character names are only unique within an account
+        for account, player_class in (("bot2", "Cleric"), ("bot3", "Rogue")):
+            accounts[account]["characters"] = {"Twin": {"name": "Twin", "current_room_id": "start",
+                                                        "class": player_class, "inventory": []}}
+        user_module.USERS_FILE = os.path.join(self.tmp.name, "users.json")
+        user_module._users = accounts
+        main.world = {"start": Room("start", "Forest Clearing", "A quiet clearing.", {})}
+        ExitTable(main.world)
+        self.sessions = []
+
+    def tearDown(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for conn, thread in self.sessions:
+                conn.hang_up()
+                thread.join(5)
+            CHARACTER_SAVER.flush()
+        # Dropped sessions are parked linkdead; don't leave them for other tests
+        for account, character in (("bot0", "bot0"), ("bot1", "bot1"), ("bot2", "Twin"), ("bot3", "Twin")):
+            entry = LINKDEAD.reclaim(account, character)
+            if entry:
+                PRESENCE.remove(entry.player)
+        user_module.USERS_FILE, user_module._users, main.world = self.saved
+        self.tmp.cleanup()
+
+    def login(self, account):
+        conn = MemoryConnection()
+        thread = threading.Thread(target=main.handle_client, args=(conn, ("test", account)), daemon=True)
+        thread.start()
+        self.sessions.append((conn, thread))
+        for line in (account, BOT_PASSWORD):
+            self.assertTrue(conn.wait_reading(5))
+            conn.feed(f"{line}\r\n".encode())
+        self.assertTrue(conn.wait_reading(5))
+        return conn
+
+    def command(self, conn, line):
+        before = len(conn.data())
+        conn.feed(f"{line}\r\n".encode())
+        # The prompt comes back once the scheduler has run the command
+        deadline = time.monotonic() + 5
+        while not conn.data()[before:].rstrip().endswith(b">"):
+            self.assertLess(time.monotonic(), deadline, "no prompt after the command")
+            SCHEDULER.wait_idle(1)
+            time.sleep(0.01)
+        return conn.data()[before:].decode()
+
+    def test_online_and_offline_agree(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            watcher = self.login("bot0")
+            self.login("bot1")
+            who = self.command(watcher, "who")
+            self.assertRegex(who, r"bot1\s+Wizard\s+level 4\s")
+            self.assertIn("bot1, level 4 Wizard: online", self.command(watcher, "finger bot1"))
+
+            # Never seen since startup: finger falls back to the saved data
+            registry = PresenceRegistry()
+            with mock.patch.object(main, "PRESENCE", registry):
+                self.assertIn("bot1, level 4 Wizard: offline.", self.command(watcher, "finger bot1"))
+        self.assertEqual([entry.player_class for entry in PRESENCE.lookup("bot1")], ["Wizard"])
+
+    def test_same_name_in_two_accounts(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            watcher = self.login("bot0")
+            self.login("bot2")
+            self.login("bot3")
+            who = self.command(watcher, "who")
+            self.assertRegex(who, r"Twin\s+Cleric\s")
+            self.assertRegex(who, r"Twin\s+Rogue\s")
+            finger = self.command(watcher, "finger twin")
+            self.assertIn("Twin, level 1 Cleric: online", finger)
+            self.assertIn("Twin, level 1 Rogue: online", finger)
+            self.assertIn("More than one Twin is online", self.command(watcher, "tell twin hello"))
+
+            # One of them leaving for good leaves the other listed
+            entry = LINKDEAD.take_over("bot3", "Twin")
+            PRESENCE.remove(entry.player)
+            self.assertEqual([entry.player_class for entry in PRESENCE.lookup("Twin")[:1]], ["Cleric"])
+            self.assertEqual(PRESENCE.lookup("Twin")[1].status, "offline")
+            who = self.command(watcher, "who")
+            self.assertRegex(who, r"Twin\s+Cleric\s")
+            self.assertNotIn("Rogue", who)
+            self.assertIn("You tell Twin, 'hello'", self.command(watcher, "tell twin hello"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+
+try:
+    from server.tools import progression_sim
+except ImportError:  # numpy is only needed by the simulator
+    progression_sim = None
+
+
+@unittest.skipIf(progression_sim is None, "progression_sim needs numpy")
+class ConformanceTest(unittest.TestCase):
+    """The vectorised Population must level, heal and armour characters exactly as Player does."""
+
+    def assertConforms(self, **kwargs):
+        mismatches = progression_sim.conformance_check(**kwargs)
+        self.assertEqual(mismatches, [], f"{len(mismatches)} mismatches, first: {mismatches[:5]}")
+
+    def test_default_check(self):
+        self.assertConforms()
+
+    def test_other_seeds(self):
+        for seed in (2, 3):
+            with self.subTest(seed=seed):
+                self.assertConforms(characters=50, ticks=30, seed=seed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import tempfile
+import unittest
+from server.core.recorder import RecordedConnection, SessionRecorder
+from server.core.transport import MemoryConnection
+
+
+class PasswordRedactionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.recorder = SessionRecorder()
+        self.path = self.recorder.start(self.tmp.name)
+        self.memory = MemoryConnection()
+        self.conn = self.recorder.wrap(self.memory, ("test", 1))
+        self.assertIsInstance(self.conn, RecordedConnection)
+
+    def tearDown(self):
+        self.recorder.stop()
+        self.tmp.cleanup()
+
+    def events(self):
+        self.recorder.stop()
+        with open(self.path) as f:
+            header = json.loads(f.readline())
+            return header, [json.loads(line) for line in f]
+
+    def read(self, *chunks):
+        for chunk in chunks:
+            self.memory.feed(chunk)
+            self.assertEqual(self.conn.recv(1024), chunk)
+
+    def test_commands_typed_ahead_of_the_password_are_kept(self):
+        self.read(b"bot0\r\n")
+        self.recorder.secret(self.conn)
+        self.read(b"hunter2\r\nlook\r\n", b"who\r\n")
+        header, events = self.events()
+        text = json.dumps(events)
+        self.assertNotIn("hunter2", text)
+        self.assertEqual([(e["e"], e["d"]) for e in events[1:]],
+                         [("in", "bot0\r\n"), ("secret", "\r\nlook\r\n"), ("in", "who\r\n")])
+
+    def test_password_split_across_reads(self):
+        self.recorder.secret(self.conn)
+        self.read(b"hun", b"ter2", b"\r\nlook\r\n")
+        _, events = self.events()
+        self.assertEqual([(e["e"], e["d"]) for e in events[1:]],
+                         [("secret", ""), ("secret", ""), ("secret", "\r\nlook\r\n")])
+
+    def test_snapshot_has_no_password_hashes(self):
+        header, _ = self.events()
+        for path, text in header["files"].items():
+            if path.endswith("users.json"):
+                self.assertTrue(all(account["password"] is None for account in json.loads(text).values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from server.core import user as user_module
+from server.core.user import CharacterSaver, UserManager
+
+
+class CharacterSaverTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved = user_module.USERS_FILE, user_module._users
+        user_module.USERS_FILE = os.path.join(self.tmp.name, "users.json")
+        user_module._users = {f"acct{i}": {"password": None, "characters": {
+            f"char{i}": {"name": f"char{i}", "current_room_id": "start"}}} for i in range(2)}
+
+    def tearDown(self):
+        user_module.USERS_FILE, user_module._users = self.saved
+        self.tmp.cleanup()
+
+    def test_changes_are_coalesced_into_one_write(self):
+        saver = CharacterSaver()
+        for room in ("r1", "r2", "r3"):
+            saver.mark_dirty("acct0", "char0", {"current_room_id": room})
+        saver.mark_dirty("acct1", "char1", {"current_room_id": "r9"})
+        with mock.patch.object(UserManager, "save_users", wraps=UserManager.save_users) as save_users:
+            self.assertEqual(saver.flush(), 2)
+            self.assertEqual(saver.flush(), 0)
+        self.assertEqual(save_users.call_count, 1)
+        with open(user_module.USERS_FILE) as f:
+            users = json.load(f)
+        self.assertEqual(users["acct0"]["characters"]["char0"]["current_room_id"], "r3")
+        self.assertEqual(users["acct1"]["characters"]["char1"]["current_room_id"], "r9")
+
+    def test_marked_data_is_a_copy(self):
+        saver = CharacterSaver()
+        data = {"current_room_id": "r1"}
+        saver.mark_dirty("acct0", "char0", data)
+        data["current_room_id"] = "r2"
+        saver.flush()
+        self.assertEqual(user_module._users["acct0"]["characters"]["char0"]["current_room_id"], "r1")
+
+    def test_failed_write_keeps_changes_pending(self):
+        saver = CharacterSaver()
+        saver.mark_dirty("acct0", "char0", {"current_room_id": "r1"})
+        with mock.patch.object(UserManager, "save_users", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                saver.flush()
+        saver.mark_dirty("acct1", "char1", {"current_room_id": "r2"})
+        self.assertEqual(saver.flush(), 2)
+        with open(user_module.USERS_FILE) as f:
+            users = json.load(f)
+        self.assertEqual(users["acct0"]["characters"]["char0"]["current_room_id"], "r1")
+        self.assertEqual(users["acct1"]["characters"]["char1"]["current_room_id"], "r2")
+
+
+if __name__ == "__main__":
+    unittest.main()